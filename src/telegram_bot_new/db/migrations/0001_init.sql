@@ -33,8 +33,6 @@ CREATE TABLE IF NOT EXISTS telegram_update_jobs (
   updated_at BIGINT NOT NULL,
   UNIQUE (bot_id, update_id)
 );
-CREATE INDEX IF NOT EXISTS ix_telegram_update_jobs_bot_status_available
-  ON telegram_update_jobs (bot_id, status, available_at);
 
 CREATE TABLE IF NOT EXISTS sessions (
   session_id VARCHAR(64) PRIMARY KEY,
@@ -81,8 +79,6 @@ CREATE TABLE IF NOT EXISTS cli_run_jobs (
   created_at BIGINT NOT NULL,
   updated_at BIGINT NOT NULL
 );
-CREATE INDEX IF NOT EXISTS ix_cli_run_jobs_bot_status_available
-  ON cli_run_jobs (bot_id, status, available_at);
 CREATE UNIQUE INDEX IF NOT EXISTS uq_cli_run_jobs_bot_chat_active
   ON cli_run_jobs (bot_id, chat_id)
   WHERE status IN ('queued', 'leased', 'in_flight');
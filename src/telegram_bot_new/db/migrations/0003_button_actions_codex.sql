@@ -25,5 +25,3 @@ CREATE TABLE IF NOT EXISTS deferred_button_actions (
   created_at BIGINT NOT NULL,
   updated_at BIGINT NOT NULL
 );
-CREATE INDEX IF NOT EXISTS ix_deferred_button_actions_bot_chat_status_created
-  ON deferred_button_actions (bot_id, chat_id, status, created_at);
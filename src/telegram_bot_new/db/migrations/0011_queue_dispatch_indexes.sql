@@ -0,0 +1,22 @@
+-- Partial covering indexes for the lease scans in lease_next_*_job.
+-- They index only claimable rows, in dispatch order, and INCLUDE the selected
+-- and filtered columns so `FOR UPDATE SKIP LOCKED` can seek without heap scans.
+-- They replace the wide (bot_id, status, available_at) b-trees that 0001 used
+-- to create; 0001 no longer builds them, and the drops below only clean up
+-- databases created before that change (no-ops afterwards).
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_telegram_update_jobs_dispatch
+  ON telegram_update_jobs (bot_id, available_at, created_at)
+  INCLUDE (id, update_id, status, lease_expires_at)
+  WHERE status IN ('queued', 'leased');
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_cli_run_jobs_dispatch
+  ON cli_run_jobs (bot_id, available_at, created_at)
+  INCLUDE (id, turn_id, chat_id, status, lease_expires_at)
+  WHERE status IN ('queued', 'leased', 'in_flight');
+
+DROP INDEX CONCURRENTLY IF EXISTS ix_telegram_update_jobs_bot_status_available;
+DROP INDEX CONCURRENTLY IF EXISTS ix_cli_run_jobs_bot_status_available;
+
+ANALYZE telegram_update_jobs;
+ANALYZE cli_run_jobs;
@@ -0,0 +1,16 @@
+-- Store CLI event payloads as binary JSONB instead of JSON text.
+-- Guarded so restarts do not rewrite an already-converted table.
+
+DO $$
+BEGIN
+  IF EXISTS (
+    SELECT 1
+    FROM information_schema.columns
+    WHERE table_name = 'cli_events'
+      AND column_name = 'payload_json'
+      AND data_type <> 'jsonb'
+  ) THEN
+    ALTER TABLE cli_events ALTER COLUMN payload_json TYPE jsonb USING payload_json::jsonb;
+  END IF;
+END
+$$;
@@ -0,0 +1,24 @@
+-- Compress large Telegram update payloads with lz4 when TOASTed (Postgres 14+).
+-- Values above the TOAST threshold are compressed server-side; readers are unchanged.
+-- Guarded on pg_attribute so restarts do not re-take the ACCESS EXCLUSIVE lock.
+-- Skipped on servers built without lz4 support.
+
+DO $$
+BEGIN
+  IF current_setting('server_version_num')::int >= 140000 THEN
+    -- Nested so attcompression is only referenced on servers that have it.
+    IF EXISTS (
+      SELECT 1
+      FROM pg_attribute
+      WHERE attrelid = 'telegram_updates'::regclass
+        AND attname = 'payload_json'
+        AND attcompression IS DISTINCT FROM 'l'
+    ) THEN
+      ALTER TABLE telegram_updates ALTER COLUMN payload_json SET COMPRESSION lz4;
+    END IF;
+  END IF;
+EXCEPTION
+  WHEN feature_not_supported THEN
+    NULL;
+END
+$$;
@@ -0,0 +1,14 @@
+-- Partial index for the FIFO head scan in promote_next_deferred_action and the
+-- queue-depth check in enqueue_deferred_button_action. Only queued rows are
+-- indexed, so SKIP LOCKED seeks to the head instead of stepping over promoted
+-- and cancelled history. It replaces the wide (bot_id, chat_id, status,
+-- created_at) b-tree that 0003 used to create; the drop below only removes it
+-- from databases created before 0003 stopped building it.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_deferred_button_actions_queued
+  ON deferred_button_actions (bot_id, chat_id, created_at)
+  WHERE status = 'queued';
+
+DROP INDEX CONCURRENTLY IF EXISTS ix_deferred_button_actions_bot_chat_status_created;
+
+ANALYZE deferred_button_actions;
@@ -1,6 +1,9 @@
 from __future__ import annotations
 
-from sqlalchemy import BigInteger, ForeignKey, Index, Integer, String, Text
+from typing import Any
+
+from sqlalchemy import JSON, BigInteger, ForeignKey, Index, Integer, String, Text
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
 
@@ -110,7 +113,7 @@ class CliEvent(Base):
     bot_id: Mapped[str] = mapped_column(String(64), nullable=False, index=True)
     seq: Mapped[int] = mapped_column(Integer, nullable=False)
     event_type: Mapped[str] = mapped_column(String(64), nullable=False)
-    payload_json: Mapped[str] = mapped_column(Text, nullable=False)
+    payload_json: Mapped[dict[str, Any]] = mapped_column(JSON().with_variant(JSONB(), "postgresql"), nullable=False)
     created_at: Mapped[int] = mapped_column(BigInteger, nullable=False)
 
     __table_args__ = (
@@ -191,11 +194,12 @@ class AuditLog(Base):
 
 Index("ix_sessions_bot_chat_updated", Session.bot_id, Session.chat_id, Session.updated_at.desc())
 Index(
-    "ix_deferred_button_actions_bot_chat_status_created",
+    "ix_deferred_button_actions_queued",
     DeferredButtonAction.bot_id,
     DeferredButtonAction.chat_id,
-    DeferredButtonAction.status,
     DeferredButtonAction.created_at,
+    postgresql_where=DeferredButtonAction.status == "queued",
+    sqlite_where=DeferredButtonAction.status == "queued",
 )
 Index("ix_runtime_metric_counters_bot_key", RuntimeMetricCounter.bot_id, RuntimeMetricCounter.metric_key)
 Index("ix_audit_logs_bot_chat_created", AuditLog.bot_id, AuditLog.chat_id, AuditLog.created_at.desc())
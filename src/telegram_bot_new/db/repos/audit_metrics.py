@@ -1,10 +1,29 @@
 from __future__ import annotations
 
+import asyncio
+import logging
+from time import monotonic
+from typing import Any
 from uuid import uuid4
 
-from sqlalchemy import and_, func, select, text
+from sqlalchemy import and_, bindparam, func, literal_column, select, union_all
 
 from telegram_bot_new.db.models import AuditLog, CliRunJob, RuntimeMetricCounter, TelegramUpdate, TelegramUpdateJob
+from telegram_bot_new.db.repos.update_jobs import _dialect_insert
+
+LOGGER = logging.getLogger(__name__)
+
+# Distinct (bot_id, metric_key) buckets buffered before a flush is forced early.
+RUNTIME_METRIC_FLUSH_MAX_PENDING = 256
+
+_PG_UPSERT_RUNTIME_METRIC_SQL = """
+INSERT INTO runtime_metric_counters (bot_id, metric_key, metric_value, updated_at)
+VALUES ($1, $2, $3, $4)
+ON CONFLICT (bot_id, metric_key)
+DO UPDATE
+SET metric_value = runtime_metric_counters.metric_value + EXCLUDED.metric_value,
+    updated_at = EXCLUDED.updated_at
+"""
 
 
 async def increment_runtime_metric(
@@ -18,75 +37,212 @@ async def increment_runtime_metric(
     if delta == 0:
         return
 
-    async with self._session_factory() as session:
-        await session.execute(
-            text(
-                """
-                INSERT INTO runtime_metric_counters (bot_id, metric_key, metric_value, updated_at)
-                VALUES (:bot_id, :metric_key, :delta, :now)
-                ON CONFLICT (bot_id, metric_key)
-                DO UPDATE
-                SET metric_value = runtime_metric_counters.metric_value + EXCLUDED.metric_value,
-                    updated_at = EXCLUDED.updated_at
-                """
-            ),
-            {
-                "bot_id": bot_id,
-                "metric_key": metric_key,
-                "delta": int(delta),
-                "now": now,
-            },
-        )
-        await session.commit()
+    if self._metrics_flush_interval_sec <= 0:
+        await _upsert_runtime_metrics(self, {(bot_id, metric_key): (int(delta), now)})
+        return
+
+    # Write-behind: coalesce into the in-process buffer; the flusher turns every
+    # pending bucket into one multi-row upsert.
+    key = (bot_id, metric_key)
+    pending_delta, _ = self._pending_counters.get(key, (0, now))
+    self._pending_counters[key] = (pending_delta + int(delta), now)
+    if self._metrics_flush_task is None or self._metrics_flush_task.done():
+        self._metrics_flush_task = asyncio.create_task(_flush_runtime_metrics_loop(self))
+    if len(self._pending_counters) >= RUNTIME_METRIC_FLUSH_MAX_PENDING:
+        await flush_runtime_metrics(self)
+
+
+async def flush_runtime_metrics(self) -> None:
+    async with self._pending_counters_lock:
+        pending, self._pending_counters = self._pending_counters, {}
+        if not pending:
+            return
+        # Stays visible to get_metrics until the upsert lands.
+        self._flushing_counters = pending
+        try:
+            await _upsert_runtime_metrics(self, pending)
+        except BaseException:
+            # Re-buffer so a failed or cancelled flush does not drop counts.
+            for key, (delta, now) in pending.items():
+                newer_delta, newer_now = self._pending_counters.get(key, (0, now))
+                self._pending_counters[key] = (delta + newer_delta, max(now, newer_now))
+            raise
+        finally:
+            self._flushing_counters = {}
+
+
+async def _flush_runtime_metrics_loop(self) -> None:
+    while True:
+        await asyncio.sleep(self._metrics_flush_interval_sec)
+        try:
+            await flush_runtime_metrics(self)
+        except Exception:
+            LOGGER.exception("failed to flush runtime metrics")
+
+
+async def _upsert_runtime_metrics(self, pending: dict[tuple[str, str], tuple[int, int]]) -> None:
+    if self._engine.dialect.driver == "asyncpg":
+        # Hand the batch straight to asyncpg: executemany prepares once (cached per
+        # connection) and pipelines every row without SQLAlchemy compile/dispatch.
+        # The raw connection bypasses SQLAlchemy's transaction handling, so open
+        # one explicitly: the batch commits as a whole or not at all.
+        async with self._engine.connect() as conn:
+            raw = await conn.get_raw_connection()
+            async with raw.driver_connection.transaction():
+                await raw.driver_connection.executemany(
+                    _PG_UPSERT_RUNTIME_METRIC_SQL,
+                    [(bot_id, metric_key, delta, now) for (bot_id, metric_key), (delta, now) in pending.items()],
+                )
+        self._metrics_version += 1
+        return
+
+    insert = _dialect_insert(self)
+    stmt = insert(RuntimeMetricCounter).values(
+        [
+            {"bot_id": bot_id, "metric_key": metric_key, "metric_value": delta, "updated_at": now}
+            for (bot_id, metric_key), (delta, now) in pending.items()
+        ]
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[RuntimeMetricCounter.bot_id, RuntimeMetricCounter.metric_key],
+        set_={
+            "metric_value": RuntimeMetricCounter.metric_value + stmt.excluded.metric_value,
+            "updated_at": stmt.excluded.updated_at,
+        },
+    )
+    async with self._session_factory.begin() as session:
+        await session.execute(stmt)
+    self._metrics_version += 1
 
 
 async def get_metrics(self, *, bot_id: str | None = None) -> dict[str, Any]:
-    async with self._session_factory() as session:
-        update_q = select(func.count()).select_from(TelegramUpdateJob)
-        run_q = select(func.count()).select_from(CliRunJob)
-        in_flight_q = select(func.count()).select_from(CliRunJob).where(CliRunJob.status.in_(["leased", "in_flight"]))
-        updates_total_q = select(func.count()).select_from(TelegramUpdate)
-        update_status_q = select(TelegramUpdateJob.status, func.count()).select_from(TelegramUpdateJob)
-        run_status_q = select(CliRunJob.status, func.count()).select_from(CliRunJob)
-        runtime_counters_q = select(RuntimeMetricCounter.metric_key, RuntimeMetricCounter.metric_value).select_from(
-            RuntimeMetricCounter
-        )
+    metrics = await _get_stored_metrics(self, bot_id=bot_id)
+    # The write-behind buffer holds the live tail of each counter; overlay it on
+    # the stored snapshot instead of forcing a flush per read.
+    return _with_buffered_counters(self, bot_id, metrics)
 
-        if bot_id is not None:
-            update_q = update_q.where(TelegramUpdateJob.bot_id == bot_id)
-            run_q = run_q.where(CliRunJob.bot_id == bot_id)
-            in_flight_q = in_flight_q.where(CliRunJob.bot_id == bot_id)
-            updates_total_q = updates_total_q.where(TelegramUpdate.bot_id == bot_id)
-            update_status_q = update_status_q.where(TelegramUpdateJob.bot_id == bot_id)
-            run_status_q = run_status_q.where(CliRunJob.bot_id == bot_id)
-            runtime_counters_q = runtime_counters_q.where(RuntimeMetricCounter.bot_id == bot_id)
-
-        update_status_q = update_status_q.group_by(TelegramUpdateJob.status)
-        run_status_q = run_status_q.group_by(CliRunJob.status)
-
-        updates_jobs = int((await session.execute(update_q)).scalar_one())
-        run_jobs = int((await session.execute(run_q)).scalar_one())
-        in_flight = int((await session.execute(in_flight_q)).scalar_one())
-        updates_total = int((await session.execute(updates_total_q)).scalar_one())
-        update_status_rows = (await session.execute(update_status_q)).all()
-        run_status_rows = (await session.execute(run_status_q)).all()
-        runtime_counter_rows = (await session.execute(runtime_counters_q)).all()
-
-        return {
-            "telegram_update_jobs": updates_jobs,
-            "cli_run_jobs": run_jobs,
-            "in_flight_runs": in_flight,
-            "telegram_updates_total": updates_total,
-            "telegram_update_jobs_by_status": {
-                str(row[0]): int(row[1]) for row in update_status_rows if isinstance(row[0], str)
-            },
-            "cli_run_jobs_by_status": {
-                str(row[0]): int(row[1]) for row in run_status_rows if isinstance(row[0], str)
-            },
-            "runtime_counters": {
-                str(row[0]): int(row[1]) for row in runtime_counter_rows if isinstance(row[0], str)
-            },
-        }
+
+def _with_buffered_counters(self, bot_id: str | None, metrics: dict[str, Any]) -> dict[str, Any]:
+    buffered = [
+        (metric_key, delta)
+        for counters in (self._flushing_counters, self._pending_counters)
+        for (counter_bot_id, metric_key), (delta, _) in counters.items()
+        if bot_id is None or counter_bot_id == bot_id
+    ]
+    if not buffered:
+        return metrics
+    runtime_counters = dict(metrics["runtime_counters"])
+    for metric_key, delta in buffered:
+        runtime_counters[metric_key] = runtime_counters.get(metric_key, 0) + delta
+    return {**metrics, "runtime_counters": runtime_counters}
+
+
+async def _get_stored_metrics(self, *, bot_id: str | None) -> dict[str, Any]:
+    ttl_sec = self._metrics_cache_ttl_sec
+    if ttl_sec <= 0:
+        return await _query_metrics(self, bot_id=bot_id)
+
+    cached = _fresh_cached_metrics(self, bot_id)
+    if cached is not None:
+        return cached
+    # Single-flight per bot_id: concurrent scrapes wait for one DB hit.
+    lock = self._metrics_locks.setdefault(bot_id, asyncio.Lock())
+    async with lock:
+        cached = _fresh_cached_metrics(self, bot_id)
+        if cached is not None:
+            return cached
+        version = self._metrics_version
+        metrics = await _query_metrics(self, bot_id=bot_id)
+        self._metrics_cache[bot_id] = (monotonic() + ttl_sec, version, metrics)
+        return metrics
+
+
+def _fresh_cached_metrics(self, bot_id: str | None) -> dict[str, Any] | None:
+    cached = self._metrics_cache.get(bot_id)
+    if cached is None:
+        return None
+    expires_at, version, metrics = cached
+    if expires_at <= monotonic() or version != self._metrics_version:
+        return None
+    return metrics
+
+
+def _build_metrics_query(*, scoped: bool) -> Any:
+    # One round-trip: every section is a (section, key, value) row of a single
+    # UNION ALL. Job totals and in-flight counts are derived from the status
+    # breakdowns instead of scanning the job tables a second time.
+    update_status_q = select(
+        literal_column("'update_status'").label("section"),
+        TelegramUpdateJob.status.label("key"),
+        func.count().label("value"),
+    ).group_by(TelegramUpdateJob.status)
+    run_status_q = select(
+        literal_column("'run_status'"),
+        CliRunJob.status,
+        func.count(),
+    ).group_by(CliRunJob.status)
+    updates_total_q = select(
+        literal_column("'updates_total'"),
+        literal_column("''"),
+        func.count(),
+    ).select_from(TelegramUpdate)
+    runtime_counters_q = select(
+        literal_column("'runtime_counter'"),
+        RuntimeMetricCounter.metric_key,
+        RuntimeMetricCounter.metric_value,
+    )
+
+    if scoped:
+        bot_id = bindparam("bot_id")
+        update_status_q = update_status_q.where(TelegramUpdateJob.bot_id == bot_id)
+        run_status_q = run_status_q.where(CliRunJob.bot_id == bot_id)
+        updates_total_q = updates_total_q.where(TelegramUpdate.bot_id == bot_id)
+        runtime_counters_q = runtime_counters_q.where(RuntimeMetricCounter.bot_id == bot_id)
+
+    return union_all(update_status_q, run_status_q, updates_total_q, runtime_counters_q)
+
+
+# Built once at import: scrapes only bind bot_id instead of rebuilding the
+# select tree, so repeat calls go straight to the engine's compiled cache.
+_METRICS_QUERY = _build_metrics_query(scoped=False)
+_METRICS_QUERY_BY_BOT = _build_metrics_query(scoped=True)
+
+
+async def _query_metrics(self, *, bot_id: str | None) -> dict[str, Any]:
+    # Read-only: a Core connection on the read engine skips building an ORM session
+    # (SQLAlchemy still opens an implicit transaction and rolls it back on close),
+    # and keeps dashboard scans off the primary when a replica is set.
+    async with self._read_engine.connect() as conn:
+        if bot_id is None:
+            rows = (await conn.execute(_METRICS_QUERY)).all()
+        else:
+            rows = (await conn.execute(_METRICS_QUERY_BY_BOT, {"bot_id": bot_id})).all()
+
+    update_status: dict[str, int] = {}
+    run_status: dict[str, int] = {}
+    runtime_counters: dict[str, int] = {}
+    updates_total = 0
+    for section, key, value in rows:
+        if section == "updates_total":
+            updates_total = int(value)
+        elif not isinstance(key, str):
+            continue
+        elif section == "update_status":
+            update_status[key] = int(value)
+        elif section == "run_status":
+            run_status[key] = int(value)
+        elif section == "runtime_counter":
+            runtime_counters[key] = int(value)
+
+    return {
+        "telegram_update_jobs": sum(update_status.values()),
+        "cli_run_jobs": sum(run_status.values()),
+        "in_flight_runs": run_status.get("leased", 0) + run_status.get("in_flight", 0),
+        "telegram_updates_total": updates_total,
+        "telegram_update_jobs_by_status": update_status,
+        "cli_run_jobs_by_status": run_status,
+        "runtime_counters": runtime_counters,
+    }
 
 
 async def list_audit_logs(
@@ -1,12 +1,90 @@
 from __future__ import annotations
 
+from time import monotonic
+from typing import Any
 from uuid import uuid4
 
-from sqlalchemy import and_, func, or_, select, text, update
+from sqlalchemy import String, and_, any_, bindparam, exists, func, insert, or_, select, text, update
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.exc import IntegrityError
 
 from telegram_bot_new.db.models import CliEvent, CliRunJob, DeferredButtonAction, Turn
 
+# Cancel checks are polled on every streaming tick; coalesce "still running"
+# answers for a short window at the cost of that much extra cancel latency.
+CANCEL_CHECK_CACHE_TTL_SEC = 0.2
+
+_LEASE_RUN_JOB_SQL = text(
+    """
+    SELECT id, turn_id, chat_id
+    FROM cli_run_jobs
+    WHERE bot_id = :bot_id
+      AND available_at <= :now
+      AND status IN ('queued', 'leased', 'in_flight')
+      AND (
+        status = 'queued'
+        OR (
+          status IN ('leased', 'in_flight')
+          AND lease_expires_at IS NOT NULL
+          AND lease_expires_at < :now
+        )
+      )
+    ORDER BY available_at ASC, created_at ASC
+    FOR UPDATE SKIP LOCKED
+    LIMIT 1
+    """
+)
+
+# Every CTE here modifies data, so Postgres always materializes it exactly once;
+# the SKIP LOCKED LIMIT 1 lives in a scalar subquery of the UPDATE, never in an
+# inlinable CTE. Keep it that way rather than adding AS MATERIALIZED (PG 12+ only).
+_PROMOTE_DEFERRED_ACTION_SQL = text(
+    """
+    WITH upd AS (
+      UPDATE deferred_button_actions
+      SET status = 'promoted', updated_at = :now
+      WHERE id = (
+        SELECT id
+        FROM deferred_button_actions
+        WHERE bot_id = :bot_id
+          AND chat_id = :chat_id
+          AND status = 'queued'
+          AND NOT EXISTS (
+            SELECT 1
+            FROM cli_run_jobs
+            WHERE bot_id = :bot_id
+              AND chat_id = :chat_id
+              AND status IN ('queued', 'leased', 'in_flight')
+          )
+        ORDER BY created_at ASC
+        FOR UPDATE SKIP LOCKED
+        LIMIT 1
+      )
+      RETURNING id, action_type, session_id, prompt_text
+    ),
+    t AS (
+      INSERT INTO turns (
+        turn_id, session_id, bot_id, chat_id, user_text, assistant_text,
+        status, error_text, started_at, finished_at, created_at
+      )
+      SELECT :turn_id, session_id, :bot_id, :chat_id, prompt_text, NULL,
+             'queued', NULL, NULL, NULL, :now
+      FROM upd
+    ),
+    j AS (
+      INSERT INTO cli_run_jobs (
+        id, turn_id, bot_id, chat_id, status, lease_owner, lease_expires_at,
+        available_at, attempts, last_error, created_at, updated_at
+      )
+      SELECT :job_id, :turn_id, :bot_id, :chat_id, 'queued', NULL, NULL,
+             :now, 0, NULL, :now, :now
+      FROM upd
+    )
+    SELECT upd.id AS action_id, upd.action_type
+    FROM upd
+    """
+)
+
 
 async def create_turn_and_job(
     self,
@@ -75,6 +153,9 @@ async def lease_next_run_job(self, *, bot_id: str, owner: str, now: int, lease_d
             claimable = and_(
                 CliRunJob.bot_id == bot_id,
                 CliRunJob.available_at <= now,
+                # Redundant with the OR below, but lets the planner match the
+                # partial ix_cli_run_jobs_dispatch index.
+                CliRunJob.status.in_(["queued", "leased", "in_flight"]),
                 or_(
                     CliRunJob.status == "queued",
                     and_(
@@ -87,25 +168,7 @@ async def lease_next_run_job(self, *, bot_id: str, owner: str, now: int, lease_d
             if is_postgres:
                 row = (
                     await session.execute(
-                        text(
-                            """
-                            SELECT id, turn_id, chat_id
-                            FROM cli_run_jobs
-                            WHERE bot_id = :bot_id
-                              AND available_at <= :now
-                              AND (
-                                status = 'queued'
-                                OR (
-                                  status IN ('leased', 'in_flight')
-                                  AND lease_expires_at IS NOT NULL
-                                  AND lease_expires_at < :now
-                                )
-                              )
-                            ORDER BY available_at ASC, created_at ASC
-                            FOR UPDATE SKIP LOCKED
-                            LIMIT 1
-                            """
-                        ),
+                        _LEASE_RUN_JOB_SQL,
                         {"bot_id": bot_id, "now": now},
                     )
                 ).first()
@@ -167,16 +230,16 @@ async def mark_run_in_flight(self, *, job_id: str, turn_id: str, now: int) -> No
 
 async def renew_run_job_lease(self, *, job_id: str, now: int, lease_duration_ms: int) -> None:
     lease_until = now + lease_duration_ms
-    async with self._session_factory() as session:
-        await session.execute(
+    async with self._autocommit() as conn:
+        await conn.execute(
             update(CliRunJob)
             .where(and_(CliRunJob.id == job_id, CliRunJob.status.in_(["leased", "in_flight"])))
             .values(lease_expires_at=lease_until, updated_at=now)
         )
-        await session.commit()
 
 
 async def complete_run_job_and_turn(self, *, job_id: str, turn_id: str, assistant_text: str, now: int) -> None:
+    self._cancel_cache.pop(turn_id, None)
     async with self._session_factory() as session:
         await session.execute(
             update(CliRunJob)
@@ -192,6 +255,7 @@ async def complete_run_job_and_turn(self, *, job_id: str, turn_id: str, assistan
 
 
 async def fail_run_job_and_turn(self, *, job_id: str, turn_id: str, error_text: str, now: int) -> None:
+    self._cancel_cache.pop(turn_id, None)
     async with self._session_factory() as session:
         await session.execute(
             update(CliRunJob)
@@ -207,6 +271,7 @@ async def fail_run_job_and_turn(self, *, job_id: str, turn_id: str, error_text:
 
 
 async def mark_run_job_cancelled(self, *, job_id: str, turn_id: str, now: int) -> None:
+    self._cancel_cache.pop(turn_id, None)
     async with self._session_factory() as session:
         await session.execute(
             update(CliRunJob)
@@ -252,18 +317,34 @@ async def cancel_active_turn(self, *, bot_id: str, chat_id: str, now: int) -> st
             .values(status="cancelled", finished_at=now)
         )
         await session.commit()
+        self._cancel_cache.pop(row.turn_id, None)
         return row.turn_id
 
 
 async def is_turn_cancelled(self, *, turn_id: str) -> bool:
-    async with self._session_factory() as session:
-        row = (
-            await session.execute(select(Turn.status).where(Turn.turn_id == turn_id).limit(1))
-        ).first()
-        return bool(row and row[0] == "cancelled")
+    expires_at = self._cancel_cache.get(turn_id)
+    if expires_at is not None and expires_at > monotonic():
+        return False
 
+    async with self._engine.connect() as conn:
+        status = await conn.scalar(select(Turn.status).where(Turn.turn_id == turn_id).limit(1))
+    if status == "cancelled":
+        self._cancel_cache.pop(turn_id, None)
+        return True
+    self._cancel_cache[turn_id] = monotonic() + CANCEL_CHECK_CACHE_TTL_SEC
+    return False
 
-async def append_cli_event(self, *, turn_id: str, bot_id: str, seq: int, event_type: str, payload_json: str, now: int) -> None:
+
+async def append_cli_event(
+    self,
+    *,
+    turn_id: str,
+    bot_id: str,
+    seq: int,
+    event_type: str,
+    payload: dict[str, Any],
+    now: int,
+) -> None:
     async with self._session_factory() as session:
         # SQLite may carry legacy cli_events schemas where `id` is not an
         # auto-incrementing INTEGER PRIMARY KEY. In that case, assign id
@@ -284,7 +365,7 @@ async def append_cli_event(self, *, turn_id: str, bot_id: str, seq: int, event_t
                         bot_id=bot_id,
                         seq=seq,
                         event_type=event_type,
-                        payload_json=payload_json,
+                        payload_json=payload,
                         created_at=now,
                     )
                 )
@@ -302,7 +383,7 @@ async def append_cli_event(self, *, turn_id: str, bot_id: str, seq: int, event_t
                 bot_id=bot_id,
                 seq=seq,
                 event_type=event_type,
-                payload_json=payload_json,
+                payload_json=payload,
                 created_at=now,
             )
         )
@@ -333,17 +414,17 @@ async def get_latest_completed_turn_for_session(self, *, session_id: str) -> Tur
 async def has_active_run(self, *, bot_id: str, chat_id: str) -> bool:
     async with self._session_factory() as session:
         result = await session.execute(
-            select(func.count())
-            .select_from(CliRunJob)
-            .where(
-                and_(
-                    CliRunJob.bot_id == bot_id,
-                    CliRunJob.chat_id == chat_id,
-                    CliRunJob.status.in_(["queued", "leased", "in_flight"]),
+            select(
+                exists().where(
+                    and_(
+                        CliRunJob.bot_id == bot_id,
+                        CliRunJob.chat_id == chat_id,
+                        CliRunJob.status.in_(["queued", "leased", "in_flight"]),
+                    )
                 )
             )
         )
-        return int(result.scalar_one()) > 0
+        return bool(result.scalar_one())
 
 
 async def enqueue_deferred_button_action(
@@ -392,11 +473,17 @@ async def enqueue_deferred_button_action(
 
             overflow = len(queued_ids) - max(1, max_queue)
             if overflow > 0:
-                to_drop = queued_ids[:overflow]
+                to_drop = list(queued_ids[:overflow])
+                # One bulk UPDATE whose SQL text does not depend on the batch size:
+                # `= ANY(:ids)` on Postgres keeps a single prepared statement.
+                if self._engine.dialect.name == "postgresql":
+                    drop_filter = DeferredButtonAction.id == any_(
+                        bindparam("drop_ids", value=to_drop, type_=ARRAY(String))
+                    )
+                else:
+                    drop_filter = DeferredButtonAction.id.in_(bindparam("drop_ids", value=to_drop, expanding=True))
                 await session.execute(
-                    update(DeferredButtonAction)
-                    .where(DeferredButtonAction.id.in_(to_drop))
-                    .values(status="cancelled", updated_at=now)
+                    update(DeferredButtonAction).where(drop_filter).values(status="cancelled", updated_at=now)
                 )
 
     return action_id
@@ -411,81 +498,98 @@ async def promote_next_deferred_action(
 ) -> PromotedDeferredAction | None:
     from telegram_bot_new.db.repository import PromotedDeferredAction
 
+    turn_id = str(uuid4())
+    job_id = str(uuid4())
+    if self._engine.dialect.name == "postgresql":
+        # One round-trip: guard, claim, and both inserts run as a single statement.
+        async with self._session_factory() as session:
+            async with session.begin():
+                promoted = (
+                    await session.execute(
+                        _PROMOTE_DEFERRED_ACTION_SQL,
+                        {"bot_id": bot_id, "chat_id": chat_id, "now": now, "turn_id": turn_id, "job_id": job_id},
+                    )
+                ).first()
+        if promoted is None:
+            return None
+        return PromotedDeferredAction(
+            action_id=promoted.action_id,
+            action_type=promoted.action_type,
+            turn_id=turn_id,
+        )
+
     async with self._session_factory() as session:
         async with session.begin():
-            active_count = (
+            has_active = (
                 await session.execute(
-                    select(func.count())
-                    .select_from(CliRunJob)
-                    .where(
-                        and_(
-                            CliRunJob.bot_id == bot_id,
-                            CliRunJob.chat_id == chat_id,
-                            CliRunJob.status.in_(["queued", "leased", "in_flight"]),
+                    select(
+                        exists().where(
+                            and_(
+                                CliRunJob.bot_id == bot_id,
+                                CliRunJob.chat_id == chat_id,
+                                CliRunJob.status.in_(["queued", "leased", "in_flight"]),
+                            )
                         )
                     )
                 )
             ).scalar_one()
-            if int(active_count) > 0:
+            if has_active:
                 return None
 
+            head_id = (
+                select(DeferredButtonAction.id)
+                .where(
+                    and_(
+                        DeferredButtonAction.bot_id == bot_id,
+                        DeferredButtonAction.chat_id == chat_id,
+                        DeferredButtonAction.status == "queued",
+                    )
+                )
+                .order_by(DeferredButtonAction.created_at.asc())
+                .limit(1)
+                .scalar_subquery()
+            )
             row = (
                 await session.execute(
-                    (
-                        select(DeferredButtonAction)
-                        .where(
-                            and_(
-                                DeferredButtonAction.bot_id == bot_id,
-                                DeferredButtonAction.chat_id == chat_id,
-                                DeferredButtonAction.status == "queued",
-                            )
+                    update(DeferredButtonAction)
+                    .where(
+                        and_(
+                            DeferredButtonAction.id == head_id,
+                            DeferredButtonAction.status == "queued",
                         )
-                        .order_by(DeferredButtonAction.created_at.asc())
-                        .with_for_update(skip_locked=True)
-                        .limit(1)
                     )
-                    if self._engine.dialect.name == "postgresql"
-                    else (
-                        select(DeferredButtonAction)
-                        .where(
-                            and_(
-                                DeferredButtonAction.bot_id == bot_id,
-                                DeferredButtonAction.chat_id == chat_id,
-                                DeferredButtonAction.status == "queued",
-                            )
-                        )
-                        .order_by(DeferredButtonAction.created_at.asc())
-                        .limit(1)
+                    .values(status="promoted", updated_at=now)
+                    .returning(
+                        DeferredButtonAction.id,
+                        DeferredButtonAction.action_type,
+                        DeferredButtonAction.session_id,
+                        DeferredButtonAction.prompt_text,
                     )
                 )
-            ).scalar_one_or_none()
+            ).first()
 
             if row is None:
                 return None
 
-            row.status = "promoted"
-            row.updated_at = now
-
-            turn_id = str(uuid4())
-            job_id = str(uuid4())
-            turn = Turn(
-                turn_id=turn_id,
-                session_id=row.session_id,
-                bot_id=bot_id,
-                chat_id=chat_id,
-                user_text=row.prompt_text,
-                assistant_text=None,
-                status="queued",
-                error_text=None,
-                started_at=None,
-                finished_at=None,
-                created_at=now,
+            # Write-only rows: Core inserts skip the unit of work, and issuing them in
+            # order keeps the parent turn ahead of its job for the FK.
+            await session.execute(
+                insert(Turn).values(
+                    turn_id=turn_id,
+                    session_id=row.session_id,
+                    bot_id=bot_id,
+                    chat_id=chat_id,
+                    user_text=row.prompt_text,
+                    assistant_text=None,
+                    status="queued",
+                    error_text=None,
+                    started_at=None,
+                    finished_at=None,
+                    created_at=now,
+                )
             )
-            session.add(turn)
-            # Keep parent->child flush ordering explicit for Postgres FK safety.
-            await session.flush([turn])
-            session.add(
-                CliRunJob(
+            await session.execute(
+                insert(CliRunJob).values(
                     id=job_id,
                     turn_id=turn_id,
                     bot_id=bot_id,
@@ -509,6 +613,6 @@ async def promote_next_deferred_action(
 
 
 async def get_turn_events_count(self, *, turn_id: str) -> int:
-    async with self._session_factory() as session:
-        result = await session.execute(select(func.count()).select_from(CliEvent).where(CliEvent.turn_id == turn_id))
+    async with self._engine.connect() as conn:
+        result = await conn.execute(select(func.count()).select_from(CliEvent).where(CliEvent.turn_id == turn_id))
         return int(result.scalar_one())
@@ -196,13 +196,12 @@ async def get_session_view(self, *, session_id: str) -> SessionView | None:
 
 
 async def set_session_thread_id(self, *, session_id: str, thread_id: str | None, now: int) -> None:
-    async with self._session_factory() as session:
-        await session.execute(
+    async with self._autocommit() as conn:
+        await conn.execute(
             update(Session)
             .where(Session.session_id == session_id)
             .values(adapter_thread_id=thread_id, updated_at=now)
         )
-        await session.commit()
 
 
 async def set_session_adapter(
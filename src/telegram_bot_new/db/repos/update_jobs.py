@@ -1,12 +1,38 @@
 from __future__ import annotations
 
+from typing import Any
 from uuid import uuid4
 
 from sqlalchemy import and_, delete, func, or_, select, text, update
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
 from telegram_bot_new.db.models import TelegramUpdate, TelegramUpdateJob
 
+_LEASE_TELEGRAM_UPDATE_JOB_SQL = text(
+    """
+    SELECT id, update_id
+    FROM telegram_update_jobs
+    WHERE bot_id = :bot_id
+      AND available_at <= :now
+      AND status IN ('queued', 'leased')
+      AND (
+        status = 'queued'
+        OR (status = 'leased' AND lease_expires_at IS NOT NULL AND lease_expires_at < :now)
+      )
+    ORDER BY available_at ASC, created_at ASC
+    FOR UPDATE SKIP LOCKED
+    LIMIT 1
+    """
+)
+
+
+def _dialect_insert(self) -> Any:
+    # Both supported backends expose `on_conflict_do_nothing` on their own insert construct.
+    if self._engine.dialect.name == "postgresql":
+        return pg_insert
+    return sqlite_insert
+
 
 async def insert_telegram_update(
     self,
@@ -17,46 +43,45 @@ async def insert_telegram_update(
     payload_json: str,
     received_at: int,
 ) -> bool:
-    async with self._session_factory() as session:
-        session.add(
-            TelegramUpdate(
-                bot_id=bot_id,
-                update_id=update_id,
-                chat_id=chat_id,
-                payload_json=payload_json,
-                received_at=received_at,
-            )
+    stmt = (
+        _dialect_insert(self)(TelegramUpdate)
+        .values(
+            bot_id=bot_id,
+            update_id=update_id,
+            chat_id=chat_id,
+            payload_json=payload_json,
+            received_at=received_at,
         )
-        try:
-            await session.commit()
-        except IntegrityError:
-            await session.rollback()
-            return False
-    return True
+        .on_conflict_do_nothing(index_elements=["bot_id", "update_id"])
+    )
+    async with self._session_factory() as session:
+        result = await session.execute(stmt)
+        await session.commit()
+    return int(result.rowcount or 0) > 0
 
 
 async def enqueue_telegram_update_job(self, *, bot_id: str, update_id: int, available_at: int) -> None:
     now = available_at
-    async with self._session_factory() as session:
-        session.add(
-            TelegramUpdateJob(
-                id=str(uuid4()),
-                bot_id=bot_id,
-                update_id=update_id,
-                status="queued",
-                lease_owner=None,
-                lease_expires_at=None,
-                available_at=available_at,
-                attempts=0,
-                last_error=None,
-                created_at=now,
-                updated_at=now,
-            )
+    stmt = (
+        _dialect_insert(self)(TelegramUpdateJob)
+        .values(
+            id=str(uuid4()),
+            bot_id=bot_id,
+            update_id=update_id,
+            status="queued",
+            lease_owner=None,
+            lease_expires_at=None,
+            available_at=available_at,
+            attempts=0,
+            last_error=None,
+            created_at=now,
+            updated_at=now,
         )
-        try:
-            await session.commit()
-        except IntegrityError:
-            await session.rollback()
+        .on_conflict_do_nothing(index_elements=["bot_id", "update_id"])
+    )
+    async with self._session_factory() as session:
+        await session.execute(stmt)
+        await session.commit()
 
 
 async def lease_next_telegram_update_job(
@@ -75,6 +100,9 @@ async def lease_next_telegram_update_job(
             claimable = and_(
                 TelegramUpdateJob.bot_id == bot_id,
                 TelegramUpdateJob.available_at <= now,
+                # Redundant with the OR below, but lets the planner match the
+                # partial ix_telegram_update_jobs_dispatch index.
+                TelegramUpdateJob.status.in_(["queued", "leased"]),
                 or_(
                     TelegramUpdateJob.status == "queued",
                     and_(
@@ -87,21 +115,7 @@ async def lease_next_telegram_update_job(
             if is_postgres:
                 row = (
                     await session.execute(
-                        text(
-                            """
-                            SELECT id, update_id
-                            FROM telegram_update_jobs
-                            WHERE bot_id = :bot_id
-                              AND available_at <= :now
-                              AND (
-                                status = 'queued'
-                                OR (status = 'leased' AND lease_expires_at IS NOT NULL AND lease_expires_at < :now)
-                              )
-                            ORDER BY available_at ASC, created_at ASC
-                            FOR UPDATE SKIP LOCKED
-                            LIMIT 1
-                            """
-                        ),
+                        _LEASE_TELEGRAM_UPDATE_JOB_SQL,
                         {"bot_id": bot_id, "now": now},
                     )
                 ).first()
@@ -143,33 +157,30 @@ async def lease_next_telegram_update_job(
 
 async def renew_telegram_update_job_lease(self, *, job_id: str, now: int, lease_duration_ms: int) -> None:
     lease_until = now + lease_duration_ms
-    async with self._session_factory() as session:
-        await session.execute(
+    async with self._autocommit() as conn:
+        await conn.execute(
             update(TelegramUpdateJob)
             .where(and_(TelegramUpdateJob.id == job_id, TelegramUpdateJob.status == "leased"))
             .values(lease_expires_at=lease_until, updated_at=now)
         )
-        await session.commit()
 
 
 async def complete_telegram_update_job(self, *, job_id: str, now: int) -> None:
-    async with self._session_factory() as session:
-        await session.execute(
+    async with self._autocommit() as conn:
+        await conn.execute(
             update(TelegramUpdateJob)
             .where(TelegramUpdateJob.id == job_id)
             .values(status="completed", lease_owner=None, lease_expires_at=None, updated_at=now)
         )
-        await session.commit()
 
 
 async def fail_telegram_update_job(self, *, job_id: str, now: int, error: str) -> None:
-    async with self._session_factory() as session:
-        await session.execute(
+    async with self._autocommit() as conn:
+        await conn.execute(
             update(TelegramUpdateJob)
             .where(TelegramUpdateJob.id == job_id)
             .values(status="failed", lease_owner=None, lease_expires_at=None, last_error=error[:2000], updated_at=now)
         )
-        await session.commit()
 
 
 async def get_telegram_update(self, *, bot_id: str, update_id: int) -> TelegramUpdate | None:
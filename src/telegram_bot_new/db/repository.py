@@ -1,15 +1,19 @@
 from __future__ import annotations
 
-from contextlib import suppress
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager, suppress
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
 import re
 from typing import Any
 from uuid import uuid4
 
-from sqlalchemy import and_, case, delete, func, or_, select, text, update
+from sqlalchemy import and_, case, delete, func, make_url, or_, select, text, update
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from .models import (
     ActionToken,
@@ -88,32 +92,105 @@ class SessionView:
     last_turn_at: int | None
 
 
+@dataclass(slots=True)
+class ActionTokenView:
+    token: str
+    bot_id: str
+    chat_id: str
+    action: str
+    payload_json: str
+    expires_at: int
+    consumed_at: int | None
+    created_at: int
+
+
 class Repository:
-    def __init__(self, session_factory: async_sessionmaker[AsyncSession], engine: AsyncEngine) -> None:
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        engine: AsyncEngine,
+        *,
+        read_engine: AsyncEngine | None = None,
+        metrics_cache_ttl_ms: int = 0,
+        metrics_flush_interval_ms: int = 0,
+    ) -> None:
         self._session_factory = session_factory
         self._engine = engine
+        # Replica (or the primary when none is configured) for dashboard aggregates.
+        self._read_engine = read_engine or engine
+        # turn_id -> monotonic expiry of a cached "not cancelled" answer.
+        self._cancel_cache: dict[str, float] = {}
+        # bot_id -> (monotonic expiry, metrics version, metrics); 0 ms disables caching.
+        self._metrics_cache_ttl_sec = max(0, metrics_cache_ttl_ms) / 1000
+        self._metrics_cache: dict[str | None, tuple[float, int, dict[str, Any]]] = {}
+        self._metrics_locks: dict[str | None, asyncio.Lock] = {}
+        self._metrics_version = 0
+        # (bot_id, metric_key) -> (pending delta, latest now); 0 ms writes through.
+        self._metrics_flush_interval_sec = max(0, metrics_flush_interval_ms) / 1000
+        self._pending_counters: dict[tuple[str, str], tuple[int, int]] = {}
+        self._flushing_counters: dict[tuple[str, str], tuple[int, int]] = {}
+        self._pending_counters_lock = asyncio.Lock()
+        self._metrics_flush_task: asyncio.Task[None] | None = None
 
     async def create_schema(self) -> None:
-        async with self._engine.begin() as conn:
+        statements = _load_migration_statements(Path(__file__).resolve().parent / "migrations")
+        if self._engine.dialect.name != "postgresql":
+            async with self._engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+                for statement in statements:
+                    await _execute_migration_statement(conn=conn, statement=statement)
+            return
+
+        async with self._engine.connect() as lock_conn:
             lock_key = 823741917432
-            use_advisory_lock = conn.dialect.name == "postgresql"
-            if use_advisory_lock:
-                await conn.execute(text("SELECT pg_advisory_lock(:lock_key)"), {"lock_key": lock_key})
-            await conn.run_sync(Base.metadata.create_all)
-            migrations_dir = Path(__file__).resolve().parent / "migrations"
-            if migrations_dir.exists() and migrations_dir.is_dir():
-                for sql_path in sorted(migrations_dir.glob("*.sql")):
-                    sql_text = sql_path.read_text(encoding="utf-8")
-                    for statement in _split_sql_statements(sql_text):
-                        await _execute_migration_statement(conn=conn, statement=statement)
-            if use_advisory_lock:
-                # If a migration statement fails, this unlock call can fail due to
-                # transaction abort state. In that case, connection close will release
-                # the advisory lock; suppress unlock errors to preserve root cause.
+            # Poll for the lock in AUTOCOMMIT so a waiting process never sits in an
+            # open transaction: CREATE INDEX CONCURRENTLY in the lock holder waits
+            # for every older snapshot, so a blocked pg_advisory_lock would deadlock it.
+            lock_conn = await lock_conn.execution_options(isolation_level="AUTOCOMMIT")
+            while not (
+                await lock_conn.execute(text("SELECT pg_try_advisory_lock(:lock_key)"), {"lock_key": lock_key})
+            ).scalar():
+                await asyncio.sleep(_SCHEMA_LOCK_POLL_SEC)
+            try:
+                async with self._engine.begin() as conn:
+                    await conn.run_sync(Base.metadata.create_all)
+                for batch in _batch_migration_statements(statements):
+                    if batch.parallel:
+                        # Index builds on different tables are independent; run each
+                        # table's group on its own connection.
+                        await asyncio.gather(*(self._execute_migration_group(group) for group in batch.groups))
+                        continue
+                    async with self._engine.begin() as conn:
+                        for statement in batch.groups[0]:
+                            await _execute_migration_statement(conn=conn, statement=statement)
+            finally:
+                # The lock connection is in AUTOCOMMIT, so a failed migration cannot
+                # leave it aborted; closing it releases the lock regardless.
                 with suppress(Exception):
-                    await conn.execute(text("SELECT pg_advisory_unlock(:lock_key)"), {"lock_key": lock_key})
+                    await lock_conn.execute(text("SELECT pg_advisory_unlock(:lock_key)"), {"lock_key": lock_key})
+
+    async def _execute_migration_group(self, statements: tuple[str, ...]) -> None:
+        # AUTOCOMMIT lets `CREATE INDEX CONCURRENTLY` run; every statement is idempotent.
+        async with self._engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            for statement in statements:
+                await _execute_migration_statement(conn=conn, statement=statement)
+
+    @asynccontextmanager
+    async def _autocommit(self) -> AsyncIterator[AsyncConnection]:
+        # Single-statement writes skip the BEGIN/COMMIT round-trips entirely.
+        async with self._engine.connect() as conn:
+            yield await conn.execution_options(isolation_level="AUTOCOMMIT")
 
     async def dispose(self) -> None:
+        if self._metrics_flush_task is not None:
+            self._metrics_flush_task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._metrics_flush_task
+            self._metrics_flush_task = None
+        await self.flush_runtime_metrics()
+        if self._read_engine is not self._engine:
+            await self._read_engine.dispose()
         await self._engine.dispose()
 
     async def upsert_bot(self, *, bot_id: str, name: str, mode: str, owner_user_id: int, adapter_name: str, now: int) -> None:
@@ -917,51 +994,6 @@ class Repository:
             ).first()
             return bool(row and row[0] == "cancelled")
 
-    async def append_cli_event(self, *, turn_id: str, bot_id: str, seq: int, event_type: str, payload_json: str, now: int) -> None:
-        async with self._session_factory() as session:
-            # SQLite may carry legacy cli_events schemas where `id` is not an
-            # auto-incrementing INTEGER PRIMARY KEY. In that case, assign id
-            # explicitly to keep event ingestion stable.
-            if self._engine.dialect.name == "sqlite":
-                for _ in range(3):
-                    next_id = int(
-                        (
-                            await session.execute(
-                                select(func.coalesce(func.max(CliEvent.id), 0) + 1)
-                            )
-                        ).scalar_one()
-                    )
-                    session.add(
-                        CliEvent(
-                            id=next_id,
-                            turn_id=turn_id,
-                            bot_id=bot_id,
-                            seq=seq,
-                            event_type=event_type,
-                            payload_json=payload_json,
-                            created_at=now,
-                        )
-                    )
-                    try:
-                        await session.commit()
-                        return
-                    except IntegrityError:
-                        await session.rollback()
-                        continue
-                raise RuntimeError("failed to append cli event after retries")
-
-            session.add(
-                CliEvent(
-                    turn_id=turn_id,
-                    bot_id=bot_id,
-                    seq=seq,
-                    event_type=event_type,
-                    payload_json=payload_json,
-                    created_at=now,
-                )
-            )
-            await session.commit()
-
     async def get_turn(self, *, turn_id: str) -> Turn | None:
         async with self._session_factory() as session:
             return await session.get(Turn, turn_id)
@@ -1029,29 +1061,48 @@ class Repository:
         bot_id: str,
         chat_id: str,
         now: int,
-    ) -> ActionToken | None:
+    ) -> ActionTokenView | None:
+        # A single UPDATE ... RETURNING both claims and reads the token; the
+        # row lock it takes replaces the former SELECT ... FOR UPDATE.
         async with self._session_factory() as session:
-            async with session.begin():
-                row = (
-                    await session.execute(
-                        select(ActionToken)
-                        .where(
-                            and_(
-                                ActionToken.token == token,
-                                ActionToken.bot_id == bot_id,
-                                ActionToken.chat_id == chat_id,
-                                ActionToken.consumed_at.is_(None),
-                                ActionToken.expires_at >= now,
-                            )
+            row = (
+                await session.execute(
+                    update(ActionToken)
+                    .where(
+                        and_(
+                            ActionToken.token == token,
+                            ActionToken.bot_id == bot_id,
+                            ActionToken.chat_id == chat_id,
+                            ActionToken.consumed_at.is_(None),
+                            ActionToken.expires_at >= now,
                         )
-                        .with_for_update()
-                        .limit(1)
                     )
-                ).scalar_one_or_none()
-                if row is None:
-                    return None
-                row.consumed_at = now
-                return row
+                    .values(consumed_at=now)
+                    .returning(
+                        ActionToken.token,
+                        ActionToken.bot_id,
+                        ActionToken.chat_id,
+                        ActionToken.action,
+                        ActionToken.payload_json,
+                        ActionToken.expires_at,
+                        ActionToken.consumed_at,
+                        ActionToken.created_at,
+                    )
+                )
+            ).first()
+            await session.commit()
+            if row is None:
+                return None
+            return ActionTokenView(
+                token=row.token,
+                bot_id=row.bot_id,
+                chat_id=row.chat_id,
+                action=row.action,
+                payload_json=row.payload_json,
+                expires_at=row.expires_at,
+                consumed_at=row.consumed_at,
+                created_at=row.created_at,
+            )
 
     async def enqueue_deferred_button_action(
         self,
@@ -1397,6 +1448,7 @@ from telegram_bot_new.db.repos.sessions import (  # noqa: E402
 )
 from telegram_bot_new.db.repos.audit_metrics import (  # noqa: E402
     append_audit_log as _repos_append_audit_log,
+    flush_runtime_metrics as _repos_flush_runtime_metrics,
     get_metrics as _repos_get_metrics,
     increment_runtime_metric as _repos_increment_runtime_metric,
     list_audit_logs as _repos_list_audit_logs,
@@ -1441,42 +1493,167 @@ Repository.set_session_project_root = _repos_set_session_project_root
 Repository.set_session_unsafe_until = _repos_set_session_unsafe_until
 Repository.upsert_session_summary = _repos_upsert_session_summary
 Repository.increment_runtime_metric = _repos_increment_runtime_metric
+Repository.flush_runtime_metrics = _repos_flush_runtime_metrics
 Repository.get_metrics = _repos_get_metrics
 Repository.list_audit_logs = _repos_list_audit_logs
 Repository.append_audit_log = _repos_append_audit_log
 
 
-def create_repository(database_url: str) -> Repository:
-    engine = create_async_engine(database_url, pool_pre_ping=True)
+def create_repository(
+    database_url: str,
+    *,
+    read_database_url: str | None = None,
+    metrics_cache_ttl_ms: int = 0,
+    metrics_flush_interval_ms: int = 0,
+    pool_size: int = 5,
+    max_overflow: int = 10,
+) -> Repository:
+    engine_options: dict[str, Any] = {"pool_pre_ping": True}
+    if make_url(database_url).get_backend_name() == "postgresql":
+        # LIFO reuse keeps a small hot set of server connections (better plan/cache
+        # locality) and lets idle extras time out instead of round-robining all of them.
+        engine_options.update(
+            poolclass=AsyncAdaptedQueuePool,
+            pool_use_lifo=True,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_recycle=1800,
+        )
+    engine = create_async_engine(database_url, **engine_options)
+    read_engine = None
+    if read_database_url and read_database_url != database_url:
+        read_engine = create_async_engine(read_database_url, **engine_options)
     session_factory = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
-    return Repository(session_factory, engine)
+    return Repository(
+        session_factory,
+        engine,
+        read_engine=read_engine,
+        metrics_cache_ttl_ms=metrics_cache_ttl_ms,
+        metrics_flush_interval_ms=metrics_flush_interval_ms,
+    )
+
+
+# Single-pass scanner for migration SQL. Only tokens that matter are matched:
+# dollar-quoted bodies and quoted literals are skipped whole so `;` inside them
+# never splits; plain SQL between matches is never visited per character.
+_SQL_TOKEN_RE = re.compile(
+    r"""
+    (?P<dollar>\$(?P<tag>[A-Za-z_][A-Za-z0-9_]*|)\$.*?\$(?P=tag)\$)
+    | (?P<line_comment>--[^\n]*)
+    | (?P<block_comment>/\*.*?\*/)
+    | (?P<quoted>'(?:[^']|'')*'|"(?:[^"]|"")*")
+    | (?P<semicolon>;)
+    """,
+    flags=re.DOTALL | re.VERBOSE,
+)
 
 
 def _split_sql_statements(sql_text: str) -> list[str]:
     statements: list[str] = []
-    current: list[str] = []
+    # Comment-free slices of the statement in progress; usually just one.
+    pieces: list[str] = []
+    start = 0
 
-    for line in sql_text.splitlines():
-        stripped = line.strip()
-        if not stripped or stripped.startswith("--"):
+    for match in _SQL_TOKEN_RE.finditer(sql_text):
+        kind = match.lastgroup
+        if kind == "dollar" or kind == "quoted":
             continue
-        current.append(line)
-        if stripped.endswith(";"):
-            statement = "\n".join(current).strip()
-            if statement.endswith(";"):
-                statement = statement[:-1]
+        pieces.append(sql_text[start : match.start()])
+        start = match.end()
+        if kind == "block_comment":
+            pieces.append(" ")
+        elif kind == "semicolon":
+            statement = "".join(pieces).strip()
             if statement:
                 statements.append(statement)
-            current = []
+            pieces = []
 
-    if current:
-        statement = "\n".join(current).strip()
-        if statement:
-            statements.append(statement)
+    pieces.append(sql_text[start:])
+    statement = "".join(pieces).strip()
+    if statement:
+        statements.append(statement)
 
     return statements
 
 
+@lru_cache(maxsize=None)
+def _load_migration_statements(migrations_dir: Path) -> tuple[str, ...]:
+    if not migrations_dir.is_dir():
+        return ()
+    statements: list[str] = []
+    for sql_path in sorted(migrations_dir.glob("*.sql")):
+        statements.extend(_split_sql_statements(sql_path.read_text(encoding="utf-8")))
+    return tuple(statements)
+
+
+# How often a second process retries the schema advisory lock during startup.
+_SCHEMA_LOCK_POLL_SEC = 0.2
+
+_CREATE_INDEX_RE = re.compile(
+    r"^\s*CREATE\s+(?:UNIQUE\s+)?INDEX\s+(?:CONCURRENTLY\s+)?(?:IF\s+NOT\s+EXISTS\s+)?"
+    r"([A-Za-z_][A-Za-z0-9_]*)\s+ON\s+(?:ONLY\s+)?([A-Za-z_][A-Za-z0-9_]*)",
+    flags=re.IGNORECASE,
+)
+_DROP_INDEX_RE = re.compile(
+    r"^\s*DROP\s+INDEX\s+(?:CONCURRENTLY\s+)?(?:IF\s+EXISTS\s+)?([A-Za-z_][A-Za-z0-9_]*)\s*$",
+    flags=re.IGNORECASE,
+)
+
+
+@dataclass(slots=True, frozen=True)
+class _MigrationBatch:
+    # A serial batch is one group run in a single transaction; a parallel batch
+    # holds one group of index statements per table, each on its own connection.
+    parallel: bool
+    groups: tuple[tuple[str, ...], ...]
+
+
+@lru_cache(maxsize=None)
+def _batch_migration_statements(statements: tuple[str, ...]) -> tuple[_MigrationBatch, ...]:
+    """Split migrations into ordered serial and parallel index batches.
+
+    Consecutive index statements form one parallel batch, grouped by target
+    table with file order kept inside each group. A `DROP INDEX` joins the group
+    of an index created in the same batch and otherwise gets its own group.
+    Everything else runs serially, so statements that follow index DDL in a
+    migration (an ANALYZE, say) still run after it.
+    """
+    batches: list[_MigrationBatch] = []
+    serial: list[str] = []
+    groups: dict[str, list[str]] = {}
+    group_by_index: dict[str, str] = {}
+
+    def flush_serial() -> None:
+        if serial:
+            batches.append(_MigrationBatch(parallel=False, groups=(tuple(serial),)))
+            serial.clear()
+
+    def flush_groups() -> None:
+        if groups:
+            batches.append(_MigrationBatch(parallel=True, groups=tuple(tuple(group) for group in groups.values())))
+            groups.clear()
+            group_by_index.clear()
+
+    for statement in statements:
+        create_match = _CREATE_INDEX_RE.match(statement)
+        drop_match = _DROP_INDEX_RE.match(statement) if create_match is None else None
+        if create_match is None and drop_match is None:
+            flush_groups()
+            serial.append(statement)
+            continue
+        flush_serial()
+        if create_match is not None:
+            index_name = create_match.group(1).lower()
+            group_key = group_by_index.setdefault(index_name, f"table:{create_match.group(2).lower()}")
+        else:
+            index_name = drop_match.group(1).lower()
+            group_key = group_by_index.setdefault(index_name, f"index:{index_name}")
+        groups.setdefault(group_key, []).append(statement)
+    flush_serial()
+    flush_groups()
+    return tuple(batches)
+
+
 _SQLITE_ADD_COLUMN_IF_NOT_EXISTS_RE = re.compile(
     r"^\s*ALTER\s+TABLE\s+([A-Za-z_][A-Za-z0-9_]*)\s+ADD\s+COLUMN\s+IF\s+NOT\s+EXISTS\s+([A-Za-z_][A-Za-z0-9_]*)\s+(.+?)\s*$",
     flags=re.IGNORECASE | re.DOTALL,
@@ -1495,9 +1672,27 @@ def _parse_sqlite_add_column_if_not_exists(statement: str) -> tuple[str, str, st
     return table_name, column_name, column_def
 
 
+_DO_BLOCK_RE = re.compile(r"^\s*DO\s+\$", flags=re.IGNORECASE)
+_INDEX_CONCURRENTLY_RE = re.compile(r"^(\s*(?:CREATE\s+(?:UNIQUE\s+)?|DROP\s+)INDEX\s+)CONCURRENTLY\s+", flags=re.IGNORECASE)
+_INDEX_INCLUDE_RE = re.compile(r"\s+INCLUDE\s*\([^)]*\)", flags=re.IGNORECASE)
+
+
+def _strip_postgres_index_options(statement: str) -> str:
+    # SQLite has neither CONCURRENTLY nor covering INCLUDE columns; the plain
+    # partial index is still valid there.
+    stripped = _INDEX_CONCURRENTLY_RE.sub(r"\1", statement)
+    if _CREATE_INDEX_RE.match(stripped) is not None:
+        stripped = _INDEX_INCLUDE_RE.sub("", stripped)
+    return stripped
+
+
 async def _execute_migration_statement(*, conn: Any, statement: str) -> None:
     sqlite_add_column = None
     if conn.dialect.name == "sqlite":
+        if _DO_BLOCK_RE.match(statement) is not None:
+            # Anonymous PL/pgSQL blocks carry Postgres-only type changes.
+            return
+        statement = _strip_postgres_index_options(statement)
         sqlite_add_column = _parse_sqlite_add_column_if_not_exists(statement)
 
     if sqlite_add_column is None:
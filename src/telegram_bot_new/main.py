@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import argparse
 import asyncio
+from functools import lru_cache
 from pathlib import Path
 
 from telegram_bot_new.runtime_embedded import run_bot_workers_only, run_embedded_bot
@@ -10,6 +11,9 @@ from telegram_bot_new.settings import get_global_settings, load_bots_config
 from telegram_bot_new.supervisor import run_supervisor
 
 
+# The parser is immutable once built; re-entrant callers (tests, embedded
+# launches) reuse it instead of rebuilding the subcommand tree.
+@lru_cache(maxsize=1)
 def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description="telegram_bot_new entrypoint")
     sub = parser.add_subparsers(dest="command", required=True)
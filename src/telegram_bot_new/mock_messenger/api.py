@@ -1,20 +1,30 @@
 from __future__ import annotations
 
 import asyncio
+import hashlib
 import logging
+import os
+import stat
 import time
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Optional, Union
+from typing import Any, Optional, TypeVar, Union
+from urllib.parse import urlencode
 
 import httpx
-from fastapi import Body, FastAPI, HTTPException
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi import Body, FastAPI, HTTPException, Request
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import FileResponse, JSONResponse, Response
+from pydantic import BaseModel, ValidationError
 
 from telegram_bot_new.mock_messenger.bot_catalog import (
+    EMBEDDED_FETCH_TIMEOUT_SEC,
     build_bot_catalog,
     cleanup_deleted_bot_state_files,
     create_dynamic_embedded_bot,
     delete_bot_from_catalog,
+    get_bot_catalog_row,
+    load_bot_catalog,
     set_bot_default_role,
     set_bot_name,
 )
@@ -45,6 +55,46 @@ from telegram_bot_new.routing_policy import suggest_route
 from telegram_bot_new.skill_library import list_installed_skills
 
 LOGGER = logging.getLogger(__name__)
+_ModelT = TypeVar("_ModelT", bound=BaseModel)
+
+# Webhook delivery reuses one pooled client per app; tune pool shape here.
+WEBHOOK_TIMEOUT_SEC = 10.0
+WEBHOOK_MAX_KEEPALIVE_CONNECTIONS = 40
+WEBHOOK_MAX_CONNECTIONS = 100
+WEBHOOK_KEEPALIVE_EXPIRY_SEC = 30.0
+# Caps in-flight POSTs per webhook host so one slow bot cannot take the whole pool.
+WEBHOOK_MAX_CONNECTIONS_PER_HOST = 20
+# Diagnostics fetches (healthz/metrics/audit_logs) against embedded bots share
+# one pooled client; per-request timeouts live in bot_catalog.
+EMBEDDED_MAX_KEEPALIVE_CONNECTIONS = 20
+EMBEDDED_MAX_CONNECTIONS = 50
+# Opt-in background webhook delivery: with N > 0 workers /_mock/send returns
+# delivered_via_webhook=None (pending) instead of waiting on the bot's
+# round-trip. The default 0 delivers inline and reports the outcome.
+WEBHOOK_DELIVERY_WORKERS = 0
+WEBHOOK_DELIVERY_QUEUE_MAXSIZE = 1000
+
+_WEB_DIR = Path(__file__).resolve().parent / "web"
+
+# Constant bodies for probe/ack endpoints; Response instances are immutable once
+# built, so one shared instance skips per-request encoding.
+_HEALTHZ_RESPONSE = Response(content=b'{"ok":true}', media_type="application/json")
+_OK_TRUE_RESPONSE = Response(content=b'{"ok":true,"result":true}', media_type="application/json")
+
+PROJECTS_CACHE_TTL_SEC = 30.0
+_PROJECT_MARKERS = frozenset(
+    {
+        ".git",
+        "pyproject.toml",
+        "package.json",
+        "requirements.txt",
+        "go.mod",
+        "Cargo.toml",
+        "README.md",
+    }
+)
+# Discovered projects keyed by workspace dir -> (expires_at monotonic, projects).
+_PROJECTS_CACHE: dict[str, tuple[float, list[dict[str, str]]]] = {}
 
 
 def create_app(
@@ -54,9 +104,70 @@ def create_app(
     bots_config_path: Union[str, Path] = "config/bots.yaml",
     embedded_host: str = "127.0.0.1",
     embedded_base_port: int = 8600,
+    webhook_delivery_workers: int = WEBHOOK_DELIVERY_WORKERS,
 ) -> FastAPI:
     app = FastAPI(title="Mock Telegram Messenger", version="0.1.0")
     catalog_mutation_lock = asyncio.Lock()
+    webhook_client = _build_webhook_client()
+    app.state.webhook_client = webhook_client
+    embedded_client = _build_embedded_client()
+    app.state.embedded_client = embedded_client
+    # One queue per worker; a token always maps to the same queue, so its
+    # updates reach the webhook in order.
+    webhook_queues: list[asyncio.Queue[tuple[str, int, str, Optional[str], bytes]]] = [
+        asyncio.Queue(maxsize=WEBHOOK_DELIVERY_QUEUE_MAXSIZE) for _ in range(max(0, int(webhook_delivery_workers)))
+    ]
+    webhook_workers: list[asyncio.Task[None]] = []
+    webhook_host_slots: dict[str, asyncio.Semaphore] = {}
+    # token -> last failed background delivery, cleared by the next success.
+    webhook_delivery_errors: dict[str, dict[str, Any]] = {}
+    app.state.webhook_delivery_errors = webhook_delivery_errors
+
+    async def _deliver_webhook_update(
+        token: str,
+        update_id: int,
+        url: str,
+        secret_token: Optional[str],
+        body: bytes,
+    ) -> tuple[bool, Optional[str]]:
+        try:
+            host = httpx.URL(url).netloc.decode("ascii", errors="replace")
+        except Exception:
+            host = url
+        slots = webhook_host_slots.get(host)
+        if slots is None:
+            slots = webhook_host_slots.setdefault(host, asyncio.Semaphore(WEBHOOK_MAX_CONNECTIONS_PER_HOST))
+        async with slots:
+            delivered, error = await _post_webhook_update(
+                client=webhook_client,
+                url=url,
+                secret_token=secret_token,
+                body=body,
+            )
+        if delivered:
+            store.mark_update_delivered(token=token, update_id=update_id)
+        return delivered, error
+
+    async def _webhook_delivery_worker(queue: asyncio.Queue[tuple[str, int, str, Optional[str], bytes]]) -> None:
+        while True:
+            item = await queue.get()
+            token, update_id = item[0], item[1]
+            try:
+                delivered, error = await _deliver_webhook_update(*item)
+            except Exception as exc:
+                LOGGER.exception("background webhook delivery failed token=%s update_id=%s", token, update_id)
+                delivered, error = False, str(exc)
+            else:
+                if not delivered:
+                    LOGGER.warning(
+                        "background webhook delivery failed token=%s update_id=%s error=%s", token, update_id, error
+                    )
+            finally:
+                queue.task_done()
+            if delivered:
+                webhook_delivery_errors.pop(token, None)
+            else:
+                webhook_delivery_errors[token] = {"update_id": update_id, "webhook_error": error, "at": int(time.time())}
 
     async def _enqueue_and_dispatch_user_message(token: str, chat_id: int, user_id: int, text: str) -> dict[str, Any]:
         queued = store.enqueue_user_message(
@@ -66,19 +177,38 @@ def create_app(
             text=text,
         )
 
-        webhook_error: Optional[str] = None
-        delivered_via_webhook = False
-        if queued["delivery_mode"] == "webhook" and isinstance(queued["webhook_url"], str):
-            delivered_via_webhook, webhook_error = await _post_webhook_update(
-                url=queued["webhook_url"],
-                secret_token=queued["webhook_secret"],
-                payload=queued["payload"],
-            )
-            if delivered_via_webhook:
-                store.mark_update_delivered(token=token, update_id=queued["update_id"])
+        update_id = queued["update_id"]
+        delivery_mode = queued["delivery_mode"]
+        webhook_url = queued["webhook_url"] if delivery_mode == "webhook" else None
+        if not isinstance(webhook_url, str):
+            return {
+                "update_id": update_id,
+                "delivery_mode": delivery_mode,
+                "delivered_via_webhook": False,
+                "webhook_error": None,
+            }
+
+        # Post the JSON the store already serialised for the updates table
+        # instead of letting httpx encode the same payload a second time.
+        body = queued["payload_json"].encode("utf-8")
+        delivery = (token, update_id, webhook_url, queued["webhook_secret"], body)
+        if webhook_workers:
+            # A full queue applies backpressure to the sender rather than
+            # delivering inline, which could overtake the token's queued updates.
+            await webhook_queues[hash(token) % len(webhook_queues)].put(delivery)
+            # Pending: the worker marks the update delivered once the POST succeeds.
+            return {
+                "update_id": update_id,
+                "delivery_mode": delivery_mode,
+                "delivered_via_webhook": None,
+                "webhook_error": None,
+            }
+
+        # Inline delivery when background workers are disabled or not started yet.
+        delivered_via_webhook, webhook_error = await _deliver_webhook_update(*delivery)
         return {
-            "update_id": queued["update_id"],
-            "delivery_mode": queued["delivery_mode"],
+            "update_id": update_id,
+            "delivery_mode": delivery_mode,
             "delivered_via_webhook": delivered_via_webhook,
             "webhook_error": webhook_error,
         }
@@ -95,18 +225,37 @@ def create_app(
     app.state.debate_orchestrator = debate_orchestrator
     app.state.cowork_orchestrator = cowork_orchestrator
 
+    @app.on_event("startup")
+    async def _startup_event() -> None:
+        for queue in webhook_queues:
+            webhook_workers.append(asyncio.create_task(_webhook_delivery_worker(queue)))
+
     @app.on_event("shutdown")
     async def _shutdown_event() -> None:
         await debate_orchestrator.shutdown()
         await cowork_orchestrator.shutdown()
+        for worker in webhook_workers:
+            worker.cancel()
+        await asyncio.gather(*webhook_workers, return_exceptions=True)
+        webhook_workers.clear()
+        await webhook_client.aclose()
+        await embedded_client.aclose()
     register_ui_routes(app, web_file=_web_file)
 
+    # Handlers that only call the synchronous sqlite store are plain ``def`` so
+    # Starlette runs them in its threadpool instead of on the event loop.
     @app.get("/_mock/threads")
-    async def get_threads(token: Optional[str] = None) -> dict[str, Any]:
-        return {"ok": True, "result": store.list_threads(token=token)}
+    def get_threads(request: Request, token: Optional[str] = None) -> Response:
+        # Polled by the UI; unchanged stores answer 304 before any read, and
+        # like get_messages the body skips jsonable_encoder.
+        headers = _poll_cache_headers(store, request)
+        if _etag_matches(request, headers["ETag"]):
+            return Response(status_code=304, headers=headers)
+        return JSONResponse(content={"ok": True, "result": store.list_threads(token=token)}, headers=headers)
 
     @app.post("/_mock/send")
-    async def mock_send(request: MockSendRequest) -> dict[str, Any]:
+    async def mock_send(http_request: Request) -> dict[str, Any]:
+        request = await _read_json_model(http_request, MockSendRequest)
         result = await _enqueue_and_dispatch_user_message(
             request.token,
             int(request.chat_id),
@@ -128,49 +277,71 @@ def create_app(
     )
 
     @app.get("/_mock/messages")
-    async def get_messages(token: str, chat_id: Optional[int] = None, limit: int = 200) -> dict[str, Any]:
-        messages = store.get_messages(token=token, chat_id=chat_id, limit=max(1, min(limit, 1000)))
-        for message in messages:
-            document = message.get("document")
-            if isinstance(document, dict):
-                document["url"] = f"/_mock/document/{document['id']}?token={token}"
-        return {
-            "ok": True,
-            "result": {
-                "messages": messages,
-                "updates": store.get_recent_updates(token=token, chat_id=chat_id, limit=max(1, min(limit, 1000))),
+    def get_messages(request: Request, token: str, chat_id: Optional[int] = None, limit: int = 200) -> Response:
+        headers = _poll_cache_headers(store, request)
+        if _etag_matches(request, headers["ETag"]):
+            return Response(status_code=304, headers=headers)
+        messages, updates = store.get_messages_and_updates(
+            token=token,
+            chat_id=chat_id,
+            limit=max(1, min(limit, 1000)),
+            document_url_prefix="/_mock/document/",
+        )
+        # The store already returns JSON-native values; returning a response
+        # directly skips FastAPI's recursive jsonable_encoder pass over up to
+        # 2000 rows and goes straight to the C json encoder.
+        return JSONResponse(
+            content={
+                "ok": True,
+                "result": {
+                    "messages": messages,
+                    "updates": updates,
+                },
             },
-        }
+            headers=headers,
+        )
 
     @app.post("/_mock/messages/clear")
-    async def clear_messages(request: MockClearMessagesRequest) -> dict[str, Any]:
+    def clear_messages(request: MockClearMessagesRequest) -> dict[str, Any]:
         result = store.clear_messages(token=request.token, chat_id=request.chat_id)
         return {"ok": True, "result": result}
 
     @app.get("/_mock/document/{document_id}")
-    async def get_document(document_id: int, token: str) -> FileResponse:
+    def get_document(document_id: int, token: str) -> FileResponse:
         document = store.get_document_file(token=token, document_id=document_id)
         if document is None:
             raise HTTPException(status_code=404, detail="document not found")
         path = Path(document["path"])
-        if not path.exists() or not path.is_file():
+        # One stat answers both checks and is handed to FileResponse, which
+        # would otherwise stat the file again before streaming it.
+        try:
+            stat_result = path.stat()
+        except OSError:
+            stat_result = None
+        if stat_result is None or not stat.S_ISREG(stat_result.st_mode):
             raise HTTPException(status_code=404, detail="document file missing")
         return FileResponse(
             str(path),
             media_type=document["media_type"],
             filename=document["filename"],
+            stat_result=stat_result,
             content_disposition_type="inline",
         )
 
     @app.get("/_mock/state")
-    async def get_state(token: Optional[str] = None) -> dict[str, Any]:
-        return {
-            "ok": True,
-            "result": {
-                "allow_get_updates_with_webhook": allow_get_updates_with_webhook,
-                "state": store.get_state(token=token),
-            },
-        }
+    def get_state(token: Optional[str] = None) -> JSONResponse:
+        return JSONResponse(
+            content={
+                "ok": True,
+                "result": {
+                    "allow_get_updates_with_webhook": allow_get_updates_with_webhook,
+                    "state": store.get_state(token=token),
+                    "webhook_delivery_errors": {
+                        key: value for key, value in webhook_delivery_errors.items() if not token or key == token
+                    },
+                },
+            }
+        )
 
     @app.get("/_mock/bot_catalog")
     async def get_bot_catalog() -> dict[str, Any]:
@@ -272,7 +443,7 @@ def create_app(
 
     @app.get("/_mock/projects")
     async def get_projects() -> dict[str, Any]:
-        projects = _discover_projects(base_dir=Path.cwd())
+        projects = await _discover_projects_cached(base_dir=Path.cwd())
         return {"ok": True, "result": {"projects": projects}}
 
     @app.get("/_mock/skills")
@@ -290,12 +461,16 @@ def create_app(
 
     @app.get("/_mock/routing/suggest")
     async def suggest_routing(text: str, bot_id: Optional[str] = None) -> dict[str, Any]:
-        catalog = build_bot_catalog(
-            bots_config_path=bots_config_path,
-            embedded_host=embedded_host,
-            embedded_base_port=embedded_base_port,
+        selected = (
+            get_bot_catalog_row(
+                bots_config_path=bots_config_path,
+                embedded_host=embedded_host,
+                embedded_base_port=embedded_base_port,
+                bot_id=bot_id,
+            )
+            if bot_id
+            else None
         )
-        selected = next((row for row in catalog if row.get("bot_id") == bot_id), None) if bot_id else None
         default_provider = str((selected or {}).get("default_adapter") or "codex")
         default_models = (selected or {}).get("default_models")
         normalized_models = default_models if isinstance(default_models, dict) else {}
@@ -335,18 +510,20 @@ def create_app(
                 if created_id:
                     delete_bot_from_catalog(bots_config_path=bots_config_path, bot_id=created_id)
                 raise HTTPException(status_code=400, detail=str(error)) from error
-            bots = build_bot_catalog(
-                bots_config_path=bots_config_path,
-                embedded_host=embedded_host,
-                embedded_base_port=embedded_base_port,
-            )
-            stability = await _stabilize_embedded_runtime_if_needed(
-                bots=bots,
-                bots_config_path=bots_config_path,
-            )
 
-        created_id = str(created.get("bot_id") or "").strip()
-        created_row = next((row for row in bots if str(row.get("bot_id")) == created_id), None)
+        # Only the file writes need serializing; the catalog read is a cached
+        # lookup and the health wait must not block other admin calls.
+        bots, by_bot_id = load_bot_catalog(
+            bots_config_path=bots_config_path,
+            embedded_host=embedded_host,
+            embedded_base_port=embedded_base_port,
+        )
+        created_row = by_bot_id.get(str(created.get("bot_id") or "").strip())
+        stability = await _stabilize_embedded_runtime_if_needed(
+            bots=bots,
+            bots_config_path=bots_config_path,
+            client=embedded_client,
+        )
         return {
             "ok": True,
             "result": {
@@ -359,19 +536,21 @@ def create_app(
     @app.post("/_mock/bot_catalog/delete")
     async def delete_bot_catalog_entry(request: BotCatalogDeleteRequest) -> dict[str, Any]:
         async with catalog_mutation_lock:
-            before_bots = build_bot_catalog(
+            deleted_row = get_bot_catalog_row(
                 bots_config_path=bots_config_path,
                 embedded_host=embedded_host,
                 embedded_base_port=embedded_base_port,
+                bot_id=request.bot_id,
             )
-            deleted_row = next((row for row in before_bots if str(row.get("bot_id") or "") == request.bot_id), None)
             removed_entry = delete_bot_from_catalog(bots_config_path=bots_config_path, bot_id=request.bot_id)
             if removed_entry is None:
                 raise HTTPException(status_code=404, detail=_unknown_bot_detail(request.bot_id))
             _mirror_delete_to_secondary_if_needed(request.bot_id)
+            # Stay locked through state cleanup: a concurrent add may reuse this bot_id slot.
             stop_wait = await _wait_embedded_process_stopped_if_needed(
                 embedded_url=str((deleted_row or {}).get("embedded_url") or "").strip(),
                 bots_config_path=bots_config_path,
+                client=embedded_client,
             )
             cleanup_deleted_bot_state_files(
                 bots_config_path=bots_config_path,
@@ -382,15 +561,16 @@ def create_app(
             token = str((deleted_row or {}).get("token") or "").strip()
             if token:
                 cleanup_result = store.clear_messages(token=token)
-            bots = build_bot_catalog(
-                bots_config_path=bots_config_path,
-                embedded_host=embedded_host,
-                embedded_base_port=embedded_base_port,
-            )
-            stability = await _stabilize_embedded_runtime_if_needed(
-                bots=bots,
-                bots_config_path=bots_config_path,
-            )
+        bots = build_bot_catalog(
+            bots_config_path=bots_config_path,
+            embedded_host=embedded_host,
+            embedded_base_port=embedded_base_port,
+        )
+        stability = await _stabilize_embedded_runtime_if_needed(
+            bots=bots,
+            bots_config_path=bots_config_path,
+            client=embedded_client,
+        )
         return {
             "ok": True,
             "result": {
@@ -413,12 +593,12 @@ def create_app(
             if not updated:
                 raise HTTPException(status_code=404, detail=_unknown_bot_detail(request.bot_id))
             _mirror_role_to_secondary_if_needed(request.bot_id, request.role)
-            bots = build_bot_catalog(
-                bots_config_path=bots_config_path,
-                embedded_host=embedded_host,
-                embedded_base_port=embedded_base_port,
-            )
-        selected = next((row for row in bots if str(row.get("bot_id") or "") == request.bot_id), None)
+        bots, by_bot_id = load_bot_catalog(
+            bots_config_path=bots_config_path,
+            embedded_host=embedded_host,
+            embedded_base_port=embedded_base_port,
+        )
+        selected = by_bot_id.get(request.bot_id)
         return {
             "ok": True,
             "result": {
@@ -441,12 +621,12 @@ def create_app(
             if not updated:
                 raise HTTPException(status_code=404, detail=_unknown_bot_detail(request.bot_id))
             _mirror_name_to_secondary_if_needed(request.bot_id, normalized_name)
-            bots = build_bot_catalog(
-                bots_config_path=bots_config_path,
-                embedded_host=embedded_host,
-                embedded_base_port=embedded_base_port,
-            )
-        selected = next((row for row in bots if str(row.get("bot_id") or "") == request.bot_id), None)
+        bots, by_bot_id = load_bot_catalog(
+            bots_config_path=bots_config_path,
+            embedded_host=embedded_host,
+            embedded_base_port=embedded_base_port,
+        )
+        selected = by_bot_id.get(request.bot_id)
         return {
             "ok": True,
             "result": {
@@ -463,17 +643,19 @@ def create_app(
         embedded_base_port=embedded_base_port,
         infer_runtime_profile=_infer_runtime_profile,
         enqueue_and_dispatch_user_message=_enqueue_and_dispatch_user_message,
+        embedded_client=embedded_client,
     )
 
     @app.post("/_mock/rate_limit")
-    async def set_rate_limit(rule: RateLimitRuleRequest) -> dict[str, Any]:
+    async def set_rate_limit(http_request: Request) -> Response:
+        rule = await _read_json_model(http_request, RateLimitRuleRequest)
         store.set_rate_limit_rule(
             token=rule.token,
             method=rule.method,
             count=rule.count,
             retry_after=rule.retry_after,
         )
-        return {"ok": True, "result": True}
+        return _OK_TRUE_RESPONSE
 
     register_mock_telegram_routes(
         app,
@@ -481,17 +663,46 @@ def create_app(
         allow_get_updates_with_webhook=allow_get_updates_with_webhook,
         try_rate_limit=_try_rate_limit,
         telegram_error=_telegram_error,
-        parse_chat_id=_parse_chat_id,
     )
 
     @app.get("/healthz")
-    async def healthz() -> dict[str, bool]:
-        return {"ok": True}
+    async def healthz() -> Response:
+        return _HEALTHZ_RESPONSE
 
     return app
 
 
+def _poll_cache_headers(store: MockMessengerStore, request: Request) -> dict[str, str]:
+    # Read the version before the data: a write racing the read then yields a
+    # stale tag, which only costs the next poll a full response. The route and
+    # the order-normalized query are hashed in, so a tag only validates the
+    # representation it was issued for.
+    query = urlencode(sorted(request.query_params.multi_items()))
+    representation = hashlib.sha1(f"{request.url.path}?{query}".encode("utf-8")).hexdigest()[:16]
+    return {"ETag": f'W/"{store.data_version()}-{representation}"', "Cache-Control": "no-cache"}
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    return etag in {tag.strip() for tag in if_none_match.split(",")}
+
+
+async def _read_json_model(request: Request, model: type[_ModelT]) -> _ModelT:
+    # Validate the raw body in one pass through pydantic's JSON parser instead of
+    # json.loads into a dict and validating that; errors keep FastAPI's 422 shape.
+    try:
+        return model.model_validate_json(await request.body())
+    except ValidationError as exc:
+        raise RequestValidationError(
+            [{**error, "loc": ("body", *error["loc"])} for error in exc.errors(include_url=False)]
+        ) from exc
+
+
 def _try_rate_limit(*, store: MockMessengerStore, token: str, method: str) -> Optional[JSONResponse]:
+    if not store.has_rate_limit_rule(token=token, method=method):
+        return None
     retry_after = store.consume_rate_limit(token=token, method=method)
     if retry_after is None:
         return None
@@ -509,37 +720,34 @@ def _try_rate_limit(*, store: MockMessengerStore, token: str, method: str) -> Op
 def _telegram_error(*, status_code: int, description: str) -> JSONResponse:
     return JSONResponse(
         status_code=status_code,
-        content={"ok": False, "description": description},
+        content={"ok": False, "error_code": status_code, "description": description},
     )
 
 
-def _parse_chat_id(value: Any) -> Optional[int]:
-    if isinstance(value, int):
-        return value
-    if isinstance(value, str):
-        value = value.strip()
-        if value and value.lstrip("-").isdigit():
-            return int(value)
-    return None
-
-
+# Only the name -> path resolution is cached; routes/ui.py stats the file on
+# every request so rebuilt assets are picked up. Missing files raise and are
+# therefore not cached.
+@lru_cache(maxsize=None)
 def _web_file(name: str) -> str:
-    path = (Path(__file__).resolve().parent / "web" / name)
+    path = _WEB_DIR / name
     if not path.exists():
         raise HTTPException(status_code=404, detail="ui file not found")
     return str(path)
 
 
+async def _discover_projects_cached(*, base_dir: Path) -> list[dict[str, str]]:
+    # The UI polls this endpoint; rescan at most every PROJECTS_CACHE_TTL_SEC and
+    # keep the directory walk off the event loop.
+    cache_key = str(base_dir)
+    cached = _PROJECTS_CACHE.get(cache_key)
+    if cached is not None and cached[0] > time.monotonic():
+        return list(cached[1])
+    projects = await asyncio.to_thread(_discover_projects, base_dir=base_dir)
+    _PROJECTS_CACHE[cache_key] = (time.monotonic() + PROJECTS_CACHE_TTL_SEC, projects)
+    return list(projects)
+
+
 def _discover_projects(*, base_dir: Path) -> list[dict[str, str]]:
-    markers = {
-        ".git",
-        "pyproject.toml",
-        "package.json",
-        "requirements.txt",
-        "go.mod",
-        "Cargo.toml",
-        "README.md",
-    }
     resolved_base = base_dir.expanduser().resolve()
     candidates: list[Path] = [resolved_base]
     try:
@@ -548,8 +756,12 @@ def _discover_projects(*, base_dir: Path) -> list[dict[str, str]]:
                 continue
             if child.name.startswith("."):
                 continue
-            has_marker = any((child / marker).exists() for marker in markers)
-            if has_marker:
+            # One listdir per child instead of an exists() probe per marker.
+            try:
+                entries = os.listdir(child)
+            except OSError:
+                continue
+            if not _PROJECT_MARKERS.isdisjoint(entries):
                 candidates.append(child.resolve())
     except Exception:
         pass
@@ -574,18 +786,46 @@ def _discover_projects(*, base_dir: Path) -> list[dict[str, str]]:
     return projects
 
 
+def _build_webhook_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(WEBHOOK_TIMEOUT_SEC),
+        limits=httpx.Limits(
+            max_keepalive_connections=WEBHOOK_MAX_KEEPALIVE_CONNECTIONS,
+            max_connections=WEBHOOK_MAX_CONNECTIONS,
+            keepalive_expiry=WEBHOOK_KEEPALIVE_EXPIRY_SEC,
+        ),
+    )
+
+
+def _build_embedded_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(EMBEDDED_FETCH_TIMEOUT_SEC),
+        limits=httpx.Limits(
+            max_keepalive_connections=EMBEDDED_MAX_KEEPALIVE_CONNECTIONS,
+            max_connections=EMBEDDED_MAX_CONNECTIONS,
+        ),
+    )
+
+
 async def _post_webhook_update(
     *,
+    client: httpx.AsyncClient,
     url: str,
     secret_token: Optional[str],
-    payload: dict[str, Any],
+    body: bytes,
 ) -> tuple[bool, Optional[str]]:
-    headers: dict[str, str] = {}
+    headers = {"Content-Type": "application/json"}
     if secret_token:
         headers["X-Telegram-Bot-Api-Secret-Token"] = secret_token
+    started = time.perf_counter()
     try:
-        async with httpx.AsyncClient(timeout=10) as client:
-            response = await client.post(url, json=payload, headers=headers)
+        response = await client.post(url, content=body, headers=headers)
+        LOGGER.debug(
+            "webhook post url=%s status=%s latency_ms=%d",
+            url,
+            response.status_code,
+            int((time.perf_counter() - started) * 1000),
+        )
         if 200 <= response.status_code < 300:
             return True, None
         return False, f"HTTP {response.status_code}: {response.text[:300]}"
@@ -609,6 +849,7 @@ async def _stabilize_embedded_runtime_if_needed(
     *,
     bots: list[dict[str, Any]],
     bots_config_path: Union[str, Path],
+    client: httpx.AsyncClient,
 ) -> dict[str, Any]:
     if not _should_wait_for_runtime_stability(bots_config_path=bots_config_path):
         return {"enabled": False}
@@ -627,18 +868,17 @@ async def _stabilize_embedded_runtime_if_needed(
     deadline = time.monotonic() + 8.0
     pending = set(urls)
     timeout = httpx.Timeout(connect=0.35, read=0.6, write=0.6, pool=0.6)
-    async with httpx.AsyncClient(timeout=timeout) as client:
-        while pending and time.monotonic() < deadline:
-            current_urls = sorted(pending)
-            checks = [client.get(url) for url in current_urls]
-            results = await asyncio.gather(*checks, return_exceptions=True)
-            for url, result in zip(current_urls, results):
-                if isinstance(result, Exception):
-                    continue
-                if 200 <= result.status_code < 300:
-                    pending.discard(url)
-            if pending:
-                await asyncio.sleep(0.2)
+    while pending and time.monotonic() < deadline:
+        current_urls = sorted(pending)
+        checks = [client.get(url, timeout=timeout) for url in current_urls]
+        results = await asyncio.gather(*checks, return_exceptions=True)
+        for url, result in zip(current_urls, results):
+            if isinstance(result, Exception):
+                continue
+            if 200 <= result.status_code < 300:
+                pending.discard(url)
+        if pending:
+            await asyncio.sleep(0.2)
 
     ready = len(pending) == 0
     if not ready:
@@ -656,6 +896,7 @@ async def _wait_embedded_process_stopped_if_needed(
     *,
     embedded_url: str,
     bots_config_path: Union[str, Path],
+    client: httpx.AsyncClient,
 ) -> dict[str, Any]:
     if not _should_wait_for_runtime_stability(bots_config_path=bots_config_path):
         return {"enabled": False}
@@ -666,14 +907,13 @@ async def _wait_embedded_process_stopped_if_needed(
     healthz = url.rstrip("/") + "/healthz"
     deadline = time.monotonic() + 8.0
     timeout = httpx.Timeout(connect=0.25, read=0.5, write=0.5, pool=0.5)
-    async with httpx.AsyncClient(timeout=timeout) as client:
-        while time.monotonic() < deadline:
-            try:
-                response = await client.get(healthz)
-                if response.status_code >= 500:
-                    return {"enabled": True, "stopped": True, "checked_url": healthz}
-            except Exception:
+    while time.monotonic() < deadline:
+        try:
+            response = await client.get(healthz, timeout=timeout)
+            if response.status_code >= 500:
                 return {"enabled": True, "stopped": True, "checked_url": healthz}
-            await asyncio.sleep(0.2)
+        except Exception:
+            return {"enabled": True, "stopped": True, "checked_url": healthz}
+        await asyncio.sleep(0.2)
     LOGGER.warning("embedded stop wait timed out url=%s", healthz)
     return {"enabled": True, "stopped": False, "checked_url": healthz}
@@ -1,13 +1,25 @@
 from __future__ import annotations
 
+import asyncio
+import heapq
+import os
 import re
 import time
+from contextlib import nullcontext
+from functools import lru_cache
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterable
 
 import httpx
 import yaml
 
+try:
+    from yaml import CSafeDumper as _YamlDumper
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeDumper as _YamlDumper
+    from yaml import SafeLoader as _YamlLoader
+
 from telegram_bot_new.model_presets import AVAILABLE_MODELS_BY_PROVIDER
 from telegram_bot_new.settings import GlobalSettings, get_global_settings, load_bots_config
 
@@ -15,6 +27,56 @@ EVENT_LINE_RE = re.compile(r"^\[(\d+|~)\]\[(\d{2}:\d{2}:\d{2})\]\[([a-z_]+)\]\s?
 SUPPORTED_AGENTS = ("codex", "gemini", "claude", "echo")
 SUPPORTED_COWORK_ROLES = ("controller", "planner", "implementer", "qa", "executor", "integrator")
 ROLE_ALIASES = {"executor": "implementer", "integrator": "qa"}
+EMBEDDED_FETCH_TIMEOUT_SEC = 2.0
+# Run status and the last error tag only look at the most recent lines; errors
+# further back than this belong to runs that are long over.
+RUN_STATE_SCAN_MAX_LINES = 500
+
+# Session view markers scraped from bot status messages, newest message first.
+_SESSION_RE = re.compile(r"(?:^|\n)session=([^\s\n]+)", re.IGNORECASE)
+_THREAD_RE = re.compile(r"(?:^|\n)thread=([^\s\n]+)", re.IGNORECASE)
+_THREAD_STARTED_RE = re.compile(r"\[thread_started\]\s+.*?\"thread_id\"\s*:\s*\"([^\"]+)\"", re.IGNORECASE | re.DOTALL)
+_SUMMARY_RE = re.compile(r"(?:^|\n)summary=(.+)", re.IGNORECASE)
+_MODEL_RE = re.compile(r"(?:^|\n)model=([^\s\n]+)", re.IGNORECASE)
+_SKILL_RE = re.compile(r"(?:^|\n)skill=([^\s\n]+)", re.IGNORECASE)
+_SKILL_UPDATED_RE = re.compile(r"skill updated:\s*([^\s\n]+)\s*->\s*([^\s\n]+)", re.IGNORECASE)
+_PROJECT_RE = re.compile(r"(?:^|\n)project=([^\n]+)", re.IGNORECASE)
+_PROJECT_UPDATED_RE = re.compile(r"project updated:\s*(.+?)\s*->\s*(.+)", re.IGNORECASE)
+_UNSAFE_UNTIL_RE = re.compile(r"(?:^|\n)unsafe_until=([^\s\n]+)", re.IGNORECASE)
+_UNSAFE_UPDATED_RE = re.compile(r"unsafe updated:\s*([^\s\n]+)\s*->\s*([^\s\n]+)", re.IGNORECASE)
+_QUEUED_AGENT_RE = re.compile(r"\bagent=(codex|gemini|claude)\b", re.IGNORECASE)
+_ADAPTER_RE = re.compile(r"(?:^|\n)adapter=(codex|gemini|claude)\b", re.IGNORECASE)
+_MODE_SWITCHED_RE = re.compile(
+    r"mode switched:\s*(?:codex|gemini|claude)\s*->\s*(codex|gemini|claude)\b",
+    re.IGNORECASE,
+)
+_JSON_ERROR_STATUS_RE = re.compile(r'"status"\s*:\s*"(error|failed|timeout)"')
+_PLAIN_ERROR_STATUS_RE = re.compile(r"\bstatus\s*=\s*(error|failed|timeout)\b")
+# Checked in order against the lowered line; the first tag with a hit wins.
+_ERROR_TAG_NEEDLES: tuple[tuple[str, tuple[str, ...]], ...] = (
+    ("binary_missing", ("executable not found", "install cli", "binary missing")),
+    ("active_run", ("run is active", "already active", "/stop first")),
+    ("parse_error", ("invalid json", "json decode", "parse error")),
+    ("delivery_error", ("[delivery_error]", "failed to send telegram message")),
+    ("timeout", ("timed out", "timeout exceeded", "timeout reached")),
+)
+_TIMEOUT_QUALIFIERS = ("error", "failed", "exceed")
+_SESSION_VIEW_KEYS = (
+    "current_model",
+    "current_skill",
+    "current_project",
+    "unsafe_until",
+    "session_id",
+    "thread_id",
+    "summary_preview",
+)
+
+# Parsed catalog (rows, rows by bot_id) keyed by
+# (path, mtime_ns, size, embedded_host, embedded_base_port).
+_CATALOG_CACHE: dict[
+    tuple[str, int, int, str, int],
+    tuple[list[dict[str, Any]], dict[str, dict[str, Any]]],
+] = {}
 
 
 def _normalize_cowork_role(role: str) -> str:
@@ -26,6 +88,8 @@ def _normalize_cowork_role(role: str) -> str:
     return "implementer"
 
 
+# Tokens are few and stable, so repeat catalog builds reuse the masked form.
+@lru_cache(maxsize=2048)
 def mask_token(token: str) -> str:
     if len(token) <= 10:
         return token
@@ -38,9 +102,113 @@ def build_bot_catalog(
     embedded_host: str,
     embedded_base_port: int,
 ) -> list[dict[str, Any]]:
+    rows, _ = _cached_bot_catalog(
+        bots_config_path=bots_config_path,
+        embedded_host=embedded_host,
+        embedded_base_port=embedded_base_port,
+    )
+    return list(rows)
+
+
+def build_bot_catalog_index(
+    *,
+    bots_config_path: str | Path,
+    embedded_host: str,
+    embedded_base_port: int,
+) -> dict[str, dict[str, Any]]:
+    _, by_bot_id = _cached_bot_catalog(
+        bots_config_path=bots_config_path,
+        embedded_host=embedded_host,
+        embedded_base_port=embedded_base_port,
+    )
+    return dict(by_bot_id)
+
+
+def load_bot_catalog(
+    *,
+    bots_config_path: str | Path,
+    embedded_host: str,
+    embedded_base_port: int,
+) -> tuple[list[dict[str, Any]], dict[str, dict[str, Any]]]:
+    # Rows plus the shared by-bot_id index from one cached parse, for callers
+    # that need both; the index is not copied and must not be mutated.
+    rows, by_bot_id = _cached_bot_catalog(
+        bots_config_path=bots_config_path,
+        embedded_host=embedded_host,
+        embedded_base_port=embedded_base_port,
+    )
+    return list(rows), by_bot_id
+
+
+def get_bot_catalog_row(
+    *,
+    bots_config_path: str | Path,
+    embedded_host: str,
+    embedded_base_port: int,
+    bot_id: str,
+) -> dict[str, Any] | None:
+    # Single-row lookup straight from the cached index, without copying it.
+    _, by_bot_id = _cached_bot_catalog(
+        bots_config_path=bots_config_path,
+        embedded_host=embedded_host,
+        embedded_base_port=embedded_base_port,
+    )
+    return by_bot_id.get(bot_id)
+
+
+def lookup_bot_catalog_rows(
+    *,
+    bots_config_path: str | Path,
+    embedded_host: str,
+    embedded_base_port: int,
+    bot_ids: Iterable[str],
+) -> dict[str, dict[str, Any]]:
+    # Only the requested rows, without copying the whole cached index.
+    _, by_bot_id = _cached_bot_catalog(
+        bots_config_path=bots_config_path,
+        embedded_host=embedded_host,
+        embedded_base_port=embedded_base_port,
+    )
+    return {bot_id: by_bot_id[bot_id] for bot_id in bot_ids if bot_id in by_bot_id}
+
+
+def _cached_bot_catalog(
+    *,
+    bots_config_path: str | Path,
+    embedded_host: str,
+    embedded_base_port: int,
+) -> tuple[list[dict[str, Any]], dict[str, dict[str, Any]]]:
     config_path = Path(bots_config_path).expanduser().resolve()
-    if not config_path.exists():
-        return []
+    try:
+        stat = config_path.stat()
+    except OSError:
+        return [], {}
+    # bots.yaml rarely changes; reuse the parsed rows until the file does.
+    cache_key = (str(config_path), stat.st_mtime_ns, stat.st_size, embedded_host, int(embedded_base_port))
+    cached = _CATALOG_CACHE.get(cache_key)
+    if cached is None:
+        rows = _build_bot_catalog_rows(
+            config_path=config_path,
+            embedded_host=embedded_host,
+            embedded_base_port=int(embedded_base_port),
+        )
+        by_bot_id: dict[str, dict[str, Any]] = {}
+        for row in rows:
+            by_bot_id.setdefault(str(row.get("bot_id") or ""), row)
+        cached = (rows, by_bot_id)
+        # Drop entries parsed from older versions of the same file.
+        for key in [key for key in _CATALOG_CACHE if key[0] == cache_key[0] and key[1:3] != cache_key[1:3]]:
+            _CATALOG_CACHE.pop(key, None)
+        _CATALOG_CACHE[cache_key] = cached
+    return cached
+
+
+def _build_bot_catalog_rows(
+    *,
+    config_path: Path,
+    embedded_host: str,
+    embedded_base_port: int,
+) -> list[dict[str, Any]]:
     settings = _resolve_catalog_settings()
     raw = _read_bots_file_raw(config_path)
     raw_bots = list(raw.get("bots") or [])
@@ -59,23 +227,25 @@ def build_bot_catalog(
     except Exception:
         return []
 
+    embedded_url_prefix = f"http://{embedded_host}:"
     embedded_index = 0
     rows: list[dict[str, Any]] = []
     for bot in bots:
         embedded_url: str | None = None
         if bot.mode == "embedded":
-            embedded_url = f"http://{embedded_host}:{embedded_base_port + embedded_index}"
+            embedded_url = f"{embedded_url_prefix}{embedded_base_port + embedded_index}"
             embedded_index += 1
 
+        bot_id = str(bot.bot_id)
         rows.append(
             {
-                "bot_id": str(bot.bot_id),
+                "bot_id": bot_id,
                 "name": str(bot.name),
                 "mode": bot.mode,
-                "token": bot.telegram_token,
+                "token": str(bot.telegram_token),
                 "token_masked": mask_token(bot.telegram_token),
-                "default_role": role_by_bot_id.get(str(bot.bot_id), "implementer"),
-                "default_adapter": bot.adapter,
+                "default_role": role_by_bot_id.get(bot_id, "implementer"),
+                "default_adapter": str(bot.adapter),
                 "default_models": {
                     "codex": bot.codex.model,
                     "gemini": bot.gemini.model,
@@ -111,8 +281,12 @@ def create_dynamic_embedded_bot(
     bots = list(raw.get("bots") or [])
     prior_bots = list(bots)
 
-    used_bot_ids = {str(item.get("bot_id") or "").strip() for item in bots if isinstance(item, dict)}
-    used_tokens = {str(item.get("telegram_token") or "").strip() for item in bots if isinstance(item, dict)}
+    used_bot_ids: set[str] = set()
+    used_tokens: set[str] = set()
+    for item in bots:
+        if isinstance(item, dict):
+            used_bot_ids.add(str(item.get("bot_id") or "").strip())
+            used_tokens.add(str(item.get("telegram_token") or "").strip())
 
     preferred_bot_id = (bot_id or "").strip()
     if preferred_bot_id:
@@ -265,7 +439,7 @@ def set_bot_name(*, bots_config_path: str | Path, bot_id: str, name: str) -> boo
 
 def _read_bots_file_raw(path: Path) -> dict[str, Any]:
     if path.exists():
-        loaded = yaml.safe_load(path.read_text(encoding="utf-8"))
+        loaded = yaml.load(path.read_text(encoding="utf-8"), Loader=_YamlLoader)
         if isinstance(loaded, dict):
             bots = loaded.get("bots")
             if not isinstance(bots, list):
@@ -274,12 +448,31 @@ def _read_bots_file_raw(path: Path) -> dict[str, Any]:
     return {"bots": []}
 
 
+def _invalidate_bot_catalog_cache(path: Path) -> None:
+    resolved = str(path.expanduser().resolve())
+    for key in [key for key in _CATALOG_CACHE if key[0] == resolved]:
+        _CATALOG_CACHE.pop(key, None)
+
+
 def _write_bots_file_raw(path: Path, payload: dict[str, Any]) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
-    serialized = yaml.safe_dump(payload, allow_unicode=True, sort_keys=False)
     tmp_path = path.with_suffix(f"{path.suffix}.tmp")
-    tmp_path.write_text(serialized, encoding="utf-8")
+    # Stream the encoded YAML straight into the temp file and make it durable
+    # before the rename, so a crash never leaves a truncated bots.yaml behind.
+    with open(tmp_path, "wb") as handle:
+        yaml.dump(
+            payload,
+            handle,
+            Dumper=_YamlDumper,
+            allow_unicode=True,
+            sort_keys=False,
+            encoding="utf-8",
+        )
+        handle.flush()
+        os.fsync(handle.fileno())
     tmp_path.replace(path)
+    # mtime can be too coarse to tell back-to-back writes apart.
+    _invalidate_bot_catalog_cache(path)
 
 
 def _resolve_catalog_settings() -> GlobalSettings:
@@ -372,7 +565,11 @@ def _build_default_name(bot_id: str) -> str:
     return bot_id
 
 
-def infer_session_view_from_messages(messages: list[dict[str, Any]]) -> dict[str, Any]:
+def infer_session_view_from_messages(
+    messages: list[dict[str, Any]],
+    *,
+    run_status: str | None = None,
+) -> dict[str, Any]:
     result: dict[str, Any] = {
         "current_agent": "unknown",
         "current_model": None,
@@ -388,75 +585,76 @@ def infer_session_view_from_messages(messages: list[dict[str, Any]]) -> dict[str
         return result
 
     for message in reversed(messages):
+        if all(result[key] is not None for key in _SESSION_VIEW_KEYS) and result["current_agent"] != "unknown":
+            break
         text = str(message.get("text") or "")
         if not text:
             continue
+        # Most messages carry none of these keys; a substring probe on the
+        # lowered text is far cheaper than running every pattern over it.
+        lowered = text.lower()
 
-        if result["session_id"] is None:
-            match = re.search(r"(?:^|\n)session=([^\s\n]+)", text, flags=re.IGNORECASE)
+        if result["session_id"] is None and "session=" in lowered:
+            match = _SESSION_RE.search(text)
             if match:
                 result["session_id"] = match.group(1).strip()
 
         if result["thread_id"] is None:
-            match = re.search(r"(?:^|\n)thread=([^\s\n]+)", text, flags=re.IGNORECASE)
+            match = _THREAD_RE.search(text) if "thread=" in lowered else None
             if match:
                 raw = match.group(1).strip()
                 result["thread_id"] = None if raw == "none" else raw
-            else:
-                event_thread = re.search(
-                    r"\[thread_started\]\s+.*?\"thread_id\"\s*:\s*\"([^\"]+)\"",
-                    text,
-                    flags=re.IGNORECASE | re.DOTALL,
-                )
+            elif "[thread_started]" in lowered:
+                event_thread = _THREAD_STARTED_RE.search(text)
                 if event_thread:
                     result["thread_id"] = event_thread.group(1).strip()
 
-        if result["summary_preview"] is None:
-            match = re.search(r"(?:^|\n)summary=(.+)", text, flags=re.IGNORECASE)
+        if result["summary_preview"] is None and "summary=" in lowered:
+            match = _SUMMARY_RE.search(text)
             if match:
                 raw = match.group(1).strip()
                 result["summary_preview"] = None if raw == "none" else raw
 
-        if result["current_model"] is None:
-            match = re.search(r"(?:^|\n)model=([^\s\n]+)", text, flags=re.IGNORECASE)
+        if result["current_model"] is None and "model=" in lowered:
+            match = _MODEL_RE.search(text)
             if match:
                 raw = match.group(1).strip()
                 result["current_model"] = None if raw.lower() == "default" else raw
 
         if result["current_skill"] is None:
-            match = re.search(r"(?:^|\n)skill=([^\s\n]+)", text, flags=re.IGNORECASE)
+            match = _SKILL_RE.search(text) if "skill=" in lowered else None
             if match:
                 raw = match.group(1).strip()
                 result["current_skill"] = None if raw.lower() in {"off", "none", "default"} else raw
-            else:
-                updated = re.search(r"skill updated:\s*([^\s\n]+)\s*->\s*([^\s\n]+)", text, flags=re.IGNORECASE)
+            elif "skill updated:" in lowered:
+                updated = _SKILL_UPDATED_RE.search(text)
                 if updated:
                     raw_next = updated.group(2).strip()
                     lowered_next = raw_next.lower()
                     result["current_skill"] = None if lowered_next in {"off", "none", "default"} else raw_next
 
         if result["current_project"] is None:
-            match = re.search(r"(?:^|\n)project=([^\n]+)", text, flags=re.IGNORECASE)
+            match = _PROJECT_RE.search(text) if "project=" in lowered else None
             if match:
                 raw = match.group(1).strip()
-                lowered = raw.lower()
-                result["current_project"] = None if lowered in {"default", "none", "off"} else raw
-            else:
-                updated = re.search(r"project updated:\s*(.+?)\s*->\s*(.+)", text, flags=re.IGNORECASE)
+                lowered_raw = raw.lower()
+                result["current_project"] = None if lowered_raw in {"default", "none", "off"} else raw
+            elif "project updated:" in lowered:
+                updated = _PROJECT_UPDATED_RE.search(text)
                 if updated:
                     raw_next = updated.group(2).strip()
                     lowered_next = raw_next.lower()
                     result["current_project"] = None if lowered_next in {"default", "none", "off"} else raw_next
 
         if result["unsafe_until"] is None:
-            match = re.search(r"(?:^|\n)unsafe_until=([^\s\n]+)", text, flags=re.IGNORECASE)
+            match = _UNSAFE_UNTIL_RE.search(text) if "unsafe_until=" in lowered else None
             if match:
                 raw = match.group(1).strip()
-                lowered = raw.lower()
-                if lowered not in {"off", "none"} and raw.isdigit():
+                lowered_raw = raw.lower()
+                if lowered_raw not in {"off", "none"} and raw.isdigit():
                     result["unsafe_until"] = int(raw)
-            else:
-                updated = re.search(r"unsafe updated:\s*([^\s\n]+)\s*->\s*([^\s\n]+)", text, flags=re.IGNORECASE)
+            elif "unsafe updated:" in lowered:
+                updated = _UNSAFE_UPDATED_RE.search(text)
                 if updated:
                     raw_next = updated.group(2).strip()
                     lowered_next = raw_next.lower()
@@ -464,50 +662,72 @@ def infer_session_view_from_messages(messages: list[dict[str, Any]]) -> dict[str
                         result["unsafe_until"] = int(raw_next)
 
         if result["current_agent"] == "unknown":
-            queued = re.search(r"\bagent=(codex|gemini|claude)\b", text, flags=re.IGNORECASE)
+            queued = _QUEUED_AGENT_RE.search(text) if "agent=" in lowered else None
             if queued:
                 result["current_agent"] = queued.group(1).lower()
             else:
-                status = re.search(r"(?:^|\n)adapter=(codex|gemini|claude)\b", text, flags=re.IGNORECASE)
+                status = _ADAPTER_RE.search(text) if "adapter=" in lowered else None
                 if status:
                     result["current_agent"] = status.group(1).lower()
-                else:
-                    switched = re.search(
-                        r"mode switched:\s*(?:codex|gemini|claude)\s*->\s*(codex|gemini|claude)\b",
-                        text,
-                        flags=re.IGNORECASE,
-                    )
+                elif "mode switched:" in lowered:
+                    switched = _MODE_SWITCHED_RE.search(text)
                     if switched:
                         result["current_agent"] = switched.group(1).lower()
 
-    result["run_status"] = _infer_latest_run_status(messages)
+    result["run_status"] = run_status if run_status is not None else _infer_latest_run_status(messages)
 
     return result
 
 
 def classify_last_error_tag(messages: list[dict[str, Any]]) -> str:
     # Recent-run 기준: 최신 run이 정상 완료된 경우 과거 에러는 무시한다.
-    for raw_line in _iter_message_lines_latest_first(messages):
+    return _scan_latest_run_lines(messages, want_run_status=False)[1]
+
+
+def infer_run_state_from_messages(messages: list[dict[str, Any]]) -> tuple[str, str]:
+    """Return ``(run_status, last_error_tag)`` from a single backwards sweep."""
+    return _scan_latest_run_lines(messages)
+
+
+def _scan_latest_run_lines(
+    messages: list[dict[str, Any]],
+    *,
+    want_run_status: bool = True,
+    want_error_tag: bool = True,
+) -> tuple[str, str]:
+    run_status: str | None = None if want_run_status else "idle"
+    error_tag: str | None = None if want_error_tag else "unknown"
+    for index, raw_line in enumerate(_iter_message_lines_latest_first(messages)):
+        if index >= RUN_STATE_SCAN_MAX_LINES:
+            break
         line = raw_line.strip()
         if not line:
             continue
         event_match = EVENT_LINE_RE.match(line)
-        if event_match:
-            event_type = event_match.group(3).lower()
-            body = event_match.group(4).strip()
-            if event_type == "turn_completed":
-                return _classify_error_text(body) if _turn_completed_is_error(body) else "unknown"
-            if event_type == "delivery_error":
-                return "delivery_error"
-            if event_type == "error":
-                return _classify_error_text(body)
-            continue
+        if run_status is None:
+            run_status = _run_status_from_line(line, event_match)
+        if error_tag is None:
+            error_tag = _error_tag_from_line(line, event_match)
+        if run_status is not None and error_tag is not None:
+            break
+    return run_status or "idle", error_tag or "unknown"
+
+
+def _error_tag_from_line(line: str, event_match: re.Match[str] | None) -> str | None:
+    if event_match:
+        event_type = event_match.group(3).lower()
+        body = event_match.group(4).strip()
+        if event_type == "turn_completed":
+            return _classify_error_text(body) if _turn_completed_is_error(body) else "unknown"
+        if event_type == "delivery_error":
+            return "delivery_error"
+        if event_type == "error":
+            return _classify_error_text(body)
+        return None
 
-        # non-event line fallback (some bridges emit plain error text)
-        classified = _classify_error_text(line)
-        if classified != "unknown":
-            return classified
-    return "unknown"
+    # non-event line fallback (some bridges emit plain error text)
+    classified = _classify_error_text(line)
+    return classified if classified != "unknown" else None
 
 
 def _iter_message_lines_latest_first(messages: list[dict[str, Any]]):
@@ -515,8 +735,19 @@ def _iter_message_lines_latest_first(messages: list[dict[str, Any]]):
         text = str(message.get("text") or "")
         if not text:
             continue
-        for line in reversed(text.splitlines()):
-            yield line
+        yield from _iter_lines_reversed(text)
+
+
+def _iter_lines_reversed(text: str):
+    # Callers stop at the first decisive line, so walk back from the end
+    # instead of splitting the whole message up front. Each "\n" chunk still
+    # goes through splitlines() to honour "\r\n" and the other separators;
+    # empty lines are dropped, which every caller skips anyway.
+    end = len(text)
+    while end > 0:
+        start = text.rfind("\n", 0, end)
+        yield from reversed(text[start + 1 : end].splitlines())
+        end = start
 
 
 def _turn_completed_is_error(body: str) -> bool:
@@ -524,35 +755,22 @@ def _turn_completed_is_error(body: str) -> bool:
     if not lowered:
         return False
     # JSON payload, e.g. {"status":"error"} or {"status":"failed"}
-    if re.search(r'"status"\s*:\s*"(error|failed|timeout)"', lowered):
+    if _JSON_ERROR_STATUS_RE.search(lowered):
         return True
     # plain form payload, e.g. status=error
-    if re.search(r"\bstatus\s*=\s*(error|failed|timeout)\b", lowered):
+    if _PLAIN_ERROR_STATUS_RE.search(lowered):
         return True
     return False
 
 
 def _classify_error_text(text: str) -> str:
     lowered = text.lower()
-    if "executable not found" in lowered or "install cli" in lowered or "binary missing" in lowered:
-        return "binary_missing"
-    if "run is active" in lowered or "already active" in lowered or "/stop first" in lowered:
-        return "active_run"
-    if "invalid json" in lowered or "json decode" in lowered or "parse error" in lowered:
-        return "parse_error"
-    if "[delivery_error]" in lowered or "failed to send telegram message" in lowered:
-        return "delivery_error"
+    for tag, needles in _ERROR_TAG_NEEDLES:
+        if any(needle in lowered for needle in needles):
+            return tag
     # Avoid false positives from path names like timeoutManager.js.
-    timeout_signal = (
-        "timed out" in lowered
-        or "timeout exceeded" in lowered
-        or "timeout reached" in lowered
-        or ("timeout" in lowered and ("error" in lowered or "failed" in lowered or "exceed" in lowered))
-    )
-    if timeout_signal:
+    if "timeout" in lowered and any(needle in lowered for needle in _TIMEOUT_QUALIFIERS):
         return "timeout"
-    if "[error]" in lowered:
-        return "unknown"
     return "unknown"
 
 
@@ -562,55 +780,65 @@ def _infer_latest_run_status(messages: list[dict[str, Any]]) -> str:
     오래된 [error]가 최신 turn_completed(성공)를 덮어쓰지 않도록,
     최신 라인부터 역순으로 첫 run-significant 이벤트를 상태로 채택한다.
     """
-    for raw_line in _iter_message_lines_latest_first(messages):
-        line = raw_line.strip()
-        if not line:
-            continue
+    return _scan_latest_run_lines(messages, want_error_tag=False)[0]
 
-        event_match = EVENT_LINE_RE.match(line)
-        if event_match:
-            event_type = event_match.group(3).lower()
-            body = event_match.group(4).strip()
-
-            if event_type in {"error", "delivery_error"}:
-                return "error"
-            if event_type == "turn_completed":
-                return "error" if _turn_completed_is_error(body) else "completed"
-            if event_type in {"turn_started", "reasoning", "command_started", "assistant_message"}:
-                return "running"
-            if event_type == "thread_started":
-                return "queued"
-            continue
 
-        lowered = line.lower()
-        if "queued turn:" in lowered:
-            return "queued"
-        if "a run is already active" in lowered or "run is active" in lowered:
+def _run_status_from_line(line: str, event_match: re.Match[str] | None) -> str | None:
+    if event_match:
+        event_type = event_match.group(3).lower()
+        body = event_match.group(4).strip()
+
+        if event_type in {"error", "delivery_error"}:
+            return "error"
+        if event_type == "turn_completed":
+            return "error" if _turn_completed_is_error(body) else "completed"
+        if event_type in {"turn_started", "reasoning", "command_started", "assistant_message"}:
             return "running"
+        if event_type == "thread_started":
+            return "queued"
+        return None
 
-    return "idle"
+    lowered = line.lower()
+    if "queued turn:" in lowered:
+        return "queued"
+    if "a run is already active" in lowered or "run is active" in lowered:
+        return "running"
+    return None
 
 
 def compact_threads(threads: list[dict[str, Any]], *, selected_chat_id: int | None) -> list[dict[str, Any]]:
-    rows = [
+    selected_key = str(selected_chat_id) if selected_chat_id is not None else None
+
+    def _sort_key(row: dict[str, Any]) -> tuple[int, int]:
+        selected = int(selected_key is not None and str(row.get("chat_id")) == selected_key)
+        return (selected, int(row.get("last_updated_at") or 0))
+
+    # nlargest matches sorted(..., reverse=True)[:10] but only the survivors
+    # are projected into the compact shape.
+    return [
         {
             "chat_id": row.get("chat_id"),
             "message_count": int(row.get("message_count") or 0),
             "webhook_enabled": bool(row.get("webhook_enabled")),
             "last_updated_at": int(row.get("last_updated_at") or 0),
         }
-        for row in threads
+        for row in heapq.nlargest(10, threads, key=_sort_key)
     ]
 
-    def _sort_key(item: dict[str, Any]) -> tuple[int, int]:
-        selected = int(str(item.get("chat_id")) == str(selected_chat_id)) if selected_chat_id is not None else 0
-        return (selected, int(item.get("last_updated_at") or 0))
 
-    rows.sort(key=_sort_key, reverse=True)
-    return rows[:10]
+def _embedded_http_client(client: httpx.AsyncClient | None) -> Any:
+    # Callers that own a pooled client pass it in; otherwise fall back to a
+    # throwaway client scoped to this fetch.
+    if client is not None:
+        return nullcontext(client)
+    return httpx.AsyncClient(timeout=httpx.Timeout(EMBEDDED_FETCH_TIMEOUT_SEC))
 
 
-async def fetch_embedded_runtime(embedded_url: str | None) -> tuple[dict[str, Any], dict[str, Any] | None]:
+async def fetch_embedded_runtime(
+    embedded_url: str | None,
+    *,
+    client: httpx.AsyncClient | None = None,
+) -> tuple[dict[str, Any], dict[str, Any] | None]:
     if not embedded_url:
         return (
             {
@@ -625,69 +853,85 @@ async def fetch_embedded_runtime(embedded_url: str | None) -> tuple[dict[str, An
         )
 
     started = time.perf_counter()
-    timeout = httpx.Timeout(2.0)
-    try:
-        async with httpx.AsyncClient(timeout=timeout) as client:
-            health_response = await client.get(f"{embedded_url}/healthz")
-            latency_ms = int((time.perf_counter() - started) * 1000)
-            if health_response.status_code < 200 or health_response.status_code >= 300:
-                return (
-                    {
-                        "bot": {
-                            "ok": False,
-                            "status_code": health_response.status_code,
-                            "latency_ms": latency_ms,
-                            "error": f"healthz status={health_response.status_code}",
-                        }
-                    },
-                    None,
-                )
-            metrics_response = await client.get(f"{embedded_url}/metrics")
-            metrics_payload: dict[str, Any] | None = None
-            if metrics_response.status_code == 200:
-                metrics_payload = metrics_response.json()
-            return (
-                {
-                    "bot": {
-                        "ok": True,
-                        "status_code": health_response.status_code,
-                        "latency_ms": latency_ms,
-                        "error": None,
-                    }
-                },
-                metrics_payload,
-            )
-    except Exception as error:
-        latency_ms = int((time.perf_counter() - started) * 1000)
+    async with _embedded_http_client(client) as http:
+
+        async def _probe_health() -> tuple[httpx.Response, int]:
+            response = await http.get(f"{embedded_url}/healthz", timeout=EMBEDDED_FETCH_TIMEOUT_SEC)
+            return response, int((time.perf_counter() - started) * 1000)
+
+        # Probe both endpoints at once; metrics are optional and only reported
+        # when the bot itself is healthy.
+        health_result, metrics_result = await asyncio.gather(
+            _probe_health(),
+            http.get(f"{embedded_url}/metrics", timeout=EMBEDDED_FETCH_TIMEOUT_SEC),
+            return_exceptions=True,
+        )
+
+    if isinstance(health_result, BaseException):
         return (
             {
                 "bot": {
                     "ok": False,
                     "status_code": None,
+                    "latency_ms": int((time.perf_counter() - started) * 1000),
+                    "error": str(health_result),
+                }
+            },
+            None,
+        )
+    health_response, latency_ms = health_result
+    if health_response.status_code < 200 or health_response.status_code >= 300:
+        return (
+            {
+                "bot": {
+                    "ok": False,
+                    "status_code": health_response.status_code,
                     "latency_ms": latency_ms,
-                    "error": str(error),
+                    "error": f"healthz status={health_response.status_code}",
                 }
             },
             None,
         )
 
+    metrics_payload: dict[str, Any] | None = None
+    if not isinstance(metrics_result, BaseException) and metrics_result.status_code == 200:
+        try:
+            metrics_payload = metrics_result.json()
+        except ValueError:
+            metrics_payload = None
+    return (
+        {
+            "bot": {
+                "ok": True,
+                "status_code": health_response.status_code,
+                "latency_ms": latency_ms,
+                "error": None,
+            }
+        },
+        metrics_payload,
+    )
+
 
 async def fetch_embedded_audit_logs(
     embedded_url: str | None,
     *,
     chat_id: int | None,
     limit: int,
+    client: httpx.AsyncClient | None = None,
 ) -> tuple[list[dict[str, Any]], str | None]:
     if not embedded_url:
         return [], "gateway mode: no dedicated embedded audit endpoint"
 
-    timeout = httpx.Timeout(2.0)
     params: dict[str, Any] = {"limit": max(1, min(int(limit), 500))}
     if chat_id is not None:
         params["chat_id"] = str(chat_id)
     try:
-        async with httpx.AsyncClient(timeout=timeout) as client:
-            response = await client.get(f"{embedded_url}/audit_logs", params=params)
+        async with _embedded_http_client(client) as http:
+            response = await http.get(
+                f"{embedded_url}/audit_logs",
+                params=params,
+                timeout=EMBEDDED_FETCH_TIMEOUT_SEC,
+            )
         if response.status_code < 200 or response.status_code >= 300:
             return [], f"audit_logs status={response.status_code}"
         payload = response.json() if response.content else {}
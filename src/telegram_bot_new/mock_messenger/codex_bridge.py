@@ -2,18 +2,23 @@
 
 import asyncio
 import argparse
+import codecs
+import heapq
 import mimetypes
 import os
 import queue
 import re
+import selectors
 import subprocess
 import tempfile
 import threading
 import time
+from collections import deque
 from dataclasses import dataclass
 from datetime import datetime, timezone
+from functools import lru_cache
 from pathlib import Path
-from typing import Any
+from typing import Any, BinaryIO, Callable, Iterator
 
 import httpx
 
@@ -26,17 +31,27 @@ MAX_MESSAGE_LEN = 3800
 MAX_RETRIES = 5
 MAX_REASONING_PREVIEW = 1200
 MAX_COMMAND_OUTPUT_PREVIEW = 1200
+LIVE_FLUSH_INTERVAL_SEC = 0.25
+DOCUMENT_PREFETCH_MAX_BYTES = 2 * 1024 * 1024
+API_TIMEOUT_SEC = 90.0
+# The bridge talks to one mock server strictly serially, so one pooled
+# connection is enough. Expire it just under uvicorn's default 5s keep-alive so
+# an idle socket is dropped here before the server closes it under a request.
+API_MAX_KEEPALIVE_CONNECTIONS = 1
+API_KEEPALIVE_EXPIRY_SEC = 4.5
 IMAGE_SUFFIXES = {".png", ".jpg", ".jpeg", ".gif", ".webp", ".bmp", ".svg"}
 HTML_SUFFIXES = {".html", ".htm"}
-SKIP_DIR_NAMES = {
-    ".git",
-    ".venv",
-    "venv",
-    "node_modules",
-    "__pycache__",
-    ".pytest_cache",
-    ".mypy_cache",
-}
+SKIP_DIR_NAMES = frozenset(
+    {
+        ".git",
+        ".venv",
+        "venv",
+        "node_modules",
+        "__pycache__",
+        ".pytest_cache",
+        ".mypy_cache",
+    }
+)
 
 
 class MockApiError(RuntimeError):
@@ -66,6 +81,16 @@ def _utc_hhmmss() -> str:
     return datetime.now(tz=timezone.utc).strftime("%H:%M:%S")
 
 
+def _build_api_client() -> httpx.Client:
+    return httpx.Client(
+        timeout=httpx.Timeout(API_TIMEOUT_SEC),
+        limits=httpx.Limits(
+            max_keepalive_connections=API_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=API_KEEPALIVE_EXPIRY_SEC,
+        ),
+    )
+
+
 def _post_json(client: httpx.Client, base_url: str, path: str, payload: dict[str, Any]) -> dict[str, Any]:
     response = client.post(f"{base_url}{path}", json=payload)
     try:
@@ -132,6 +157,11 @@ def _edit_message(client: httpx.Client, base_url: str, token: str, chat_id: int,
     raise MockApiError("failed to edit message")
 
 
+@lru_cache(maxsize=32)
+def _guess_media_type(suffix: str) -> str:
+    return mimetypes.guess_type(f"document{suffix}")[0] or "application/octet-stream"
+
+
 def _send_document(
     client: httpx.Client,
     base_url: str,
@@ -140,63 +170,112 @@ def _send_document(
     file_path: Path,
     caption: str | None = None,
 ) -> None:
-    media_type = mimetypes.guess_type(file_path.name)[0] or "application/octet-stream"
-    for attempt in range(MAX_RETRIES):
-        try:
-            with file_path.open("rb") as fh:
+    media_type = _guess_media_type(file_path.suffix.lower())
+    with file_path.open("rb") as fh:
+        # Open the artifact once: small files are read into memory a single time,
+        # larger ones stream from this handle and are rewound on each retry.
+        size = os.fstat(fh.fileno()).st_size
+        document: bytes | BinaryIO = fh.read() if size <= DOCUMENT_PREFETCH_MAX_BYTES else fh
+        for attempt in range(MAX_RETRIES):
+            try:
+                if document is fh:
+                    fh.seek(0)
                 response = client.post(
                     f"{base_url}/bot{token}/sendDocument",
                     data={"chat_id": str(chat_id), "caption": caption or ""},
-                    files={"document": (file_path.name, fh, media_type)},
+                    files={"document": (file_path.name, document, media_type)},
                 )
-            try:
-                body = response.json()
-            except Exception as error:
-                raise MockApiError(f"invalid json response in sendDocument status={response.status_code}") from error
-
-            if response.status_code == 429:
-                retry_after = 1
-                if isinstance(body, dict):
-                    params = body.get("parameters")
-                    if isinstance(params, dict) and isinstance(params.get("retry_after"), int):
-                        retry_after = max(1, int(params["retry_after"]))
-                raise MockRateLimitError(retry_after=retry_after)
-
-            if response.status_code >= 400 or not isinstance(body, dict) or body.get("ok") is not True:
-                description = body.get("description") if isinstance(body, dict) else None
-                raise MockApiError(f"sendDocument failed: {description or body}")
-            return
-        except MockRateLimitError as error:
-            time.sleep(error.retry_after)
-        except Exception:
-            if attempt >= MAX_RETRIES - 1:
-                raise
-            time.sleep(0.5 * (attempt + 1))
+                try:
+                    body = response.json()
+                except Exception as error:
+                    raise MockApiError(f"invalid json response in sendDocument status={response.status_code}") from error
+
+                if response.status_code == 429:
+                    retry_after = 1
+                    if isinstance(body, dict):
+                        params = body.get("parameters")
+                        if isinstance(params, dict) and isinstance(params.get("retry_after"), int):
+                            retry_after = max(1, int(params["retry_after"]))
+                    raise MockRateLimitError(retry_after=retry_after)
+
+                if response.status_code >= 400 or not isinstance(body, dict) or body.get("ok") is not True:
+                    description = body.get("description") if isinstance(body, dict) else None
+                    raise MockApiError(f"sendDocument failed: {description or body}")
+                return
+            except MockRateLimitError as error:
+                time.sleep(error.retry_after)
+            except Exception:
+                if attempt >= MAX_RETRIES - 1:
+                    raise
+                time.sleep(0.5 * (attempt + 1))
     raise MockApiError("failed to send document")
 
 
-def _extract_local_paths(text: str, *, suffixes: set[str]) -> list[Path]:
+def _build_local_path_patterns(suffixes: frozenset[str]) -> tuple[re.Pattern[str], ...]:
+    suffix_pattern = "|".join(ext.lstrip(".") for ext in sorted(suffixes))
+    return (
+        re.compile(r"!\[[^\]]*\]\(([^)]+)\)"),
+        re.compile(r"\[[^\]]*\]\(([^)]+)\)"),
+        re.compile(rf"['\"]([^'\"]+\.(?:{suffix_pattern}))['\"]", re.IGNORECASE),
+        # A single separator plus one run matches exactly what the old nested
+        # (?:[./\\][^...]+)+ did, without its exponential backtracking.
+        re.compile(rf"((?:[A-Za-z]:)?[./\\][^\s'\"`<>|]+\.(?:{suffix_pattern}))", re.IGNORECASE),
+        re.compile(rf"\.(?:{suffix_pattern})", re.IGNORECASE),
+    )
+
+
+_PATH_RUN_RE = re.compile(r"[^\s'\"`<>|]+")
+
+
+def _find_bare_paths(text: str, bare_path_re: re.Pattern[str], suffix_re: re.Pattern[str]) -> list[str]:
+    # A bare path never crosses whitespace or quotes, and within one such run it
+    # can only end at the run's last ".<suffix>". Bounding each search there
+    # keeps long suffix-less runs from being rescanned from every offset.
+    found: list[str] = []
+    for run in _PATH_RUN_RE.finditer(text):
+        last_suffix = None
+        for last_suffix in suffix_re.finditer(text, run.start(), run.end()):
+            pass
+        if last_suffix is None:
+            continue
+        match = bare_path_re.search(text, run.start(), last_suffix.end())
+        if match is not None:
+            found.append(match.group(1))
+    return found
+
+
+_IMAGE_SUFFIX_SET = frozenset(IMAGE_SUFFIXES)
+_HTML_SUFFIX_SET = frozenset(HTML_SUFFIXES)
+_IMAGE_PATH_PATTERNS = _build_local_path_patterns(_IMAGE_SUFFIX_SET)
+_HTML_PATH_PATTERNS = _build_local_path_patterns(_HTML_SUFFIX_SET)
+
+
+def _extract_local_paths(
+    text: str,
+    *,
+    patterns: tuple[re.Pattern[str], ...],
+    suffixes: frozenset[str],
+) -> list[Path]:
     if not text or not text.strip():
         return []
+    if "." not in text and "](" not in text:
+        # Only markdown links can yield a path without a dotted suffix in the text.
+        return []
 
-    suffix_pattern = "|".join(ext.lstrip(".") for ext in sorted(suffixes))
+    markdown_image_re, markdown_link_re, quoted_path_re, bare_path_re, suffix_re = patterns
     candidates: list[str] = []
-    candidates.extend(re.findall(r"!\[[^\]]*\]\(([^)]+)\)", text))
-    candidates.extend(re.findall(r"\[[^\]]*\]\(([^)]+)\)", text))
-    candidates.extend(
-        re.findall(
-            rf"['\"]([^'\"]+\.(?:{suffix_pattern}))['\"]",
-            text,
-            flags=re.IGNORECASE,
-        )
-    )
-    candidates.extend(
-        re.findall(
-            rf"((?:[A-Za-z]:)?(?:[./\\][^\s'\"`<>|]+)+\.(?:{suffix_pattern}))",
-            text,
-            flags=re.IGNORECASE,
-        )
-    )
+    # Cheap substring gates keep most streamed event text from being scanned at
+    # all; each pattern can only match when its literal anchor is present.
+    if "](" in text:
+        if "![" in text:
+            candidates.extend(markdown_image_re.findall(text))
+        candidates.extend(markdown_link_re.findall(text))
+    if "." in text:
+        lowered_text = text.lower()
+        if any(suffix in lowered_text for suffix in suffixes):
+            if "'" in text or '"' in text:
+                candidates.extend(quoted_path_re.findall(text))
+            candidates.extend(_find_bare_paths(text, bare_path_re, suffix_re))
 
     paths: list[Path] = []
     seen: set[str] = set()
@@ -224,61 +303,67 @@ def _extract_local_paths(text: str, *, suffixes: set[str]) -> list[Path]:
 
 
 def _extract_local_image_paths(text: str) -> list[Path]:
-    return _extract_local_paths(text, suffixes=IMAGE_SUFFIXES)
+    return _extract_local_paths(text, patterns=_IMAGE_PATH_PATTERNS, suffixes=_IMAGE_SUFFIX_SET)
 
 
 def _extract_local_html_paths(text: str) -> list[Path]:
-    return _extract_local_paths(text, suffixes=HTML_SUFFIXES)
-
-
-def _looks_like_image_request(prompt: str) -> bool:
-    text = (prompt or "").lower()
+    return _extract_local_paths(text, patterns=_HTML_PATH_PATTERNS, suffixes=_HTML_SUFFIX_SET)
+
+
+IMAGE_REQUEST_KEYWORDS = (
+    "image",
+    "png",
+    "jpg",
+    "jpeg",
+    "gif",
+    "webp",
+    "photo",
+    "diagram",
+    "chart",
+    "plot",
+    "figure",
+    "draw",
+    "render",
+    "\uc774\ubbf8\uc9c0",
+    "\uc0ac\uc9c4",
+    "\uadf8\ub9bc",
+    "\ucc28\ud2b8",
+    "\uadf8\ub798\ud504",
+)
+HTML_REQUEST_KEYWORDS = (
+    "html",
+    "css",
+    "landing page",
+    "web page",
+    "webpage",
+    "site",
+    "\ub79c\ub529",
+    "\uc6f9\ud398\uc774\uc9c0",
+    "\ud398\uc774\uc9c0",
+)
+# One alternation per keyword list so each prompt is scanned once, not per keyword.
+_IMAGE_REQUEST_RE = re.compile("|".join(re.escape(keyword) for keyword in IMAGE_REQUEST_KEYWORDS))
+_HTML_REQUEST_RE = re.compile("|".join(re.escape(keyword) for keyword in HTML_REQUEST_KEYWORDS))
+
+
+def _looks_like_image_request(prompt: str, *, lowered: str | None = None) -> bool:
+    text = lowered if lowered is not None else (prompt or "").lower()
     if not text:
         return False
-    keywords = [
-        "image",
-        "png",
-        "jpg",
-        "jpeg",
-        "gif",
-        "webp",
-        "photo",
-        "diagram",
-        "chart",
-        "plot",
-        "figure",
-        "draw",
-        "render",
-        "\uc774\ubbf8\uc9c0",
-        "\uc0ac\uc9c4",
-        "\uadf8\ub9bc",
-        "\ucc28\ud2b8",
-        "\uadf8\ub798\ud504",
-    ]
-    return any(keyword in text for keyword in keywords)
-
-
-def _looks_like_html_request(prompt: str) -> bool:
-    text = (prompt or "").lower()
+    return _IMAGE_REQUEST_RE.search(text) is not None
+
+
+def _looks_like_html_request(prompt: str, *, lowered: str | None = None) -> bool:
+    text = lowered if lowered is not None else (prompt or "").lower()
     if not text:
         return False
-    keywords = [
-        "html",
-        "css",
-        "landing page",
-        "web page",
-        "webpage",
-        "site",
-        "\ub79c\ub529",
-        "\uc6f9\ud398\uc774\uc9c0",
-        "\ud398\uc774\uc9c0",
-    ]
-    return any(keyword in text for keyword in keywords)
-
-
-def _contains_explicit_artifact_contract(prompt: str) -> bool:
+    return _HTML_REQUEST_RE.search(text) is not None
+
+
+def _contains_explicit_artifact_contract(prompt: str, *, lowered: str | None = None) -> bool:
     text = prompt or ""
-    lowered = text.lower()
+    if lowered is None:
+        lowered = text.lower()
     if not lowered:
         return False
     if "[산출물 경로 계약]" in text or "이번 코워크 결과 경로:" in text or "artifact route" in lowered:
@@ -338,9 +423,11 @@ def _contains_explicit_artifact_contract(prompt: str) -> bool:
     return False
 
 
-def _augment_prompt_for_generation_request(prompt: str) -> str:
+def _augment_prompt_for_generation_request(prompt: str, *, lowered: str | None = None) -> str:
     result = prompt
-    if _looks_like_image_request(prompt):
+    if lowered is None:
+        lowered = (prompt or "").lower()
+    if _looks_like_image_request(prompt, lowered=lowered):
         result = (
             f"{result}\n\n[Image Delivery Contract]\n"
             "If you generate an image file, save it as a local file and include at least one markdown image path.\n"
@@ -348,7 +435,9 @@ def _augment_prompt_for_generation_request(prompt: str) -> str:
             "![generated](./.mock_messenger/generated/<file>.png)\n"
             "Use a real existing path only."
         )
-    if _looks_like_html_request(prompt) and not _contains_explicit_artifact_contract(prompt):
+    if _looks_like_html_request(prompt, lowered=lowered) and not _contains_explicit_artifact_contract(
+        prompt, lowered=lowered
+    ):
         result = (
             f"{result}\n\n[HTML Delivery Contract]\n"
             "If you generate an HTML page, save it as a local file and include a markdown link to that exact file.\n"
@@ -361,8 +450,43 @@ def _augment_prompt_for_generation_request(prompt: str) -> str:
     return result
 
 
-def _parse_youtube_search_request(text: str) -> tuple[bool, str | None]:
-    lowered = text.lower()
+# Filler words stripped from a YouTube request to leave the search query. Longer
+# phrases come first so the alternation prefers them over their prefixes.
+_YOUTUBE_QUERY_NOISE_WORDS = (
+    "\uc720\ud29c\ube0c",
+    "\uc720\ud22c\ube0c",
+    "\uc720\ud2b8\ube0c",
+    "\uc720\ud2b8\ubdf0",
+    "\ub3d9\uc601\uc0c1",
+    "\uc601\uc0c1",
+    "\ucc3e\uc544\uc918",
+    "\ucc3e\uc544 \uc918",
+    "\ucc3e\uc544",
+    "\uac80\uc0c9\ud574\uc918",
+    "\uac80\uc0c9\ud574 \uc918",
+    "\uac80\uc0c9",
+    "\ucd94\ucc9c\ud574\uc918",
+    "\ucd94\ucc9c\ud574 \uc918",
+    "\ucd94\ucc9c",
+    "\ubcf4\uc5ec\uc918",
+    "\ubcf4\uc5ec \uc918",
+    "\ubcf4\uc5ec",
+    "\ubbf8\ub9ac\ubcf4\uae30",
+    "\ubbf8\ub9ac \ubcf4\uae30",
+    "\ud615\uc2dd\uc73c\ub85c",
+    "\ud615\uc2dd",
+    "please",
+    "for me",
+)
+_YOUTUBE_QUERY_NOISE_RE = re.compile(
+    "|".join([r"\byoutube\b", *(re.escape(word) for word in _YOUTUBE_QUERY_NOISE_WORDS)]),
+    re.IGNORECASE,
+)
+
+
+def _parse_youtube_search_request(text: str, *, lowered: str | None = None) -> tuple[bool, str | None]:
+    if lowered is None:
+        lowered = text.lower()
     youtube_variants = (
         "youtube",
         "\uc720\ud29c\ube0c",
@@ -387,36 +511,8 @@ def _parse_youtube_search_request(text: str) -> tuple[bool, str | None]:
     if not any(hint in lowered for hint in search_hints):
         return (False, None)
 
-    cleaned = text
-    for pattern in (
-        r"(?i)\byoutube\b",
-        "\uc720\ud29c\ube0c",
-        "\uc720\ud22c\ube0c",
-        "\uc720\ud2b8\ube0c",
-        "\uc720\ud2b8\ubdf0",
-        "\ub3d9\uc601\uc0c1",
-        "\uc601\uc0c1",
-        "\ucc3e\uc544\uc918",
-        "\ucc3e\uc544 \uc918",
-        "\ucc3e\uc544",
-        "\uac80\uc0c9\ud574\uc918",
-        "\uac80\uc0c9\ud574 \uc918",
-        "\uac80\uc0c9",
-        "\ucd94\ucc9c\ud574\uc918",
-        "\ucd94\ucc9c\ud574 \uc918",
-        "\ucd94\ucc9c",
-        "\ubcf4\uc5ec\uc918",
-        "\ubcf4\uc5ec \uc918",
-        "\ubcf4\uc5ec",
-        "\ubbf8\ub9ac\ubcf4\uae30",
-        "\ubbf8\ub9ac \ubcf4\uae30",
-        "\ud615\uc2dd\uc73c\ub85c",
-        "\ud615\uc2dd",
-        "please",
-        "for me",
-    ):
-        cleaned = re.sub(pattern, " ", cleaned, flags=re.IGNORECASE)
-    cleaned = re.sub(r"\s+", " ", cleaned).strip(" .,!?\n\t")
+    cleaned = _YOUTUBE_QUERY_NOISE_RE.sub(" ", text)
+    cleaned = " ".join(cleaned.split()).strip(" .,!?")
     return (True, cleaned or None)
 
 
@@ -448,6 +544,43 @@ def _handle_youtube_search(
     _send_message(client, base_url, token, chat_id, result.url)
 
 
+def _iter_files_with_suffix(root: str, suffixes: set[str]) -> Iterator[os.DirEntry[str]]:
+    # Same traversal as os.walk (top-down, no symlinked dirs, unreadable dirs
+    # skipped) but filters on DirEntry names so rejected files never become Paths.
+    suffix_tuple = tuple(suffixes)
+    pending = [root]
+    while pending:
+        directory = pending.pop()
+        matches: list[os.DirEntry[str]] = []
+        subdirs: list[str] = []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
+                    if is_dir:
+                        if entry.name not in SKIP_DIR_NAMES and not entry.is_symlink():
+                            subdirs.append(entry.path)
+                        continue
+                    # Path(".png").suffix is empty, so a bare suffix name is not a match.
+                    lowered = entry.name.lower()
+                    if lowered.endswith(suffix_tuple) and lowered not in suffixes:
+                        matches.append(entry)
+        except OSError:
+            continue
+        yield from matches
+        pending.extend(reversed(subdirs))
+
+
+@lru_cache(maxsize=32)
+def _resolve_scan_root(root: Path) -> Path:
+    # Scan roots (cwd, the temp dir, test roots) are absolute and stable, so each
+    # is resolved once per process; cwd itself is still read live on every call.
+    return root.resolve()
+
+
 def _find_recent_files(
     *,
     since_epoch: float,
@@ -456,39 +589,33 @@ def _find_recent_files(
     roots: list[Path] | None = None,
 ) -> list[Path]:
     scan_roots = roots if roots is not None else [Path.cwd(), Path(tempfile.gettempdir())]
-    discovered: list[tuple[float, Path]] = []
+    discovered: list[tuple[float, str]] = []
     seen: set[str] = set()
     cutoff = since_epoch - 2.0
 
     for root in scan_roots:
         try:
-            resolved_root = root.resolve()
+            resolved_root = _resolve_scan_root(root.absolute())
         except Exception:
             continue
         if not resolved_root.exists() or not resolved_root.is_dir():
             continue
 
-        for dirpath, dirnames, filenames in os.walk(resolved_root):
-            dirnames[:] = [name for name in dirnames if name not in SKIP_DIR_NAMES]
-            for name in filenames:
-                suffix = Path(name).suffix.lower()
-                if suffix not in suffixes:
-                    continue
-                path = Path(dirpath) / name
-                key = str(path).lower()
-                if key in seen:
-                    continue
-                try:
-                    stat = path.stat()
-                except OSError:
-                    continue
-                if stat.st_size <= 0 or stat.st_mtime < cutoff:
-                    continue
-                seen.add(key)
-                discovered.append((stat.st_mtime, path.resolve()))
+        for entry in _iter_files_with_suffix(str(resolved_root), suffixes):
+            key = entry.path.lower()
+            if key in seen:
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            if stat.st_size <= 0 or stat.st_mtime < cutoff:
+                continue
+            seen.add(key)
+            discovered.append((stat.st_mtime, entry.path))
 
-    discovered.sort(key=lambda item: item[0], reverse=True)
-    return [path for _, path in discovered[: max(1, limit)]]
+    newest = heapq.nlargest(max(1, limit), discovered, key=lambda item: item[0])
+    return [Path(path).resolve() for _, path in newest]
 
 
 def _find_recent_image_files(*, since_epoch: float, limit: int = 3, roots: list[Path] | None = None) -> list[Path]:
@@ -499,12 +626,7 @@ def _find_recent_html_files(*, since_epoch: float, limit: int = 3, roots: list[P
     return _find_recent_files(since_epoch=since_epoch, suffixes=HTML_SUFFIXES, limit=limit, roots=roots)
 
 
-def _create_demo_landing_page() -> Path:
-    generated_dir = (Path.cwd() / ".mock_messenger" / "generated").resolve()
-    generated_dir.mkdir(parents=True, exist_ok=True)
-    filename = f"landing_demo_{int(time.time())}.html"
-    path = generated_dir / filename
-    html = """<!doctype html>
+_DEMO_LANDING_HTML = """<!doctype html>
 <html lang=\"ko\">
 <head>
   <meta charset=\"utf-8\" />
@@ -539,58 +661,100 @@ def _create_demo_landing_page() -> Path:
 </body>
 </html>
 """
-    path.write_text(html, encoding="utf-8")
+
+
+def _create_demo_landing_page() -> Path:
+    generated_dir = (Path.cwd() / ".mock_messenger" / "generated").resolve()
+    generated_dir.mkdir(parents=True, exist_ok=True)
+    filename = f"landing_demo_{int(time.time())}.html"
+    path = generated_dir / filename
+    path.write_text(_DEMO_LANDING_HTML, encoding="utf-8")
     return path
 def _send_long_message(client: httpx.Client, base_url: str, token: str, chat_id: int, text: str) -> None:
     if len(text) <= MAX_MESSAGE_LEN:
         _send_message(client, base_url, token, chat_id, text)
         return
-    chunks = _split_chunks(text, MAX_MESSAGE_LEN - 20)
-    for index, chunk in enumerate(chunks, start=1):
-        prefix = "" if index == 1 else f"[continued {index}/{len(chunks)}]\n"
+    chunk_size = MAX_MESSAGE_LEN - 20
+    total = -(-len(text) // chunk_size)
+    for index, chunk in enumerate(_iter_chunks(text, chunk_size), start=1):
+        prefix = "" if index == 1 else f"[continued {index}/{total}]\n"
         _send_message(client, base_url, token, chat_id, f"{prefix}{chunk}")
 
 
+def _iter_chunks(text: str, chunk_size: int) -> Iterator[str]:
+    # Slice lazily so a long reply is never held twice (text + every chunk).
+    for start in range(0, len(text), chunk_size):
+        yield text[start : start + chunk_size]
+
+
 def _split_chunks(text: str, chunk_size: int) -> list[str]:
     if len(text) <= chunk_size:
         return [text]
-    return [text[i : i + chunk_size] for i in range(0, len(text), chunk_size)]
+    return list(_iter_chunks(text, chunk_size))
+
+
+def _truncate_preview(value: str, limit: int) -> str:
+    if len(value) <= limit:
+        return value
+    return f"{value[:limit]}\n...[truncated {len(value) - limit} chars]"
+
+
+def _default_payload_text(payload: dict[str, Any]) -> str:
+    return _truncate_preview(str(payload), MAX_REASONING_PREVIEW)
+
+
+def _message_payload_text(payload: dict[str, Any]) -> str:
+    text = payload.get("text")
+    if isinstance(text, str) and text.strip():
+        return _truncate_preview(text, MAX_REASONING_PREVIEW)
+    stderr = payload.get("stderr")
+    if isinstance(stderr, str) and stderr.strip():
+        return _truncate_preview(stderr, MAX_REASONING_PREVIEW)
+    return _default_payload_text(payload)
+
+
+def _command_payload_text(payload: dict[str, Any], *, completed: bool) -> str:
+    command = payload.get("command")
+    parts: list[str] = []
+    if isinstance(command, str) and command:
+        parts.append(command)
+    if completed:
+        if "exit_code" in payload:
+            parts.append(f"exit_code={payload.get('exit_code')}")
+        output = payload.get("aggregated_output")
+        if isinstance(output, str) and output.strip():
+            parts.append(_truncate_preview(output.strip(), MAX_COMMAND_OUTPUT_PREVIEW))
+    return "\n".join(parts).strip()
+
+
+def _command_started_payload_text(payload: dict[str, Any]) -> str:
+    return _command_payload_text(payload, completed=False)
+
+
+def _command_completed_payload_text(payload: dict[str, Any]) -> str:
+    return _command_payload_text(payload, completed=True)
+
+
+def _error_payload_text(payload: dict[str, Any]) -> str:
+    message = payload.get("message")
+    if isinstance(message, str) and message.strip():
+        return _truncate_preview(message.strip(), MAX_REASONING_PREVIEW)
+    return _default_payload_text(payload)
+
+
+# One dict lookup per streamed event; unknown types fall back to str(payload).
+_EVENT_PAYLOAD_RENDERERS: dict[str, Callable[[dict[str, Any]], str]] = {
+    "assistant_message": _message_payload_text,
+    "reasoning": _message_payload_text,
+    "command_started": _command_started_payload_text,
+    "command_completed": _command_completed_payload_text,
+    "error": _error_payload_text,
+}
 
 
 def _event_payload_text(event: AdapterEvent) -> str:
-    def truncate(value: str, limit: int) -> str:
-        if len(value) <= limit:
-            return value
-        return f"{value[:limit]}\n...[truncated {len(value) - limit} chars]"
-
-    payload = event.payload
-    if event.event_type in ("assistant_message", "reasoning"):
-        text = payload.get("text")
-        if isinstance(text, str) and text.strip():
-            return truncate(text, MAX_REASONING_PREVIEW)
-        stderr = payload.get("stderr")
-        if isinstance(stderr, str) and stderr.strip():
-            return truncate(stderr, MAX_REASONING_PREVIEW)
-
-    if event.event_type in ("command_started", "command_completed"):
-        command = payload.get("command")
-        parts: list[str] = []
-        if isinstance(command, str) and command:
-            parts.append(command)
-        if event.event_type == "command_completed":
-            if "exit_code" in payload:
-                parts.append(f"exit_code={payload.get('exit_code')}")
-            output = payload.get("aggregated_output")
-            if isinstance(output, str) and output.strip():
-                parts.append(truncate(output.strip(), MAX_COMMAND_OUTPUT_PREVIEW))
-        return "\n".join(parts).strip()
-
-    if event.event_type == "error":
-        message = payload.get("message")
-        if isinstance(message, str) and message.strip():
-            return truncate(message.strip(), MAX_REASONING_PREVIEW)
-
-    return truncate(str(payload), MAX_REASONING_PREVIEW)
+    renderer = _EVENT_PAYLOAD_RENDERERS.get(event.event_type, _default_payload_text)
+    return renderer(event.payload)
 
 
 def _format_event_lines(event: AdapterEvent) -> list[str]:
@@ -624,12 +788,23 @@ class LiveMessageState:
 
 
 class LiveMessageBuffer:
-    def __init__(self, *, client: httpx.Client, base_url: str, token: str, chat_id: int) -> None:
+    def __init__(
+        self,
+        *,
+        client: httpx.Client,
+        base_url: str,
+        token: str,
+        chat_id: int,
+        flush_interval_sec: float = LIVE_FLUSH_INTERVAL_SEC,
+    ) -> None:
         self._client = client
         self._base_url = base_url
         self._token = token
         self._chat_id = chat_id
+        self._flush_interval_sec = flush_interval_sec
         self._state: LiveMessageState | None = None
+        self._sent_text = ""
+        self._last_flush = 0.0
 
     def append_line(self, line: str) -> None:
         line = line.strip()
@@ -637,26 +812,42 @@ class LiveMessageBuffer:
             return
 
         if self._state is None:
-            message_id = _send_message(self._client, self._base_url, self._token, self._chat_id, line)
-            self._state = LiveMessageState(chat_id=self._chat_id, message_id=message_id, text=line)
+            self._start_message(line)
             return
 
         candidate = f"{self._state.text}\n{line}"
         if len(candidate) <= MAX_MESSAGE_LEN:
-            _edit_message(
-                self._client,
-                self._base_url,
-                self._token,
-                self._state.chat_id,
-                self._state.message_id,
-                candidate,
-            )
             self._state.text = candidate
+            self.flush()
+            return
+
+        self.flush(force=True)
+        self._start_message(f"[continued]\n{line}")
+
+    def flush(self, *, force: bool = False) -> None:
+        # Lines accumulate locally and go out as one edit per interval, so a
+        # burst of events costs one editMessageText instead of one per line.
+        if self._state is None or self._state.text == self._sent_text:
             return
+        now = time.monotonic()
+        if not force and now - self._last_flush < self._flush_interval_sec:
+            return
+        _edit_message(
+            self._client,
+            self._base_url,
+            self._token,
+            self._state.chat_id,
+            self._state.message_id,
+            self._state.text,
+        )
+        self._sent_text = self._state.text
+        self._last_flush = now
 
-        continuation = f"[continued]\n{line}"
-        message_id = _send_message(self._client, self._base_url, self._token, self._chat_id, continuation)
-        self._state = LiveMessageState(chat_id=self._chat_id, message_id=message_id, text=continuation)
+    def _start_message(self, text: str) -> None:
+        message_id = _send_message(self._client, self._base_url, self._token, self._chat_id, text)
+        self._state = LiveMessageState(chat_id=self._chat_id, message_id=message_id, text=text)
+        self._sent_text = text
+        self._last_flush = time.monotonic()
 
 
 def _pipe_reader(
@@ -679,6 +870,70 @@ def _pipe_reader(
         output_queue.put((source, None))
 
 
+class _PipeLineSelector:
+    """Queue-like line source that multiplexes child pipes on one selector.
+
+    Mirrors the ``queue.Queue`` surface the stream loop uses (``get`` raising
+    ``queue.Empty`` on timeout, ``empty``) and the ``_pipe_reader`` protocol: one
+    ``(source, line)`` per text line and a final ``(source, None)`` at EOF.
+    """
+
+    def __init__(self, pipes: dict[str, Any]) -> None:
+        self._selector = selectors.DefaultSelector()
+        self._pending: deque[tuple[str, str | None]] = deque()
+        self._partial: dict[str, str] = {}
+        self._decoders: dict[str, codecs.IncrementalDecoder] = {}
+        for source, pipe in pipes.items():
+            if pipe is None:
+                self._pending.append((source, None))
+                continue
+            fd = pipe.fileno()
+            os.set_blocking(fd, False)
+            self._selector.register(fd, selectors.EVENT_READ, source)
+            self._partial[source] = ""
+            self._decoders[source] = codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+    def get(self, timeout: float) -> tuple[str, str | None]:
+        if not self._pending:
+            if self._selector.get_map():
+                for key, _ in self._selector.select(timeout):
+                    self._read(key)
+            else:
+                time.sleep(timeout)
+        if not self._pending:
+            raise queue.Empty
+        return self._pending.popleft()
+
+    def empty(self) -> bool:
+        return not self._pending
+
+    def close(self) -> None:
+        self._selector.close()
+
+    def _read(self, key: selectors.SelectorKey) -> None:
+        source = key.data
+        try:
+            chunk = os.read(key.fd, 65536)
+        except BlockingIOError:
+            return
+        text = self._partial[source] + self._decoders[source].decode(chunk, final=not chunk)
+        if chunk and text.endswith("\r"):
+            # Hold a trailing CR back until we know whether "\n" follows it.
+            text, carry = text[:-1], "\r"
+        else:
+            carry = ""
+        # Same universal-newline splitting as the text-mode readline() it replaces.
+        *lines, rest = text.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+        self._pending.extend((source, line) for line in lines)
+        if chunk:
+            self._partial[source] = rest + carry
+            return
+        if rest:
+            self._pending.append((source, rest))
+        self._selector.unregister(key.fd)
+        self._pending.append((source, None))
+
+
 def _build_codex_command(
     *,
     codex_bin: str,
@@ -699,6 +954,7 @@ def _build_codex_command(
     return cmd
 
 
+@lru_cache(maxsize=16)
 def _cmd_preview(*, codex_bin: str, thread_id: str | None, model: str | None, sandbox: str) -> str:
     parts = [codex_bin, "exec", "--json", "--skip-git-repo-check", "-c", 'model_reasoning_effort="high"']
     if model:
@@ -726,6 +982,7 @@ class CodexRunResult:
 def _run_codex_stream(
     *,
     client: httpx.Client,
+    adapter: CodexAdapter,
     base_url: str,
     token: str,
     chat_id: int,
@@ -737,7 +994,6 @@ def _run_codex_stream(
     heartbeat_sec: float,
     run_timeout_sec: int,
 ) -> CodexRunResult:
-    adapter = CodexAdapter(codex_bin=codex_bin)
     live = LiveMessageBuffer(client=client, base_url=base_url, token=token, chat_id=chat_id)
     live.append_line(_format_status_line(f"turn started mode={'resume' if thread_id else 'new'}"))
     live.append_line(_format_status_line(_cmd_preview(codex_bin=codex_bin, thread_id=thread_id, model=model, sandbox=sandbox)))
@@ -763,6 +1019,7 @@ def _run_codex_stream(
         )
     except Exception as error:
         live.append_line(_format_status_line(f"failed to start codex: {error}"))
+        live.flush(force=True)
         return CodexRunResult(
             thread_id=thread_id,
             assistant_text="",
@@ -773,19 +1030,22 @@ def _run_codex_stream(
             timed_out=False,
         )
 
-    line_queue: "queue.Queue[tuple[str, str | None]]" = queue.Queue()
-    stdout_thread = threading.Thread(
-        target=_pipe_reader,
-        kwargs={"pipe": process.stdout, "source": "stdout", "output_queue": line_queue},
-        daemon=True,
-    )
-    stderr_thread = threading.Thread(
-        target=_pipe_reader,
-        kwargs={"pipe": process.stderr, "source": "stderr", "output_queue": line_queue},
-        daemon=True,
-    )
-    stdout_thread.start()
-    stderr_thread.start()
+    pipes = {"stdout": process.stdout, "stderr": process.stderr}
+    reader_threads: list[threading.Thread] = []
+    line_queue: "queue.Queue[tuple[str, str | None]] | _PipeLineSelector"
+    if os.name == "nt":
+        # Windows cannot select() on pipes, so keep one blocking reader per pipe.
+        line_queue = queue.Queue()
+        for source, pipe in pipes.items():
+            reader_thread = threading.Thread(
+                target=_pipe_reader,
+                kwargs={"pipe": pipe, "source": source, "output_queue": line_queue},
+                daemon=True,
+            )
+            reader_thread.start()
+            reader_threads.append(reader_thread)
+    else:
+        line_queue = _PipeLineSelector(pipes)
 
     seq = 1
     event_count = 0
@@ -817,6 +1077,7 @@ def _run_codex_stream(
             if now - last_heartbeat >= heartbeat_sec:
                 live.append_line(_format_status_line(f"running... elapsed={int(elapsed)}s"))
                 last_heartbeat = now
+            live.flush()
             if process.poll() is not None and stdout_done and stderr_done and line_queue.empty():
                 break
             continue
@@ -866,8 +1127,10 @@ def _run_codex_stream(
         process.kill()
         return_code = process.wait()
 
-    stdout_thread.join(timeout=1)
-    stderr_thread.join(timeout=1)
+    for reader_thread in reader_threads:
+        reader_thread.join(timeout=1)
+    if isinstance(line_queue, _PipeLineSelector):
+        line_queue.close()
 
     stderr_text = "\n".join(stderr_parts).strip()
     assistant_text = "\n".join(part for part in assistant_parts if part).strip()
@@ -886,6 +1149,7 @@ def _run_codex_stream(
         stderr_preview = stderr_text[:900]
         live.append_line(f"[~][{_utc_hhmmss()}][stderr] {stderr_preview}")
     live.append_line(_format_status_line(f"turn finished status={status} events={event_count}"))
+    live.flush(force=True)
 
     return CodexRunResult(
         thread_id=resolved_thread_id,
@@ -913,8 +1177,9 @@ def main() -> None:
     thread_by_chat: dict[int, str] = {}
     sent_file_paths_by_chat: dict[int, set[str]] = {}
     youtube_search = YoutubeSearchService()
+    adapter = CodexAdapter(codex_bin=codex_bin)
 
-    with httpx.Client(timeout=90) as client:
+    with _build_api_client() as client:
         while True:
             try:
                 payload: dict[str, int] = {"limit": 20, "timeout": 1}
@@ -944,6 +1209,7 @@ def main() -> None:
                         continue
 
                     text = user_text.strip()
+                    lowered_text = text.lower()
 
                     if text == "/youtube" or text == "/yt" or text.startswith("/youtube ") or text.startswith("/yt "):
                         command, *parts = text.split(maxsplit=1)
@@ -961,7 +1227,7 @@ def main() -> None:
                             )
                         continue
 
-                    youtube_intent, youtube_query = _parse_youtube_search_request(text)
+                    youtube_intent, youtube_query = _parse_youtube_search_request(text, lowered=lowered_text)
                     if youtube_intent:
                         if not youtube_query:
                             _send_message(
@@ -1009,9 +1275,10 @@ def main() -> None:
 
                     thread_id = thread_by_chat.get(chat_id)
                     run_started_epoch = time.time()
-                    run_prompt = _augment_prompt_for_generation_request(text)
+                    run_prompt = _augment_prompt_for_generation_request(text, lowered=lowered_text)
                     run_result = _run_codex_stream(
                         client=client,
+                        adapter=adapter,
                         base_url=base_url,
                         token=token,
                         chat_id=chat_id,
@@ -1042,11 +1309,11 @@ def main() -> None:
                     if run_result.assistant_text:
                         _send_long_message(client, base_url, token, chat_id, run_result.assistant_text)
                         image_paths = _extract_local_image_paths(run_result.assistant_text)
-                        if not image_paths and _looks_like_image_request(text):
+                        if not image_paths and _looks_like_image_request(text, lowered=lowered_text):
                             image_paths = _find_recent_image_files(since_epoch=run_started_epoch, limit=3)
 
                         html_paths = _extract_local_html_paths(run_result.assistant_text)
-                        if not html_paths and _looks_like_html_request(text):
+                        if not html_paths and _looks_like_html_request(text, lowered=lowered_text):
                             html_paths = _find_recent_html_files(since_epoch=run_started_epoch, limit=2)
 
                         sent_for_chat = sent_file_paths_by_chat.setdefault(chat_id, set())
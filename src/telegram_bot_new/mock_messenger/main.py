@@ -5,7 +5,7 @@ from pathlib import Path
 
 import uvicorn
 
-from telegram_bot_new.mock_messenger.api import create_app
+from telegram_bot_new.mock_messenger.api import WEBHOOK_DELIVERY_WORKERS, create_app
 from telegram_bot_new.mock_messenger.store import MockMessengerStore
 
 
@@ -19,6 +19,18 @@ def build_parser() -> argparse.ArgumentParser:
     parser.add_argument("--embedded-host", default="127.0.0.1")
     parser.add_argument("--embedded-base-port", type=int, default=8600)
     parser.add_argument("--allow-get-updates-with-webhook", action="store_true")
+    parser.add_argument(
+        "--webhook-delivery-workers",
+        type=int,
+        default=WEBHOOK_DELIVERY_WORKERS,
+        help="background webhook POST workers; 0 delivers inline before /_mock/send returns",
+    )
+    parser.add_argument(
+        "--loop",
+        choices=("auto", "uvloop", "asyncio"),
+        default="auto",
+        help="event loop; auto picks uvloop (shipped with uvicorn[standard]) when it is importable",
+    )
     return parser
 
 
@@ -38,9 +50,10 @@ def main() -> None:
         bots_config_path=args.bots_config,
         embedded_host=args.embedded_host,
         embedded_base_port=int(args.embedded_base_port),
+        webhook_delivery_workers=int(args.webhook_delivery_workers),
     )
 
-    uvicorn.run(app, host=args.host, port=args.port, log_level="info")
+    uvicorn.run(app, host=args.host, port=args.port, log_level="info", loop=args.loop)
 
 
 if __name__ == "__main__":
@@ -4,15 +4,17 @@ import asyncio
 from pathlib import Path
 from typing import Any, Awaitable, Callable, Optional, Union
 
+import httpx
 from fastapi import FastAPI, HTTPException
 
 from telegram_bot_new.mock_messenger.bot_catalog import (
     build_bot_catalog,
-    classify_last_error_tag,
     compact_threads,
     extract_runtime_metrics,
     fetch_embedded_audit_logs,
     fetch_embedded_runtime,
+    get_bot_catalog_row,
+    infer_run_state_from_messages,
     infer_session_view_from_messages,
 )
 from telegram_bot_new.mock_messenger.runtime_profile import explain_unknown_bot_id
@@ -116,18 +118,24 @@ async def _collect_bot_diagnostics(
     token: str,
     chat_id: Optional[int],
     limit: int,
+    embedded_client: httpx.AsyncClient,
 ) -> dict[str, Any]:
-    messages = store.get_messages(token=token, chat_id=chat_id, limit=limit)
-    threads = store.list_threads(token=token)
-    health, metrics_payload = await fetch_embedded_runtime(selected.get("embedded_url"))
+    # The embedded healthz/metrics round-trip dominates; overlap it with the
+    # store reads, which run in worker threads so the store lock never blocks the loop.
+    messages, threads, (health, metrics_payload) = await asyncio.gather(
+        asyncio.to_thread(store.get_messages, token=token, chat_id=chat_id, limit=limit),
+        asyncio.to_thread(store.list_threads, token=token),
+        fetch_embedded_runtime(selected.get("embedded_url"), client=embedded_client),
+    )
     metrics = extract_runtime_metrics(metrics_payload)
-    session_view = infer_session_view_from_messages(messages)
+    run_status, last_error_tag = infer_run_state_from_messages(messages)
+    session_view = infer_session_view_from_messages(messages, run_status=run_status)
     return {
         "health": health,
         "metrics": metrics,
         "session": session_view,
         "threads_top10": compact_threads(threads, selected_chat_id=chat_id),
-        "last_error_tag": classify_last_error_tag(messages),
+        "last_error_tag": last_error_tag,
     }
 
 
@@ -140,6 +148,7 @@ def register_diagnostics_routes(
     embedded_base_port: int,
     infer_runtime_profile: Callable[[], dict[str, Any]],
     enqueue_and_dispatch_user_message: Callable[[str, int, int, str], Awaitable[dict[str, Any]]],
+    embedded_client: httpx.AsyncClient,
 ) -> None:
     def _unknown_bot_detail(bot_id: str) -> str:
         return explain_unknown_bot_id(
@@ -153,12 +162,12 @@ def register_diagnostics_routes(
         chat_id: Optional[int] = None,
         limit: int = 100,
     ) -> dict[str, Any]:
-        catalog = build_bot_catalog(
+        selected = get_bot_catalog_row(
             bots_config_path=bots_config_path,
             embedded_host=embedded_host,
             embedded_base_port=embedded_base_port,
+            bot_id=bot_id,
         )
-        selected = next((row for row in catalog if row.get("bot_id") == bot_id), None)
         if selected is None:
             raise HTTPException(status_code=404, detail=_unknown_bot_detail(bot_id))
 
@@ -166,6 +175,7 @@ def register_diagnostics_routes(
             selected.get("embedded_url"),
             chat_id=chat_id,
             limit=max(1, min(int(limit), 500)),
+            client=embedded_client,
         )
         return {
             "ok": True,
@@ -183,12 +193,12 @@ def register_diagnostics_routes(
         limit: int = 120,
     ) -> dict[str, Any]:
         resolved_limit = max(1, min(int(limit), 300))
-        catalog = build_bot_catalog(
+        selected = get_bot_catalog_row(
             bots_config_path=bots_config_path,
             embedded_host=embedded_host,
             embedded_base_port=embedded_base_port,
+            bot_id=bot_id,
         )
-        selected = next((row for row in catalog if row.get("bot_id") == bot_id), None)
         if selected is None:
             raise HTTPException(status_code=404, detail=_unknown_bot_detail(bot_id))
         expected_token = str(selected.get("token") or "").strip()
@@ -201,6 +211,7 @@ def register_diagnostics_routes(
             token=token,
             chat_id=chat_id,
             limit=resolved_limit,
+            embedded_client=embedded_client,
         )
 
         return {
@@ -228,11 +239,13 @@ def register_diagnostics_routes(
                 token=token,
                 chat_id=effective_chat_id,
                 limit=resolved_limit,
+                embedded_client=embedded_client,
             )
             logs, embedded_error = await fetch_embedded_audit_logs(
                 bot.get("embedded_url"),
                 chat_id=effective_chat_id,
                 limit=min(120, resolved_limit),
+                client=embedded_client,
             )
             slo = _compute_slo_snapshot(logs)
             state = _compute_tower_state(
@@ -263,12 +276,12 @@ def register_diagnostics_routes(
 
     @app.post("/_mock/control_tower/recover")
     async def control_tower_recover(request: ControlTowerRecoverRequest) -> dict[str, Any]:
-        catalog = build_bot_catalog(
+        selected = get_bot_catalog_row(
             bots_config_path=bots_config_path,
             embedded_host=embedded_host,
             embedded_base_port=embedded_base_port,
+            bot_id=request.bot_id,
         )
-        selected = next((row for row in catalog if str(row.get("bot_id")) == request.bot_id), None)
         if selected is None:
             raise HTTPException(status_code=404, detail=_unknown_bot_detail(request.bot_id))
         expected_token = str(selected.get("token") or "").strip()
@@ -302,11 +315,13 @@ def register_diagnostics_routes(
             token=selected_token,
             chat_id=target_chat_id,
             limit=120,
+            embedded_client=embedded_client,
         )
         logs, embedded_error = await fetch_embedded_audit_logs(
             selected.get("embedded_url"),
             chat_id=target_chat_id,
             limit=120,
+            client=embedded_client,
         )
         slo = _compute_slo_snapshot(logs)
         state = _compute_tower_state(
@@ -337,12 +352,12 @@ def register_diagnostics_routes(
         limit: int = 120,
     ) -> dict[str, Any]:
         resolved_limit = max(20, min(int(limit), 500))
-        catalog = build_bot_catalog(
+        selected = get_bot_catalog_row(
             bots_config_path=bots_config_path,
             embedded_host=embedded_host,
             embedded_base_port=embedded_base_port,
+            bot_id=bot_id,
         )
-        selected = next((row for row in catalog if row.get("bot_id") == bot_id), None)
         if selected is None:
             raise HTTPException(status_code=404, detail=_unknown_bot_detail(bot_id))
         expected_token = str(selected.get("token") or "").strip()
@@ -357,11 +372,13 @@ def register_diagnostics_routes(
             token=selected_token,
             chat_id=target_chat_id,
             limit=resolved_limit,
+            embedded_client=embedded_client,
         )
         logs, embedded_error = await fetch_embedded_audit_logs(
             selected.get("embedded_url"),
             chat_id=target_chat_id,
             limit=resolved_limit,
+            client=embedded_client,
         )
         slo = _compute_slo_snapshot(logs)
         state = _compute_tower_state(
@@ -1,12 +1,46 @@
 from __future__ import annotations
 
-from typing import Any, Callable, Optional
+import asyncio
+from typing import Any, Callable, Optional, TypeVar
 
-from fastapi import Body, FastAPI, File, Form, UploadFile
+from fastapi import Body, FastAPI, File, Form, Request, UploadFile
 from fastapi.responses import JSONResponse
-
+from pydantic import BaseModel, ValidationError
+
+from telegram_bot_new.mock_messenger.schemas import (
+    TelegramAnswerCallbackQueryPayload,
+    TelegramDeleteWebhookPayload,
+    TelegramEditMessageTextPayload,
+    TelegramSendDocumentForm,
+    TelegramSendMessagePayload,
+    TelegramSetWebhookPayload,
+)
 from telegram_bot_new.mock_messenger.store import MockMessengerStore
 
+_PayloadT = TypeVar("_PayloadT", bound=BaseModel)
+
+_EXPECTED_TYPE_BY_ERROR = {
+    "bool_parsing": "boolean",
+    "bool_type": "boolean",
+    "int_parsing": "integer",
+    "int_type": "integer",
+    "string_type": "string",
+}
+
+
+def _describe_payload_error(model: type[BaseModel], exc: ValidationError) -> str:
+    # Errors are reported in field declaration order, so the first one matches
+    # the field the hand-written checks used to reject first.
+    error = exc.errors()[0]
+    if not error["loc"]:
+        return "Bad Request: can't parse JSON object"
+    field = str(error["loc"][0])
+    field_info = model.model_fields.get(field)
+    if field_info is None or field_info.is_required():
+        return f"Bad Request: {field} is required"
+    expected = _EXPECTED_TYPE_BY_ERROR.get(error["type"], "valid")
+    return f"Bad Request: {field} must be {expected}"
+
 
 def register_mock_telegram_routes(
     app: FastAPI,
@@ -15,10 +49,25 @@ def register_mock_telegram_routes(
     allow_get_updates_with_webhook: bool,
     try_rate_limit: Callable[..., Optional[JSONResponse]],
     telegram_error: Callable[..., JSONResponse],
-    parse_chat_id: Callable[[Any], Optional[int]],
 ) -> None:
+    def _parse_payload(model: type[_PayloadT], body: bytes) -> _PayloadT | JSONResponse:
+        # Validate straight from the raw bytes; an empty body means no fields.
+        try:
+            return model.model_validate_json(body or b"{}")
+        except ValidationError as exc:
+            return telegram_error(status_code=400, description=_describe_payload_error(model, exc))
+
+    def _parse_form(model: type[_PayloadT], **fields: Any) -> _PayloadT | JSONResponse:
+        try:
+            return model.model_validate(fields)
+        except ValidationError as exc:
+            return telegram_error(status_code=400, description=_describe_payload_error(model, exc))
+
+    # getUpdates only touches the synchronous store, so it is a plain ``def``
+    # and runs in the threadpool. The typed JSON methods read the raw body on
+    # the loop and hand parsing plus the store call to one worker thread.
     @app.post("/bot{token}/getUpdates")
-    async def bot_get_updates(token: str, payload: dict[str, Any] = Body(default_factory=dict)) -> Any:
+    def bot_get_updates(token: str, payload: dict[str, Any] = Body(default_factory=dict)) -> Any:
         if (response := try_rate_limit(store=store, token=token, method="getUpdates")) is not None:
             return response
 
@@ -38,84 +87,90 @@ def register_mock_telegram_routes(
         return {"ok": True, "result": updates}
 
     @app.post("/bot{token}/setWebhook")
-    async def bot_set_webhook(token: str, payload: dict[str, Any] = Body(default_factory=dict)) -> Any:
+    async def bot_set_webhook(token: str, http_request: Request) -> Any:
+        return await asyncio.to_thread(_set_webhook, token, await http_request.body())
+
+    def _set_webhook(token: str, body: bytes) -> Any:
         if (response := try_rate_limit(store=store, token=token, method="setWebhook")) is not None:
             return response
 
-        url = payload.get("url")
-        if not isinstance(url, str) or not url.strip():
-            return telegram_error(status_code=400, description="Bad Request: url is required")
+        request = _parse_payload(TelegramSetWebhookPayload, body)
+        if isinstance(request, JSONResponse):
+            return request
 
-        secret_token = payload.get("secret_token")
-        if secret_token is not None and not isinstance(secret_token, str):
-            return telegram_error(status_code=400, description="Bad Request: secret_token must be string")
-
-        drop_pending_updates = bool(payload.get("drop_pending_updates", False))
         store.set_webhook(
             token=token,
-            url=url.strip(),
-            secret_token=secret_token,
-            drop_pending_updates=drop_pending_updates,
+            url=request.url,
+            secret_token=request.secret_token,
+            drop_pending_updates=request.drop_pending_updates,
         )
         return {"ok": True, "result": True}
 
     @app.post("/bot{token}/deleteWebhook")
-    async def bot_delete_webhook(token: str, payload: dict[str, Any] = Body(default_factory=dict)) -> Any:
+    async def bot_delete_webhook(token: str, http_request: Request) -> Any:
+        return await asyncio.to_thread(_delete_webhook, token, await http_request.body())
+
+    def _delete_webhook(token: str, body: bytes) -> Any:
         if (response := try_rate_limit(store=store, token=token, method="deleteWebhook")) is not None:
             return response
 
-        drop_pending_updates = bool(payload.get("drop_pending_updates", False))
-        store.delete_webhook(token=token, drop_pending_updates=drop_pending_updates)
+        request = _parse_payload(TelegramDeleteWebhookPayload, body)
+        if isinstance(request, JSONResponse):
+            return request
+
+        store.delete_webhook(token=token, drop_pending_updates=request.drop_pending_updates)
         return {"ok": True, "result": True}
 
     @app.post("/bot{token}/sendMessage")
-    async def bot_send_message(token: str, payload: dict[str, Any] = Body(default_factory=dict)) -> Any:
+    async def bot_send_message(token: str, http_request: Request) -> Any:
+        return await asyncio.to_thread(_send_message, token, await http_request.body())
+
+    def _send_message(token: str, body: bytes) -> Any:
         if (response := try_rate_limit(store=store, token=token, method="sendMessage")) is not None:
             return response
 
-        chat_id = parse_chat_id(payload.get("chat_id"))
-        text = payload.get("text")
-        if chat_id is None:
-            return telegram_error(status_code=400, description="Bad Request: chat_id is required")
-        if not isinstance(text, str):
-            return telegram_error(status_code=400, description="Bad Request: text is required")
+        request = _parse_payload(TelegramSendMessagePayload, body)
+        if isinstance(request, JSONResponse):
+            return request
 
-        result = store.store_bot_message(token=token, chat_id=chat_id, text=text)
+        result = store.store_bot_message(token=token, chat_id=request.chat_id, text=request.text)
         return {"ok": True, "result": result}
 
     @app.post("/bot{token}/editMessageText")
-    async def bot_edit_message_text(token: str, payload: dict[str, Any] = Body(default_factory=dict)) -> Any:
+    async def bot_edit_message_text(token: str, http_request: Request) -> Any:
+        return await asyncio.to_thread(_edit_message_text, token, await http_request.body())
+
+    def _edit_message_text(token: str, body: bytes) -> Any:
         if (response := try_rate_limit(store=store, token=token, method="editMessageText")) is not None:
             return response
 
-        chat_id = parse_chat_id(payload.get("chat_id"))
-        message_id = payload.get("message_id")
-        text = payload.get("text")
-        if chat_id is None:
-            return telegram_error(status_code=400, description="Bad Request: chat_id is required")
-        if not isinstance(message_id, int):
-            return telegram_error(status_code=400, description="Bad Request: message_id is required")
-        if not isinstance(text, str):
-            return telegram_error(status_code=400, description="Bad Request: text is required")
-
-        updated = store.edit_bot_message(token=token, chat_id=chat_id, message_id=message_id, text=text)
+        request = _parse_payload(TelegramEditMessageTextPayload, body)
+        if isinstance(request, JSONResponse):
+            return request
+
+        updated = store.edit_bot_message(
+            token=token,
+            chat_id=request.chat_id,
+            message_id=request.message_id,
+            text=request.text,
+        )
         if updated is None:
             return telegram_error(status_code=400, description="Bad Request: message to edit not found")
         return {"ok": True, "result": updated}
 
     @app.post("/bot{token}/answerCallbackQuery")
-    async def bot_answer_callback_query(token: str, payload: dict[str, Any] = Body(default_factory=dict)) -> Any:
+    async def bot_answer_callback_query(token: str, http_request: Request) -> Any:
+        return await asyncio.to_thread(_answer_callback_query, token, await http_request.body())
+
+    def _answer_callback_query(token: str, body: bytes) -> Any:
         if (response := try_rate_limit(store=store, token=token, method="answerCallbackQuery")) is not None:
             return response
 
-        callback_query_id = payload.get("callback_query_id")
-        text = payload.get("text")
-        if not isinstance(callback_query_id, str) or not callback_query_id:
-            return telegram_error(status_code=400, description="Bad Request: callback_query_id is required")
-        if text is not None and not isinstance(text, str):
-            return telegram_error(status_code=400, description="Bad Request: text must be string")
+        request = _parse_payload(TelegramAnswerCallbackQueryPayload, body)
+        if isinstance(request, JSONResponse):
+            return request
 
-        store.record_callback_answer(token=token, callback_query_id=callback_query_id, text=text)
+        store.record_callback_answer(token=token, callback_query_id=request.callback_query_id, text=request.text)
         return {"ok": True, "result": True}
 
     @app.post("/bot{token}/sendDocument")
@@ -128,18 +183,20 @@ def register_mock_telegram_routes(
         if (response := try_rate_limit(store=store, token=token, method="sendDocument")) is not None:
             return response
 
-        parsed_chat_id = parse_chat_id(chat_id)
-        if parsed_chat_id is None:
-            return telegram_error(status_code=400, description="Bad Request: chat_id is required")
+        form = _parse_form(TelegramSendDocumentForm, chat_id=chat_id, caption=caption)
+        if isinstance(form, JSONResponse):
+            return form
 
         filename = document.filename or "document.bin"
-        content = await document.read()
-        result = store.store_document(
+        # Hand over the spooled upload file so the store streams it to disk
+        # instead of materialising the whole attachment as one bytes object.
+        result = await asyncio.to_thread(
+            store.store_document,
             token=token,
-            chat_id=parsed_chat_id,
+            chat_id=form.chat_id,
             filename=filename,
-            content=content,
-            caption=caption,
+            content=document.file,
+            caption=form.caption,
         )
         return {"ok": True, "result": result}
 
@@ -153,17 +210,17 @@ def register_mock_telegram_routes(
         if (response := try_rate_limit(store=store, token=token, method="sendPhoto")) is not None:
             return response
 
-        parsed_chat_id = parse_chat_id(chat_id)
-        if parsed_chat_id is None:
-            return telegram_error(status_code=400, description="Bad Request: chat_id is required")
+        form = _parse_form(TelegramSendDocumentForm, chat_id=chat_id, caption=caption)
+        if isinstance(form, JSONResponse):
+            return form
 
         filename = photo.filename or "photo.bin"
-        content = await photo.read()
-        result = store.store_document(
+        result = await asyncio.to_thread(
+            store.store_document,
             token=token,
-            chat_id=parsed_chat_id,
+            chat_id=form.chat_id,
             filename=filename,
-            content=content,
-            caption=caption,
+            content=photo.file,
+            caption=form.caption,
         )
         return {"ok": True, "result": result}
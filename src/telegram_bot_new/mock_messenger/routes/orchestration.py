@@ -6,7 +6,7 @@ from typing import Any, Union
 from fastapi import FastAPI, HTTPException
 from fastapi.responses import FileResponse
 
-from telegram_bot_new.mock_messenger.bot_catalog import build_bot_catalog
+from telegram_bot_new.mock_messenger.bot_catalog import lookup_bot_catalog_rows
 from telegram_bot_new.mock_messenger.cowork import (
     ActiveCoworkExistsError,
     CoworkNotFoundError,
@@ -43,37 +43,35 @@ def register_orchestration_routes(
         if len(request.profiles) < 2:
             raise HTTPException(status_code=400, detail="profiles must include at least two participants")
 
-        catalog_rows = build_bot_catalog(
+        by_bot_id = lookup_bot_catalog_rows(
             bots_config_path=bots_config_path,
             embedded_host=embedded_host,
             embedded_base_port=embedded_base_port,
+            bot_ids={profile.bot_id for profile in request.profiles},
         )
-        by_bot_id = {str(row.get("bot_id") or ""): row for row in catalog_rows}
 
         participants: list[dict[str, Any]] = []
+        scope_parts: list[str] = []
         for profile in request.profiles:
             row = by_bot_id.get(profile.bot_id)
             if row is None:
                 raise HTTPException(status_code=400, detail=_unknown_bot_detail(profile.bot_id))
-            expected_token = str(row.get("token") or "")
-            if expected_token != profile.token:
+            if row["token"] != profile.token:
                 raise HTTPException(status_code=400, detail=f"token mismatch for bot_id: {profile.bot_id}")
+            chat_id = profile.chat_id
             participants.append(
                 {
                     "profile_id": profile.profile_id,
                     "label": profile.label,
                     "bot_id": profile.bot_id,
                     "token": profile.token,
-                    "chat_id": int(profile.chat_id),
-                    "user_id": int(profile.user_id),
-                    "adapter": str(row.get("default_adapter") or ""),
+                    "chat_id": chat_id,
+                    "user_id": profile.user_id,
+                    "adapter": row["default_adapter"],
                 }
             )
-        scope_parts = sorted(
-            f"{str(item.get('bot_id') or '')}:{int(item.get('chat_id') or 0)}"
-            for item in participants
-        )
-        scope_key = "|".join(scope_parts)
+            scope_parts.append(f"{profile.bot_id}:{chat_id}")
+        scope_key = "|".join(sorted(scope_parts))
 
         try:
             result = await debate_orchestrator.start_debate(
@@ -110,20 +108,19 @@ def register_orchestration_routes(
         if len(request.profiles) < 2:
             raise HTTPException(status_code=400, detail="profiles must include at least two participants")
 
-        catalog_rows = build_bot_catalog(
+        by_bot_id = lookup_bot_catalog_rows(
             bots_config_path=bots_config_path,
             embedded_host=embedded_host,
             embedded_base_port=embedded_base_port,
+            bot_ids={profile.bot_id for profile in request.profiles},
         )
-        by_bot_id = {str(row.get("bot_id") or ""): row for row in catalog_rows}
 
         participants: list[dict[str, Any]] = []
         for profile in request.profiles:
             row = by_bot_id.get(profile.bot_id)
             if row is None:
                 raise HTTPException(status_code=400, detail=_unknown_bot_detail(profile.bot_id))
-            expected_token = str(row.get("token") or "")
-            if expected_token != profile.token:
+            if row["token"] != profile.token:
                 raise HTTPException(status_code=400, detail=f"token mismatch for bot_id: {profile.bot_id}")
             participants.append(
                 {
@@ -131,10 +128,10 @@ def register_orchestration_routes(
                     "label": profile.label,
                     "bot_id": profile.bot_id,
                     "token": profile.token,
-                    "chat_id": int(profile.chat_id),
-                    "user_id": int(profile.user_id),
-                    "role": str(profile.role),
-                    "adapter": str(row.get("default_adapter") or ""),
+                    "chat_id": profile.chat_id,
+                    "user_id": profile.user_id,
+                    "role": profile.role,
+                    "adapter": row["default_adapter"],
                 }
             )
 
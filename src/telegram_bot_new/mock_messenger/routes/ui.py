@@ -1,28 +1,71 @@
 from __future__ import annotations
 
-from typing import Callable
+import hashlib
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, NamedTuple
 
-from fastapi import FastAPI
-from fastapi.responses import FileResponse, RedirectResponse
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import RedirectResponse, Response
+
+# Browsers keep the asset but revalidate each load, so a rebuilt UI still shows
+# up immediately while unchanged files cost a bodiless 304.
+UI_CACHE_CONTROL = "no-cache"
+
+
+class _UiAsset(NamedTuple):
+    body: bytes
+    media_type: str
+    etag: str
+
+
+# Keyed on the file's mtime and size as well as its path, so a rebuilt asset is
+# re-read (with a new ETag) on the next request instead of served stale.
+@lru_cache(maxsize=32)
+def _load_ui_asset(path: str, media_type: str, mtime_ns: int, size: int) -> _UiAsset:
+    body = Path(path).read_bytes()
+    etag = f'"{hashlib.sha1(body).hexdigest()}"'
+    return _UiAsset(body=body, media_type=media_type, etag=etag)
+
+
+def _asset_response(request: Request, asset: _UiAsset) -> Response:
+    headers = {"ETag": asset.etag, "Cache-Control": UI_CACHE_CONTROL}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and asset.etag in {tag.strip() for tag in if_none_match.split(",")}:
+        return Response(status_code=304, headers=headers)
+    return Response(content=asset.body, media_type=asset.media_type, headers=headers)
 
 
 def register_ui_routes(app: FastAPI, *, web_file: Callable[[str], str]) -> None:
+    def _serve(request: Request, name: str, media_type: str) -> Response:
+        path = web_file(name)
+        try:
+            stat_result = os.stat(path)
+            asset = _load_ui_asset(path, media_type, stat_result.st_mtime_ns, stat_result.st_size)
+        except FileNotFoundError as error:
+            # Removed after web_file resolved it (e.g. mid-rebuild).
+            raise HTTPException(status_code=404, detail="ui file not found") from error
+        return _asset_response(request, asset)
+
     @app.get("/")
     async def root() -> RedirectResponse:
         return RedirectResponse(url="/_mock/ui", status_code=307)
 
+    # Asset handlers stat (and on a cache miss read) the file, so they are plain
+    # ``def`` and run in the threadpool instead of blocking the event loop.
     @app.get("/_mock/ui")
-    async def ui_index() -> FileResponse:
-        return FileResponse(web_file("index.html"))
+    def ui_index(request: Request) -> Response:
+        return _serve(request, "index.html", "text/html")
 
     @app.get("/_mock/ui/app.js")
-    async def ui_app_js() -> FileResponse:
-        return FileResponse(web_file("app.js"), media_type="application/javascript")
+    def ui_app_js(request: Request) -> Response:
+        return _serve(request, "app.js", "application/javascript")
 
     @app.get("/_mock/ui/styles.css")
-    async def ui_styles_css() -> FileResponse:
-        return FileResponse(web_file("styles.css"), media_type="text/css")
+    def ui_styles_css(request: Request) -> Response:
+        return _serve(request, "styles.css", "text/css")
 
     @app.get("/_mock/ui/favicon.svg")
-    async def ui_favicon() -> FileResponse:
-        return FileResponse(web_file("favicon.svg"), media_type="image/svg+xml")
+    def ui_favicon(request: Request) -> Response:
+        return _serve(request, "favicon.svg", "image/svg+xml")
@@ -1,8 +1,58 @@
 from __future__ import annotations
 
-from typing import Any, Literal, Optional
+from typing import Annotated, Any, Literal, Optional
 
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, BeforeValidator, Field, StrictInt, StrictStr, StringConstraints, field_validator
+
+
+def _parse_chat_id(value: Any) -> Any:
+    # Bot API clients may send chat_id as a plain digit string. Anything else
+    # ("12.0", "1_000", "+5", floats) is passed through for StrictInt to reject.
+    if isinstance(value, str):
+        stripped = value.strip()
+        if stripped and stripped.lstrip("-").isdigit():
+            try:
+                return int(stripped)
+            except ValueError:
+                return value
+    return value
+
+
+TelegramChatId = Annotated[StrictInt, BeforeValidator(_parse_chat_id)]
+# drop_pending_updates was always read through bool(...), so null, numbers and
+# arbitrary strings are coerced by truthiness rather than rejected.
+TelegramFlag = Annotated[bool, BeforeValidator(bool)]
+
+
+class TelegramSetWebhookPayload(BaseModel):
+    url: Annotated[str, StringConstraints(strict=True, strip_whitespace=True, min_length=1)]
+    secret_token: Optional[StrictStr] = None
+    drop_pending_updates: TelegramFlag = False
+
+
+class TelegramDeleteWebhookPayload(BaseModel):
+    drop_pending_updates: TelegramFlag = False
+
+
+class TelegramSendMessagePayload(BaseModel):
+    chat_id: TelegramChatId
+    text: StrictStr
+
+
+class TelegramEditMessageTextPayload(BaseModel):
+    chat_id: TelegramChatId
+    message_id: StrictInt
+    text: StrictStr
+
+
+class TelegramAnswerCallbackQueryPayload(BaseModel):
+    callback_query_id: Annotated[str, StringConstraints(strict=True, min_length=1)]
+    text: Optional[StrictStr] = None
+
+
+class TelegramSendDocumentForm(BaseModel):
+    chat_id: TelegramChatId
+    caption: Optional[str] = None
 
 
 class MockSendRequest(BaseModel):
@@ -29,7 +29,14 @@ class MockMessengerStore:
 
         self._conn = sqlite3.connect(self._db_path, check_same_thread=False)
         self._conn.row_factory = sqlite3.Row
+        self._version_epoch = uuid.uuid4().hex[:12]
         self._init_schema()
+        # (token, method) pairs with an armed rate-limit rule; lets callers skip
+        # the locked lookup when no rule applies.
+        self._rate_limited_pairs: set[tuple[str, str]] = {
+            (str(row["token"]), str(row["method"]))
+            for row in self._conn.execute("SELECT token, method FROM rate_limits WHERE remaining > 0")
+        }
 
     def close(self) -> None:
         self._conn.close()
@@ -1594,9 +1601,12 @@ MockMessengerStore.store_document = _messages_store.store_document
 MockMessengerStore.list_threads = _messages_store.list_threads
 MockMessengerStore.clear_messages = _messages_store.clear_messages
 MockMessengerStore.get_messages = _messages_store.get_messages
+MockMessengerStore.get_messages_and_updates = _messages_store.get_messages_and_updates
 MockMessengerStore.get_document_file = _messages_store.get_document_file
 MockMessengerStore.set_rate_limit_rule = _messages_store.set_rate_limit_rule
 MockMessengerStore.consume_rate_limit = _messages_store.consume_rate_limit
+MockMessengerStore.has_rate_limit_rule = _messages_store.has_rate_limit_rule
+MockMessengerStore.data_version = _messages_store.data_version
 
 MockMessengerStore.create_debate = _debate_store.create_debate
 MockMessengerStore.set_debate_running = _debate_store.set_debate_running
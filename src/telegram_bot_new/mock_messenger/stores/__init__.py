@@ -29,9 +29,12 @@ from telegram_bot_new.mock_messenger.stores.debate_store import (
 from telegram_bot_new.mock_messenger.stores.messages_store import (
     clear_messages,
     consume_rate_limit,
+    data_version,
     edit_bot_message,
     get_document_file,
     get_messages,
+    get_messages_and_updates,
+    has_rate_limit_rule,
     list_threads,
     record_callback_answer,
     set_rate_limit_rule,
@@ -52,6 +55,7 @@ __all__ = [
     "consume_rate_limit",
     "create_cowork",
     "create_debate",
+    "data_version",
     "delete_webhook",
     "edit_bot_message",
     "enqueue_user_message",
@@ -67,7 +71,9 @@ __all__ = [
     "get_debate",
     "get_document_file",
     "get_messages",
+    "get_messages_and_updates",
     "get_recent_updates",
+    "has_rate_limit_rule",
     "insert_cowork_stage_start",
     "insert_cowork_task",
     "insert_debate_turn_start",
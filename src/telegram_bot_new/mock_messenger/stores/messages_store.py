@@ -2,12 +2,19 @@ from __future__ import annotations
 
 import os
 import time
-from typing import TYPE_CHECKING, Any
+import uuid
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, BinaryIO
+
+from telegram_bot_new.mock_messenger.stores import updates_store as _updates_store
 
 if TYPE_CHECKING:
     from telegram_bot_new.mock_messenger.store import MockMessengerStore
 
 
+DOCUMENT_COPY_CHUNK_BYTES = 1 << 16
+
+
 def _now_ms() -> int:
     return int(time.time() * 1000)
 
@@ -78,7 +85,7 @@ def store_document(
     token: str,
     chat_id: int,
     filename: str,
-    content: bytes,
+    content: bytes | BinaryIO,
     caption: str | None,
 ) -> dict[str, Any]:
     self.ensure_bot(token)
@@ -90,28 +97,34 @@ def store_document(
     token_dir = self._documents_dir / safe_token
     token_dir.mkdir(parents=True, exist_ok=True)
 
-    with self._lock:
-        message_id = self._next_message_id_locked(token=token, chat_id=chat_key)
-        stored_name = f"{now_ms}_{message_id}_{safe_filename}"
-        stored_path = token_dir / stored_name
-        stored_path.write_bytes(content)
-
-        text = caption or f"[document] {filename}"
-        self._conn.execute(
-            """
-            INSERT INTO messages(token, chat_id, message_id, direction, text, created_at, updated_at)
-            VALUES (?, ?, ?, 'bot', ?, ?, ?)
-            """,
-            (token, chat_key, message_id, text, now_ms, now_ms),
-        )
-        self._conn.execute(
-            """
-            INSERT INTO documents(token, chat_id, message_id, filename, path, created_at)
-            VALUES (?, ?, ?, ?, ?, ?)
-            """,
-            (token, chat_key, message_id, filename, str(stored_path), now_ms),
-        )
-        self._conn.commit()
+    # Copy the upload outside the store lock; only the rename needs the message_id.
+    staging_path = token_dir / f".upload-{uuid.uuid4().hex}"
+    try:
+        file_size = _write_document_content(staging_path, content)
+        with self._lock:
+            message_id = self._next_message_id_locked(token=token, chat_id=chat_key)
+            stored_name = f"{now_ms}_{message_id}_{safe_filename}"
+            stored_path = token_dir / stored_name
+            os.replace(staging_path, stored_path)
+
+            text = caption or f"[document] {filename}"
+            self._conn.execute(
+                """
+                INSERT INTO messages(token, chat_id, message_id, direction, text, created_at, updated_at)
+                VALUES (?, ?, ?, 'bot', ?, ?, ?)
+                """,
+                (token, chat_key, message_id, text, now_ms, now_ms),
+            )
+            self._conn.execute(
+                """
+                INSERT INTO documents(token, chat_id, message_id, filename, path, created_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (token, chat_key, message_id, filename, str(stored_path), now_ms),
+            )
+            self._conn.commit()
+    finally:
+        staging_path.unlink(missing_ok=True)
 
     return {
         "message_id": message_id,
@@ -121,11 +134,25 @@ def store_document(
         "document": {
             "file_name": filename,
             "file_unique_id": f"mock-{token}-{message_id}",
-            "file_size": len(content),
+            "file_size": file_size,
         },
     }
 
 
+def _write_document_content(path: Path, content: bytes | BinaryIO) -> int:
+    if isinstance(content, (bytes, bytearray)):
+        path.write_bytes(content)
+        return len(content)
+    # File-like uploads are copied in fixed-size chunks so peak memory does not
+    # grow with the attachment size.
+    written = 0
+    with path.open("wb") as handle:
+        while chunk := content.read(DOCUMENT_COPY_CHUNK_BYTES):
+            handle.write(chunk)
+            written += len(chunk)
+    return written
+
+
 def list_threads(self: MockMessengerStore, *, token: str | None = None) -> list[dict[str, Any]]:
     query = [
         "SELECT m.token, m.chat_id, COUNT(*) AS message_count, MAX(m.updated_at) AS last_updated_at, b.webhook_url",
@@ -215,7 +242,49 @@ def clear_messages(self: MockMessengerStore, *, token: str, chat_id: int | None
     }
 
 
+def data_version(self: MockMessengerStore) -> str:
+    # The store owns the only connection, so total_changes grows with every
+    # committed write; the per-instance epoch keeps versions from colliding
+    # across restarts that reuse the same database file.
+    with self._lock:
+        return f"{self._version_epoch}-{self._conn.total_changes}"
+
+
 def get_messages(self: MockMessengerStore, *, token: str, chat_id: int | None, limit: int) -> list[dict[str, Any]]:
+    with self._lock:
+        rows, documents_map = _select_messages_locked(self, token=token, chat_id=chat_id, limit=limit)
+    return _format_messages(rows, documents_map)
+
+
+def get_messages_and_updates(
+    self: MockMessengerStore,
+    *,
+    token: str,
+    chat_id: int | None,
+    limit: int,
+    document_url_prefix: str | None = None,
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    # One lock acquisition for the timeline view, which always needs both slices.
+    with self._lock:
+        rows, documents_map = _select_messages_locked(
+            self,
+            token=token,
+            chat_id=chat_id,
+            limit=limit,
+            document_url_prefix=document_url_prefix,
+        )
+        update_rows = _updates_store._select_recent_updates_locked(self, token=token, chat_id=chat_id, limit=limit)
+    return _format_messages(rows, documents_map), _updates_store._format_recent_updates(update_rows)
+
+
+def _select_messages_locked(
+    self: MockMessengerStore,
+    *,
+    token: str,
+    chat_id: int | None,
+    limit: int,
+    document_url_prefix: str | None = None,
+) -> tuple[list[Any], dict[tuple[str, int], dict[str, Any]]]:
     query = [
         "SELECT token, chat_id, message_id, direction, text, created_at, updated_at",
         "FROM messages",
@@ -228,35 +297,44 @@ def get_messages(self: MockMessengerStore, *, token: str, chat_id: int | None, l
     query.append("ORDER BY created_at DESC LIMIT ?")
     params.append(limit)
 
-    with self._lock:
-        rows = self._conn.execute("\n".join(query), tuple(params)).fetchall()
-        message_ids = [int(row["message_id"]) for row in rows]
-        documents_map: dict[tuple[str, int], dict[str, Any]] = {}
-        if message_ids:
-            docs_query = [
-                "SELECT id, token, chat_id, message_id, filename, path, created_at",
-                "FROM documents",
-                "WHERE token = ?",
-            ]
-            docs_params: list[Any] = [token]
-            if chat_id is not None:
-                docs_query.append("AND chat_id = ?")
-                docs_params.append(str(chat_id))
-            placeholders = ", ".join("?" for _ in message_ids)
-            docs_query.append(f"AND message_id IN ({placeholders})")
-            docs_params.extend(message_ids)
-            docs_rows = self._conn.execute("\n".join(docs_query), tuple(docs_params)).fetchall()
-            for doc in docs_rows:
-                media_type = self._guess_media_type(doc["filename"])
-                documents_map[(str(doc["chat_id"]), int(doc["message_id"]))] = {
-                    "id": int(doc["id"]),
-                    "filename": doc["filename"],
-                    "media_type": media_type,
-                    "is_image": media_type.startswith("image/"),
-                    "is_html": media_type == "text/html",
-                    "created_at": int(doc["created_at"]),
-                }
-    rows = list(reversed(rows))
+    rows = self._conn.execute("\n".join(query), tuple(params)).fetchall()
+    message_ids = [int(row["message_id"]) for row in rows]
+    documents_map: dict[tuple[str, int], dict[str, Any]] = {}
+    if message_ids:
+        docs_query = [
+            "SELECT id, token, chat_id, message_id, filename, path, created_at",
+            "FROM documents",
+            "WHERE token = ?",
+        ]
+        docs_params: list[Any] = [token]
+        if chat_id is not None:
+            docs_query.append("AND chat_id = ?")
+            docs_params.append(str(chat_id))
+        placeholders = ", ".join("?" for _ in message_ids)
+        docs_query.append(f"AND message_id IN ({placeholders})")
+        docs_params.extend(message_ids)
+        docs_rows = self._conn.execute("\n".join(docs_query), tuple(docs_params)).fetchall()
+        # Download links are built here, once per document, rather than by a
+        # second pass over every message in the caller.
+        url_suffix = f"?token={token}"
+        for doc in docs_rows:
+            media_type = self._guess_media_type(doc["filename"])
+            document_id = int(doc["id"])
+            document = {
+                "id": document_id,
+                "filename": doc["filename"],
+                "media_type": media_type,
+                "is_image": media_type.startswith("image/"),
+                "is_html": media_type == "text/html",
+                "created_at": int(doc["created_at"]),
+            }
+            if document_url_prefix is not None:
+                document["url"] = f"{document_url_prefix}{document_id}{url_suffix}"
+            documents_map[(str(doc["chat_id"]), int(doc["message_id"]))] = document
+    return rows, documents_map
+
+
+def _format_messages(rows: list[Any], documents_map: dict[tuple[str, int], dict[str, Any]]) -> list[dict[str, Any]]:
     return [
         {
             "token": row["token"],
@@ -268,7 +346,7 @@ def get_messages(self: MockMessengerStore, *, token: str, chat_id: int | None, l
             "updated_at": int(row["updated_at"]),
             "document": documents_map.get((str(row["chat_id"]), int(row["message_id"]))),
         }
-        for row in rows
+        for row in reversed(rows)
     ]
 
 
@@ -307,6 +385,15 @@ def set_rate_limit_rule(self: MockMessengerStore, *, token: str, method: str, co
             (token, method, count, retry_after),
         )
         self._conn.commit()
+        if count > 0:
+            self._rate_limited_pairs.add((token, method))
+        else:
+            self._rate_limited_pairs.discard((token, method))
+
+
+def has_rate_limit_rule(self: MockMessengerStore, *, token: str, method: str) -> bool:
+    # Lock-free: a rule racing with its first request may let that one request through.
+    return (token, method) in self._rate_limited_pairs
 
 
 def consume_rate_limit(self: MockMessengerStore, *, token: str, method: str) -> int | None:
@@ -316,9 +403,12 @@ def consume_rate_limit(self: MockMessengerStore, *, token: str, method: str) ->
             (token, method),
         ).fetchone()
         if row is None:
+            self._rate_limited_pairs.discard((token, method))
             return None
         remaining = int(row["remaining"])
         retry_after = int(row["retry_after"])
+        if remaining <= 1:
+            self._rate_limited_pairs.discard((token, method))
         if remaining <= 0:
             return None
         self._conn.execute(
@@ -92,13 +92,14 @@ def enqueue_user_message(self: MockMessengerStore, *, token: str, chat_id: int,
         webhook_url = bot_row["webhook_url"]
         webhook_secret = bot_row["webhook_secret"]
         delivery_mode = "webhook" if webhook_url else "polling"
+        payload_json = json.dumps(payload, ensure_ascii=False)
 
         self._conn.execute(
             """
             INSERT INTO updates(token, update_id, chat_id, payload_json, delivery_mode, delivered, created_at)
             VALUES (?, ?, ?, ?, ?, 0, ?)
             """,
-            (token, update_id, chat_key, json.dumps(payload, ensure_ascii=False), delivery_mode, now_ms),
+            (token, update_id, chat_key, payload_json, delivery_mode, now_ms),
         )
         self._conn.commit()
 
@@ -107,6 +108,7 @@ def enqueue_user_message(self: MockMessengerStore, *, token: str, chat_id: int,
         "chat_id": chat_id,
         "update_id": update_id,
         "payload": payload,
+        "payload_json": payload_json,
         "delivery_mode": delivery_mode,
         "webhook_url": webhook_url,
         "webhook_secret": webhook_secret,
@@ -163,6 +165,12 @@ def mark_update_delivered(self: MockMessengerStore, *, token: str, update_id: in
 
 
 def get_recent_updates(self: MockMessengerStore, *, token: str, chat_id: int | None, limit: int) -> list[dict[str, Any]]:
+    with self._lock:
+        rows = _select_recent_updates_locked(self, token=token, chat_id=chat_id, limit=limit)
+    return _format_recent_updates(rows)
+
+
+def _select_recent_updates_locked(self: MockMessengerStore, *, token: str, chat_id: int | None, limit: int) -> list[Any]:
     query = [
         "SELECT update_id, chat_id, delivery_mode, delivered, created_at",
         "FROM updates",
@@ -174,10 +182,10 @@ def get_recent_updates(self: MockMessengerStore, *, token: str, chat_id: int | N
         params.append(str(chat_id))
     query.append("ORDER BY update_id DESC LIMIT ?")
     params.append(limit)
+    return self._conn.execute("\n".join(query), tuple(params)).fetchall()
 
-    with self._lock:
-        rows = self._conn.execute("\n".join(query), tuple(params)).fetchall()
-    rows = list(reversed(rows))
+
+def _format_recent_updates(rows: list[Any]) -> list[dict[str, Any]]:
     return [
         {
             "update_id": int(row["update_id"]),
@@ -186,5 +194,5 @@ def get_recent_updates(self: MockMessengerStore, *, token: str, chat_id: int | N
             "delivered": bool(row["delivered"]),
             "created_at": int(row["created_at"]),
         }
-        for row in rows
+        for row in reversed(rows)
     ]
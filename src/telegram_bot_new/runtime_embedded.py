@@ -21,6 +21,7 @@ from telegram_bot_new.settings import (
     BotConfig,
     GlobalSettings,
     resolve_bot_database_url,
+    resolve_read_database_url,
     resolve_telegram_api_base_url,
 )
 from telegram_bot_new.streaming.telegram_event_streamer import TelegramEventStreamer
@@ -60,7 +61,15 @@ def _resolve_worker_database_url(bot: BotConfig, global_settings: GlobalSettings
 async def run_embedded_bot(bot: BotConfig, global_settings: GlobalSettings, host: str, port: int) -> None:
     logging.basicConfig(level=getattr(logging, global_settings.log_level.upper(), logging.INFO))
 
-    repository = create_repository(resolve_bot_database_url(bot, global_settings))
+    database_url = resolve_bot_database_url(bot, global_settings)
+    repository = create_repository(
+        database_url,
+        read_database_url=resolve_read_database_url(database_url, global_settings),
+        metrics_cache_ttl_ms=global_settings.metrics_cache_ttl_ms,
+        metrics_flush_interval_ms=global_settings.metrics_flush_interval_ms,
+        pool_size=global_settings.db_pool_size,
+        max_overflow=global_settings.db_pool_max_overflow,
+    )
 
     async def _inc_metric(metric_key: str) -> None:
         try:
@@ -262,7 +271,15 @@ async def run_embedded_bot(bot: BotConfig, global_settings: GlobalSettings, host
 async def run_bot_workers_only(bot: BotConfig, global_settings: GlobalSettings) -> None:
     logging.basicConfig(level=getattr(logging, global_settings.log_level.upper(), logging.INFO))
 
-    repository = create_repository(_resolve_worker_database_url(bot, global_settings))
+    database_url = _resolve_worker_database_url(bot, global_settings)
+    repository = create_repository(
+        database_url,
+        read_database_url=resolve_read_database_url(database_url, global_settings),
+        metrics_cache_ttl_ms=global_settings.metrics_cache_ttl_ms,
+        metrics_flush_interval_ms=global_settings.metrics_flush_interval_ms,
+        pool_size=global_settings.db_pool_size,
+        max_overflow=global_settings.db_pool_max_overflow,
+    )
 
     async def _inc_metric(metric_key: str) -> None:
         try:
@@ -37,7 +37,14 @@ async def run_gateway_server(bots: list[BotConfig], global_settings: GlobalSetti
                 global_settings.database_url,
             )
 
-    repository = create_repository(global_settings.database_url)
+    repository = create_repository(
+        global_settings.database_url,
+        read_database_url=global_settings.database_read_url,
+        metrics_cache_ttl_ms=global_settings.metrics_cache_ttl_ms,
+        metrics_flush_interval_ms=global_settings.metrics_flush_interval_ms,
+        pool_size=global_settings.db_pool_size,
+        max_overflow=global_settings.db_pool_max_overflow,
+    )
     bot_map = {bot.bot_id: bot for bot in bots}
 
     async def _inc_metric(bot_id: str, metric_key: str) -> None:
@@ -1,9 +1,12 @@
 from __future__ import annotations
 
+import logging
 from typing import Optional
 
 from telegram_bot_new.db.repository import Repository
 
+LOGGER = logging.getLogger(__name__)
+
 
 class RunService:
     def __init__(self, repository: Repository) -> None:
@@ -61,7 +64,7 @@ class RunService:
         now: int,
         max_queue: int = 10,
     ) -> str:
-        return await self._repository.enqueue_deferred_button_action(
+        action_id = await self._repository.enqueue_deferred_button_action(
             bot_id=bot_id,
             chat_id=chat_id,
             session_id=session_id,
@@ -71,6 +74,17 @@ class RunService:
             max_queue=max_queue,
             now=now,
         )
+        # Promotion is otherwise only triggered when a run finishes. If that run
+        # finished between the caller's active-run check and this enqueue, nothing
+        # would wake the queue, so re-check once here; the promote guard is a
+        # cheap no-op while a run is still active. The action is already queued,
+        # so a failed re-check (e.g. racing the worker's own promotion on the
+        # active-run unique index) is logged and left to the next run's finish.
+        try:
+            await self._repository.promote_next_deferred_action(bot_id=bot_id, chat_id=chat_id, now=now)
+        except Exception:
+            LOGGER.exception("failed to promote deferred action bot=%s chat=%s", bot_id, chat_id)
+        return action_id
 
     async def promote_next_deferred_action(self, *, bot_id: str, chat_id: str, now: int) -> Optional[str]:
         promoted = await self._repository.promote_next_deferred_action(
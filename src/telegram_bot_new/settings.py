@@ -23,9 +23,14 @@ class GlobalSettings(BaseSettings):
     )
 
     database_url: str = Field(alias="DATABASE_URL")
+    database_read_url: str | None = Field(default=None, alias="DATABASE_READ_URL")
     log_level: str = Field(default="INFO", alias="LOG_LEVEL")
     job_lease_ms: int = Field(default=30000, ge=1000, alias="JOB_LEASE_MS")
     worker_poll_interval_ms: int = Field(default=250, ge=50, alias="WORKER_POLL_INTERVAL_MS")
+    metrics_cache_ttl_ms: int = Field(default=2000, ge=0, alias="METRICS_CACHE_TTL_MS")
+    metrics_flush_interval_ms: int = Field(default=1000, ge=0, alias="METRICS_FLUSH_INTERVAL_MS")
+    db_pool_size: int = Field(default=5, ge=1, alias="DB_POOL_SIZE")
+    db_pool_max_overflow: int = Field(default=10, ge=0, alias="DB_POOL_MAX_OVERFLOW")
     supervisor_restart_max_backoff_sec: int = Field(default=30, ge=1, alias="SUPERVISOR_RESTART_MAX_BACKOFF_SEC")
     telegram_api_base_url: str = Field(default="https://api.telegram.org", alias="TELEGRAM_API_BASE_URL")
     telegram_virtual_token: str = Field(default="mock_token_1", alias="TELEGRAM_VIRTUAL_TOKEN")
@@ -142,6 +147,13 @@ def resolve_bot_database_url(bot: BotConfig, global_settings: GlobalSettings) ->
     return bot.database_url or global_settings.database_url
 
 
+def resolve_read_database_url(database_url: str, global_settings: GlobalSettings) -> str | None:
+    # The read replica mirrors the global database only; per-bot databases have none.
+    if database_url != global_settings.database_url:
+        return None
+    return global_settings.database_read_url
+
+
 def resolve_telegram_api_base_url(bot: BotConfig, global_settings: GlobalSettings) -> str:
     candidate = (bot.telegram_api_base_url or "").strip()
     if candidate:
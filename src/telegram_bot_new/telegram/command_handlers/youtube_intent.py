@@ -3,6 +3,42 @@ from __future__ import annotations
 import re
 
 
+# Filler words stripped from a YouTube request to leave the search query. Longer
+# phrases come first so the alternation prefers them over their prefixes.
+_YOUTUBE_QUERY_NOISE_WORDS = (
+    "유튜브",
+    "유투브",
+    "유트브",
+    "유트뷰",
+    "동영상",
+    "영상",
+    "찾아줘",
+    "찾아 줘",
+    "찾아",
+    "검색해줘",
+    "검색해 줘",
+    "검색",
+    "추천해줘",
+    "추천해 줘",
+    "추천",
+    "보여줘",
+    "보여 줘",
+    "보여",
+    "미리보기",
+    "미리 보기",
+    "형식으로",
+    "형식",
+    "이런",
+    "같은",
+    "please",
+    "for me",
+)
+_YOUTUBE_QUERY_NOISE_RE = re.compile(
+    "|".join([r"\byoutube\b", *(re.escape(word) for word in _YOUTUBE_QUERY_NOISE_WORDS)]),
+    re.IGNORECASE,
+)
+
+
 async def _handle_youtube_search(self, *, chat_id: int, query: str) -> None:
     if self._youtube_search is None:
         return
@@ -50,37 +86,7 @@ def _parse_youtube_search_request(self, text: str) -> tuple[bool, str | None]:
     if not any(hint in lowered for hint in search_hints):
         return (False, None)
 
-    cleaned = text
-    for pattern in (
-        r"(?i)\byoutube\b",
-        "유튜브",
-        "유투브",
-        "유트브",
-        "유트뷰",
-        "동영상",
-        "영상",
-        "찾아줘",
-        "찾아 줘",
-        "찾아",
-        "검색해줘",
-        "검색해 줘",
-        "검색",
-        "추천해줘",
-        "추천해 줘",
-        "추천",
-        "보여줘",
-        "보여 줘",
-        "보여",
-        "미리보기",
-        "미리 보기",
-        "형식으로",
-        "형식",
-        "이런",
-        "같은",
-        "please",
-        "for me",
-    ):
-        cleaned = re.sub(pattern, " ", cleaned, flags=re.IGNORECASE)
-    cleaned = re.sub(r"\s+", " ", cleaned).strip(" .,!?\n\t")
+    cleaned = _YOUTUBE_QUERY_NOISE_RE.sub(" ", text)
+    cleaned = " ".join(cleaned.split()).strip(" .,!?")
     return (True, cleaned or None)
 
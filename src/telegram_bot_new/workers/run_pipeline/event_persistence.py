@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import json
 from dataclasses import dataclass
 from typing import Any
 
@@ -48,7 +47,7 @@ async def consume_adapter_stream(
             bot_id=bot_id,
             seq=event.seq,
             event_type=event.event_type,
-            payload_json=json.dumps({"ts": event.ts, "payload": event.payload}, ensure_ascii=False),
+            payload={"ts": event.ts, "payload": event.payload},
             now=now_ms_fn(),
         )
         try:
@@ -60,7 +59,7 @@ async def consume_adapter_stream(
                 bot_id=bot_id,
                 seq=seq,
                 event_type="delivery_error",
-                payload_json=json.dumps({"message": str(stream_error)}),
+                payload={"message": str(stream_error)},
                 now=now_ms_fn(),
             )
 
@@ -1,12 +1,15 @@
 ﻿from __future__ import annotations
 
 import asyncio
+import heapq
 import logging
 import os
 import re
 import tempfile
 import time
+from collections.abc import Iterator
 from contextlib import suppress
+from functools import lru_cache
 from pathlib import Path
 
 from telegram_bot_new.adapters import get_adapter
@@ -25,15 +28,17 @@ LOGGER = logging.getLogger(__name__)
 
 IMAGE_SUFFIXES = {".png", ".jpg", ".jpeg", ".gif", ".webp", ".bmp", ".svg"}
 HTML_SUFFIXES = {".html", ".htm"}
-SKIP_DIR_NAMES = {
-    ".git",
-    ".venv",
-    "venv",
-    "node_modules",
-    "__pycache__",
-    ".pytest_cache",
-    ".mypy_cache",
-}
+SKIP_DIR_NAMES = frozenset(
+    {
+        ".git",
+        ".venv",
+        "venv",
+        "node_modules",
+        "__pycache__",
+        ".pytest_cache",
+        ".mypy_cache",
+    }
+)
 RUN_TURN_TIMEOUT_SEC = max(15, int(os.getenv("RUN_TURN_TIMEOUT_SEC", "180")))
 RUN_WORKER_CONCURRENCY = max(1, int(os.getenv("RUN_WORKER_CONCURRENCY", "2")))
 
@@ -107,49 +112,54 @@ def _looks_like_watchdog_timeout_error(message: str | None) -> bool:
     )
 
 
-def _looks_like_image_request(prompt: str) -> bool:
-    text = (prompt or "").lower()
+IMAGE_REQUEST_KEYWORDS = (
+    "image",
+    "png",
+    "jpg",
+    "jpeg",
+    "gif",
+    "webp",
+    "photo",
+    "diagram",
+    "chart",
+    "plot",
+    "figure",
+    "draw",
+    "render",
+    "\uc774\ubbf8\uc9c0",
+    "\uc0ac\uc9c4",
+    "\uadf8\ub9bc",
+    "\ucc28\ud2b8",
+    "\uadf8\ub798\ud504",
+)
+HTML_REQUEST_KEYWORDS = (
+    "html",
+    "css",
+    "landing page",
+    "web page",
+    "webpage",
+    "site",
+    "\ub79c\ub529",
+    "\uc6f9\ud398\uc774\uc9c0",
+    "\ud398\uc774\uc9c0",
+)
+# One alternation per keyword list so each prompt is scanned once, not per keyword.
+_IMAGE_REQUEST_RE = re.compile("|".join(re.escape(keyword) for keyword in IMAGE_REQUEST_KEYWORDS))
+_HTML_REQUEST_RE = re.compile("|".join(re.escape(keyword) for keyword in HTML_REQUEST_KEYWORDS))
+
+
+def _looks_like_image_request(prompt: str, *, lowered: str | None = None) -> bool:
+    text = lowered if lowered is not None else (prompt or "").lower()
     if not text:
         return False
-    keywords = [
-        "image",
-        "png",
-        "jpg",
-        "jpeg",
-        "gif",
-        "webp",
-        "photo",
-        "diagram",
-        "chart",
-        "plot",
-        "figure",
-        "draw",
-        "render",
-        "\uc774\ubbf8\uc9c0",
-        "\uc0ac\uc9c4",
-        "\uadf8\ub9bc",
-        "\ucc28\ud2b8",
-        "\uadf8\ub798\ud504",
-    ]
-    return any(keyword in text for keyword in keywords)
-
-
-def _looks_like_html_request(prompt: str) -> bool:
-    text = (prompt or "").lower()
+    return _IMAGE_REQUEST_RE.search(text) is not None
+
+
+def _looks_like_html_request(prompt: str, *, lowered: str | None = None) -> bool:
+    text = lowered if lowered is not None else (prompt or "").lower()
     if not text:
         return False
-    keywords = [
-        "html",
-        "css",
-        "landing page",
-        "web page",
-        "webpage",
-        "site",
-        "\ub79c\ub529",
-        "\uc6f9\ud398\uc774\uc9c0",
-        "\ud398\uc774\uc9c0",
-    ]
-    return any(keyword in text for keyword in keywords)
+    return _HTML_REQUEST_RE.search(text) is not None
 
 
 def _safe_path_segment(value: str) -> str:
@@ -176,9 +186,10 @@ def _display_path_for_prompt(path: Path) -> str:
         return str(path.resolve())
 
 
-def _contains_explicit_artifact_contract(prompt: str) -> bool:
+def _contains_explicit_artifact_contract(prompt: str, *, lowered: str | None = None) -> bool:
     text = prompt or ""
-    lowered = text.lower()
+    if lowered is None:
+        lowered = text.lower()
     if not lowered:
         return False
     if "[산출물 경로 계약]" in text or "이번 코워크 결과 경로:" in text or "artifact route" in lowered:
@@ -240,9 +251,10 @@ def _contains_explicit_artifact_contract(prompt: str) -> bool:
 
 def _augment_prompt_for_generation_request(prompt: str, *, artifact_output_dir: Path | None = None) -> str:
     result = prompt
+    lowered = (prompt or "").lower()
     output_dir = artifact_output_dir.resolve() if artifact_output_dir is not None else None
     output_dir_text = _display_path_for_prompt(output_dir) if output_dir is not None else "./.mock_messenger/generated"
-    if _looks_like_image_request(prompt):
+    if _looks_like_image_request(prompt, lowered=lowered):
         result = (
             f"{result}\n\n[Image Delivery Contract]\n"
             "If you generate an image file, save it as a local file and include at least one markdown image path.\n"
@@ -251,7 +263,9 @@ def _augment_prompt_for_generation_request(prompt: str, *, artifact_output_dir:
             f"![generated]({output_dir_text}/<file>.png)\n"
             "Use a real existing path only."
         )
-    if _looks_like_html_request(prompt) and not _contains_explicit_artifact_contract(prompt):
+    if _looks_like_html_request(prompt, lowered=lowered) and not _contains_explicit_artifact_contract(
+        prompt, lowered=lowered
+    ):
         result = (
             f"{result}\n\n[HTML Delivery Contract]\n"
             "If you generate an HTML page, save it as a local file and include a markdown link to that exact file.\n"
@@ -265,28 +279,68 @@ def _augment_prompt_for_generation_request(prompt: str, *, artifact_output_dir:
     return result
 
 
+def _build_local_path_patterns(suffixes: frozenset[str]) -> tuple[re.Pattern[str], ...]:
+    suffix_pattern = "|".join(ext.lstrip(".") for ext in sorted(suffixes))
+    return (
+        re.compile(r"!\[[^\]]*\]\(([^)]+)\)"),
+        re.compile(r"\[[^\]]*\]\(([^)]+)\)"),
+        re.compile(rf"['\"]([^'\"]+\.(?:{suffix_pattern}))['\"]", re.IGNORECASE),
+        # A single separator plus one run matches exactly what the old nested
+        # (?:[./\\][^...]+)+ did, without its exponential backtracking.
+        re.compile(rf"((?:[A-Za-z]:)?[./\\][^\s'\"`<>|]+\.(?:{suffix_pattern}))", re.IGNORECASE),
+        re.compile(rf"\.(?:{suffix_pattern})", re.IGNORECASE),
+    )
+
+
+_PATH_RUN_RE = re.compile(r"[^\s'\"`<>|]+")
+
+
+def _find_bare_paths(text: str, bare_path_re: re.Pattern[str], suffix_re: re.Pattern[str]) -> list[str]:
+    # A bare path never crosses whitespace or quotes, and within one such run it
+    # can only end at the run's last ".<suffix>". Bounding each search there
+    # keeps long suffix-less runs from being rescanned from every offset.
+    found: list[str] = []
+    for run in _PATH_RUN_RE.finditer(text):
+        last_suffix = None
+        for last_suffix in suffix_re.finditer(text, run.start(), run.end()):
+            pass
+        if last_suffix is None:
+            continue
+        match = bare_path_re.search(text, run.start(), last_suffix.end())
+        if match is not None:
+            found.append(match.group(1))
+    return found
+
+
+_LOCAL_PATH_PATTERNS = {
+    frozenset(IMAGE_SUFFIXES): _build_local_path_patterns(frozenset(IMAGE_SUFFIXES)),
+    frozenset(HTML_SUFFIXES): _build_local_path_patterns(frozenset(HTML_SUFFIXES)),
+}
+
+
 def _extract_local_paths(text: str, *, suffixes: set[str]) -> list[Path]:
     if not text or not text.strip():
         return []
+    if "." not in text and "](" not in text:
+        # Only markdown links can yield a path without a dotted suffix in the text.
+        return []
 
-    suffix_pattern = "|".join(ext.lstrip(".") for ext in sorted(suffixes))
+    suffix_key = frozenset(suffixes)
+    patterns = _LOCAL_PATH_PATTERNS.get(suffix_key) or _build_local_path_patterns(suffix_key)
+    markdown_image_re, markdown_link_re, quoted_path_re, bare_path_re, suffix_re = patterns
     candidates: list[str] = []
-    candidates.extend(re.findall(r"!\[[^\]]*\]\(([^)]+)\)", text))
-    candidates.extend(re.findall(r"\[[^\]]*\]\(([^)]+)\)", text))
-    candidates.extend(
-        re.findall(
-            rf"['\"]([^'\"]+\.(?:{suffix_pattern}))['\"]",
-            text,
-            flags=re.IGNORECASE,
-        )
-    )
-    candidates.extend(
-        re.findall(
-            rf"((?:[A-Za-z]:)?(?:[./\\][^\s'\"`<>|]+)+\.(?:{suffix_pattern}))",
-            text,
-            flags=re.IGNORECASE,
-        )
-    )
+    # Cheap substring gates keep most streamed event text from being scanned at
+    # all; each pattern can only match when its literal anchor is present.
+    if "](" in text:
+        if "![" in text:
+            candidates.extend(markdown_image_re.findall(text))
+        candidates.extend(markdown_link_re.findall(text))
+    if "." in text:
+        lowered_text = text.lower()
+        if any(suffix in lowered_text for suffix in suffixes):
+            if "'" in text or '"' in text:
+                candidates.extend(quoted_path_re.findall(text))
+            candidates.extend(_find_bare_paths(text, bare_path_re, suffix_re))
 
     paths: list[Path] = []
     seen: set[str] = set()
@@ -313,6 +367,43 @@ def _extract_local_paths(text: str, *, suffixes: set[str]) -> list[Path]:
     return paths
 
 
+def _iter_files_with_suffix(root: str, suffixes: set[str]) -> Iterator[os.DirEntry[str]]:
+    # Same traversal as os.walk (top-down, no symlinked dirs, unreadable dirs
+    # skipped) but filters on DirEntry names so rejected files never become Paths.
+    suffix_tuple = tuple(suffixes)
+    pending = [root]
+    while pending:
+        directory = pending.pop()
+        matches: list[os.DirEntry[str]] = []
+        subdirs: list[str] = []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
+                    if is_dir:
+                        if entry.name not in SKIP_DIR_NAMES and not entry.is_symlink():
+                            subdirs.append(entry.path)
+                        continue
+                    # Path(".png").suffix is empty, so a bare suffix name is not a match.
+                    lowered = entry.name.lower()
+                    if lowered.endswith(suffix_tuple) and lowered not in suffixes:
+                        matches.append(entry)
+        except OSError:
+            continue
+        yield from matches
+        pending.extend(reversed(subdirs))
+
+
+@lru_cache(maxsize=32)
+def _resolve_scan_root(root: Path) -> Path:
+    # Scan roots (cwd, the temp dir, test roots) are absolute and stable, so each
+    # is resolved once per process; cwd itself is still read live on every call.
+    return root.resolve()
+
+
 def _find_recent_files(*, since_epoch: float, suffixes: set[str], limit: int = 3) -> list[Path]:
     return _find_recent_files_in_roots(
         since_epoch=since_epoch,
@@ -329,39 +420,33 @@ def _find_recent_files_in_roots(
     scan_roots: list[Path],
     limit: int = 3,
 ) -> list[Path]:
-    discovered: list[tuple[float, Path]] = []
+    discovered: list[tuple[float, str]] = []
     seen: set[str] = set()
     cutoff = since_epoch - 2.0
 
     for root in scan_roots:
         try:
-            resolved_root = root.resolve()
+            resolved_root = _resolve_scan_root(root.absolute())
         except Exception:
             continue
         if not resolved_root.exists() or not resolved_root.is_dir():
             continue
 
-        for dirpath, dirnames, filenames in os.walk(resolved_root):
-            dirnames[:] = [name for name in dirnames if name not in SKIP_DIR_NAMES]
-            for name in filenames:
-                suffix = Path(name).suffix.lower()
-                if suffix not in suffixes:
-                    continue
-                path = Path(dirpath) / name
-                key = str(path).lower()
-                if key in seen:
-                    continue
-                try:
-                    stat = path.stat()
-                except OSError:
-                    continue
-                if stat.st_size <= 0 or stat.st_mtime < cutoff:
-                    continue
-                seen.add(key)
-                discovered.append((stat.st_mtime, path.resolve()))
+        for entry in _iter_files_with_suffix(str(resolved_root), suffixes):
+            key = entry.path.lower()
+            if key in seen:
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            if stat.st_size <= 0 or stat.st_mtime < cutoff:
+                continue
+            seen.add(key)
+            discovered.append((stat.st_mtime, entry.path))
 
-    discovered.sort(key=lambda item: item[0], reverse=True)
-    return [path for _, path in discovered[: max(1, limit)]]
+    newest = heapq.nlargest(max(1, limit), discovered, key=lambda item: item[0])
+    return [Path(path).resolve() for _, path in newest]
 
 
 def _artifact_dedupe_key(path: Path) -> str:
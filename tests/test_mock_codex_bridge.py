@@ -1,10 +1,19 @@
 from __future__ import annotations
 
+import os
+import queue
+import subprocess
+import sys
+import time
 from pathlib import Path
 
+import pytest
+
 from telegram_bot_new.adapters.base import AdapterEvent
 from telegram_bot_new.mock_messenger.codex_bridge import (
     MAX_MESSAGE_LEN,
+    LiveMessageBuffer,
+    _PipeLineSelector,
     _augment_prompt_for_generation_request,
     _build_codex_command,
     _extract_local_html_paths,
@@ -120,6 +129,17 @@ def test_extract_local_html_paths_from_markdown(tmp_path: Path, monkeypatch) ->
     assert paths[0].name == "landing.html"
 
 
+def test_extract_local_image_paths_handles_long_separator_runs(tmp_path: Path, monkeypatch) -> None:
+    image = tmp_path / "result.png"
+    image.write_bytes(b"\x89PNG\r\n\x1a\n")
+    monkeypatch.chdir(tmp_path)
+
+    # Runs like this used to send the nested bare-path pattern into exponential backtracking.
+    noisy = "./" * 20000
+    assert _extract_local_image_paths(f"{noisy} saved ./result.png {noisy}.png") == [image.resolve()]
+    assert _extract_local_image_paths(f"./result.png{noisy}") == [image.resolve()]
+
+
 def test_looks_like_image_request_korean_phrase() -> None:
     assert _looks_like_image_request("꽃 이미지 만들고 현재 이미지 창에 보여줘")
 
@@ -176,6 +196,101 @@ def test_parse_youtube_search_request_with_common_typo_and_preview_phrase() -> N
     assert query == "\ubc31\uc885\uc6d0"
 
 
+def test_live_message_buffer_coalesces_edits_until_flush(monkeypatch) -> None:
+    calls: list[tuple[str, str]] = []
+
+    def fake_send_message(client, base_url, token, chat_id, text) -> int:
+        calls.append(("send", text))
+        return len(calls)
+
+    def fake_edit_message(client, base_url, token, chat_id, message_id, text) -> None:
+        calls.append(("edit", text))
+
+    monkeypatch.setattr("telegram_bot_new.mock_messenger.codex_bridge._send_message", fake_send_message)
+    monkeypatch.setattr("telegram_bot_new.mock_messenger.codex_bridge._edit_message", fake_edit_message)
+
+    live = LiveMessageBuffer(client=None, base_url="http://mock", token="t", chat_id=1, flush_interval_sec=60.0)
+    for index in range(20):
+        live.append_line(f"line {index}")
+    assert calls == [("send", "line 0")]
+
+    live.flush(force=True)
+    live.flush(force=True)
+    assert calls[1:] == [("edit", "\n".join(f"line {index}" for index in range(20)))]
+
+    live.append_line("x" * (MAX_MESSAGE_LEN - 10))
+    assert calls[-1][0] == "send"
+    assert calls[-1][1].startswith("[continued]\n")
+
+
 def test_codex_bridge_default_sandbox_is_workspace_write() -> None:
     args = build_parser().parse_args([])
     assert args.sandbox == "workspace-write"
+
+
+# Each write is flushed and followed by a pause so it lands in its own os.read.
+# stderr is closed early so its unterminated last line and EOF arrive before
+# stdout's.
+_PIPE_WRITER_SCRIPT = r"""
+import os, sys, time
+out, err = sys.stdout.buffer, sys.stderr.buffer
+time.sleep(0.3)
+for stream, chunk in [
+    (out, b"hel"), (out, b"lo\n"),
+    (err, b"warn\r\n"),
+    (out, b"one\r"), (out, b"\ntwo\rthree\n"),
+    (out, b"caf\xc3"), (out, b"\xa9\n"),
+    (err, b"done"),
+    (None, b""),
+    (out, b"tail"),
+]:
+    if stream is None:
+        os.close(2)
+    else:
+        stream.write(chunk)
+        stream.flush()
+    time.sleep(0.1)
+"""
+
+
+@pytest.mark.skipif(os.name == "nt", reason="selectors cannot poll pipes on Windows")
+def test_pipe_line_selector_reads_subprocess_lines() -> None:
+    process = subprocess.Popen(
+        [sys.executable, "-c", _PIPE_WRITER_SCRIPT],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    selector = _PipeLineSelector({"stdout": process.stdout, "stderr": process.stderr})
+    try:
+        with pytest.raises(queue.Empty):
+            selector.get(timeout=0.01)
+
+        # A read that ends mid-line yields nothing yet, so get() may raise
+        # queue.Empty before its timeout; keep polling like the stream loop does.
+        received: list[tuple[str, str | None]] = []
+        deadline = time.monotonic() + 10.0
+        while sum(line is None for _, line in received) < 2:
+            assert time.monotonic() < deadline, received
+            try:
+                received.append(selector.get(timeout=0.2))
+            except queue.Empty:
+                continue
+        assert selector.empty()
+        with pytest.raises(queue.Empty):
+            selector.get(timeout=0.01)
+    finally:
+        selector.close()
+        process.wait(timeout=5)
+
+    assert received[:-1] == [
+        ("stdout", "hello"),
+        ("stderr", "warn"),
+        ("stdout", "one"),
+        ("stdout", "two"),
+        ("stdout", "three"),
+        ("stdout", "caf\u00e9"),
+        ("stderr", "done"),
+        ("stderr", None),
+        ("stdout", "tail"),
+    ]
+    assert received[-1] == ("stdout", None)
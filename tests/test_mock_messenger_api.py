@@ -2,11 +2,15 @@ from __future__ import annotations
 
 from pathlib import Path
 
+import httpx
 import pytest
+from fastapi import FastAPI
 from fastapi.testclient import TestClient
 import yaml
 
+from telegram_bot_new.mock_messenger import bot_catalog
 from telegram_bot_new.mock_messenger.api import create_app
+from telegram_bot_new.mock_messenger.routes.ui import register_ui_routes
 from telegram_bot_new.mock_messenger.store import MockMessengerStore
 from telegram_bot_new.settings import get_global_settings
 
@@ -65,6 +69,7 @@ def test_telegram_api_contract_endpoints(mock_client: TestClient) -> None:
     doc_payload = send_document.json()
     assert doc_payload["ok"] is True
     assert doc_payload["result"]["document"]["file_name"] == "readme.txt"
+    assert doc_payload["result"]["document"]["file_size"] == 5
 
     send_photo = mock_client.post(
         f"/bot{token}/sendPhoto",
@@ -81,6 +86,90 @@ def test_telegram_api_contract_endpoints(mock_client: TestClient) -> None:
     assert delete_webhook.json()["ok"] is True
 
 
+def test_telegram_payload_validation_errors_keep_bad_request_shape(mock_client: TestClient) -> None:
+    token = "token-v"
+    cases = [
+        ("setWebhook", {"url": "   "}, "Bad Request: url is required"),
+        ("setWebhook", {"url": "http://x", "secret_token": 7}, "Bad Request: secret_token must be string"),
+        ("sendMessage", {"text": "hi"}, "Bad Request: chat_id is required"),
+        ("sendMessage", {"chat_id": "abc", "text": "hi"}, "Bad Request: chat_id is required"),
+        ("sendMessage", {"chat_id": "12.0", "text": "hi"}, "Bad Request: chat_id is required"),
+        ("sendMessage", {"chat_id": "1_000", "text": "hi"}, "Bad Request: chat_id is required"),
+        ("sendMessage", {"chat_id": 12.0, "text": "hi"}, "Bad Request: chat_id is required"),
+        ("sendMessage", {"chat_id": 1001}, "Bad Request: text is required"),
+        ("editMessageText", {"chat_id": 1001, "message_id": "5", "text": "x"}, "Bad Request: message_id is required"),
+        ("answerCallbackQuery", {"callback_query_id": ""}, "Bad Request: callback_query_id is required"),
+        ("answerCallbackQuery", {"callback_query_id": "cb", "text": 1}, "Bad Request: text must be string"),
+    ]
+    for method, payload, description in cases:
+        response = mock_client.post(f"/bot{token}/{method}", json=payload)
+        assert response.status_code == 400, (method, payload)
+        body = response.json()
+        assert body["ok"] is False
+        assert body["error_code"] == 400
+        assert body["description"] == description
+
+    for bad_chat_id in ("abc", "12.0", "1_000"):
+        bad_form = mock_client.post(
+            f"/bot{token}/sendDocument",
+            data={"chat_id": bad_chat_id},
+            files={"document": ("a.txt", b"a", "text/plain")},
+        )
+        assert bad_form.status_code == 400, bad_chat_id
+        assert bad_form.json()["error_code"] == 400
+        assert bad_form.json()["description"] == "Bad Request: chat_id is required"
+
+    garbled = mock_client.post(
+        f"/bot{token}/sendMessage",
+        content=b"{not json",
+        headers={"Content-Type": "application/json"},
+    )
+    assert garbled.status_code == 400
+    assert garbled.json()["description"] == "Bad Request: can't parse JSON object"
+
+    accepted = mock_client.post(f"/bot{token}/sendMessage", json={"chat_id": "1001", "text": "hi"})
+    assert accepted.status_code == 200
+    assert accepted.json()["result"]["chat"]["id"] == 1001
+
+    for flag in (None, "yes", 0):
+        lenient = mock_client.post(f"/bot{token}/deleteWebhook", json={"drop_pending_updates": flag})
+        assert lenient.status_code == 200, flag
+
+
+def test_ui_assets_served_with_etag_revalidation(mock_client: TestClient) -> None:
+    first = mock_client.get("/_mock/ui/app.js")
+    assert first.status_code == 200
+    assert first.headers["content-type"].startswith("application/javascript")
+    etag = first.headers["etag"]
+    assert first.content
+
+    revalidated = mock_client.get("/_mock/ui/app.js", headers={"If-None-Match": etag})
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+    assert revalidated.headers["etag"] == etag
+
+
+def test_ui_assets_pick_up_rebuilt_files(tmp_path: Path) -> None:
+    asset = tmp_path / "app.js"
+    asset.write_text("console.log('v1');", encoding="utf-8")
+    app = FastAPI()
+    register_ui_routes(app, web_file=lambda name: str(tmp_path / name))
+
+    with TestClient(app) as client:
+        first = client.get("/_mock/ui/app.js")
+        assert first.text == "console.log('v1');"
+
+        asset.write_text("console.log('rebuilt v2');", encoding="utf-8")
+        rebuilt = client.get("/_mock/ui/app.js", headers={"If-None-Match": first.headers["etag"]})
+        assert rebuilt.status_code == 200
+        assert rebuilt.text == "console.log('rebuilt v2');"
+        assert rebuilt.headers["etag"] != first.headers["etag"]
+
+        asset.unlink()
+        missing = client.get("/_mock/ui/app.js")
+        assert missing.status_code == 404
+
+
 def test_rate_limit_429_emulation(mock_client: TestClient) -> None:
     token = "token-b"
 
@@ -102,6 +191,29 @@ def test_rate_limit_429_emulation(mock_client: TestClient) -> None:
     assert second.status_code == 200
     assert second.json()["ok"] is True
 
+    invalid = mock_client.post(
+        "/_mock/rate_limit",
+        json={"token": token, "method": "getUpdates", "count": 0},
+    )
+    assert invalid.status_code == 422
+    assert invalid.json()["detail"][0]["loc"] == ["body", "count"]
+
+
+def test_rate_limit_rule_fast_path_tracks_armed_rules(tmp_path: Path) -> None:
+    store = MockMessengerStore(db_path=str(tmp_path / "rate.db"), data_dir=str(tmp_path / "rate-data"))
+    assert store.has_rate_limit_rule(token="token-r", method="sendMessage") is False
+
+    store.set_rate_limit_rule(token="token-r", method="sendMessage", count=1, retry_after=3)
+    assert store.has_rate_limit_rule(token="token-r", method="sendMessage") is True
+    store.close()
+
+    reopened = MockMessengerStore(db_path=str(tmp_path / "rate.db"), data_dir=str(tmp_path / "rate-data"))
+    assert reopened.has_rate_limit_rule(token="token-r", method="sendMessage") is True
+    assert reopened.consume_rate_limit(token="token-r", method="sendMessage") == 3
+    assert reopened.has_rate_limit_rule(token="token-r", method="sendMessage") is False
+    assert reopened.consume_rate_limit(token="token-r", method="sendMessage") is None
+    reopened.close()
+
 
 def test_document_metadata_and_download_endpoint(mock_client: TestClient) -> None:
     token = "token-doc"
@@ -151,6 +263,61 @@ def test_document_metadata_and_download_endpoint(mock_client: TestClient) -> Non
     assert "text/html" in (html_download.headers.get("content-type") or "")
 
 
+def test_document_download_honours_byte_ranges(mock_client: TestClient) -> None:
+    token = "token-range"
+    body = b"0123456789abcdef"
+    send_document = mock_client.post(
+        f"/bot{token}/sendDocument",
+        data={"chat_id": "404"},
+        files={"document": ("clip.bin", body, "application/octet-stream")},
+    )
+    assert send_document.status_code == 200
+    timeline = mock_client.get(f"/_mock/messages?token={token}&chat_id=404&limit=10")
+    url = timeline.json()["result"]["messages"][0]["document"]["url"]
+
+    full = mock_client.get(url)
+    assert full.status_code == 200
+    assert full.headers["accept-ranges"] == "bytes"
+
+    partial = mock_client.get(url, headers={"Range": "bytes=4-7"})
+    assert partial.status_code == 206
+    assert partial.content == b"4567"
+    assert partial.headers["content-range"] == f"bytes 4-7/{len(body)}"
+
+    unsatisfiable = mock_client.get(url, headers={"Range": "bytes=100-200"})
+    assert unsatisfiable.status_code == 416
+
+
+def test_timeline_polls_revalidate_with_etag(mock_client: TestClient) -> None:
+    token = "token-etag"
+    first = mock_client.get(f"/_mock/messages?token={token}&chat_id=505")
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+
+    unchanged = mock_client.get(f"/_mock/messages?token={token}&chat_id=505", headers={"If-None-Match": etag})
+    assert unchanged.status_code == 304
+    assert unchanged.content == b""
+
+    reordered = mock_client.get(f"/_mock/messages?chat_id=505&token={token}", headers={"If-None-Match": etag})
+    assert reordered.status_code == 304
+
+    # Tags are per representation: another chat or route never revalidates.
+    other_chat = mock_client.get(f"/_mock/messages?token={token}&chat_id=506", headers={"If-None-Match": etag})
+    assert other_chat.status_code == 200
+    assert other_chat.headers["etag"] != etag
+    threads = mock_client.get(f"/_mock/threads?token={token}", headers={"If-None-Match": etag})
+    assert threads.status_code == 200
+    assert threads.headers["etag"] not in {etag, other_chat.headers["etag"]}
+
+    sent = mock_client.post(f"/bot{token}/sendMessage", json={"chat_id": 505, "text": "fresh"})
+    assert sent.status_code == 200
+
+    changed = mock_client.get(f"/_mock/messages?token={token}&chat_id=505", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert [row["text"] for row in changed.json()["result"]["messages"]] == ["fresh"]
+
+
 def test_clear_timeline_messages_endpoint(mock_client: TestClient) -> None:
     token = "token-clear"
     chat_id = 303
@@ -313,6 +480,54 @@ def test_mock_bot_catalog_endpoint_returns_empty_on_missing_config(tmp_path: Pat
     store.close()
 
 
+def test_build_bot_catalog_reuses_rows_until_config_changes(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    bots_yaml = tmp_path / "bots.yaml"
+    _write_bots_yaml(bots_yaml)
+    calls = {"count": 0}
+    original_load = bot_catalog.load_bots_config
+
+    def counting_load(*args, **kwargs):
+        calls["count"] += 1
+        return original_load(*args, **kwargs)
+
+    monkeypatch.setattr(bot_catalog, "load_bots_config", counting_load)
+    kwargs = {"bots_config_path": bots_yaml, "embedded_host": "127.0.0.1", "embedded_base_port": 8600}
+
+    first = bot_catalog.build_bot_catalog(**kwargs)
+    second = bot_catalog.build_bot_catalog(**kwargs)
+    by_bot_id = bot_catalog.build_bot_catalog_index(**kwargs)
+    assert calls["count"] == 1
+    assert second == first
+    assert by_bot_id["bot-b"] == first[1]
+    assert by_bot_id.get("bot-x") is None
+    assert bot_catalog.get_bot_catalog_row(**kwargs, bot_id="bot-b") is by_bot_id["bot-b"]
+    assert bot_catalog.get_bot_catalog_row(**kwargs, bot_id="bot-x") is None
+    rows, index = bot_catalog.load_bot_catalog(**kwargs)
+    assert rows == first
+    assert index["bot-a"] is rows[0]
+    assert calls["count"] == 1
+
+    assert bot_catalog.set_bot_name(bots_config_path=bots_yaml, bot_id="bot-a", name="Renamed A") is True
+    third = bot_catalog.build_bot_catalog(**kwargs)
+    assert calls["count"] == 2
+    assert third[0]["name"] == "Renamed A"
+
+
+async def test_fetch_embedded_runtime_treats_metrics_as_optional() -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/healthz":
+            return httpx.Response(200, json={"ok": True})
+        return httpx.Response(503)
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        health, metrics = await bot_catalog.fetch_embedded_runtime("http://bot.local", client=client)
+
+    assert health["bot"]["ok"] is True
+    assert health["bot"]["status_code"] == 200
+    assert isinstance(health["bot"]["latency_ms"], int)
+    assert metrics is None
+
+
 def test_mock_bot_diagnostics_endpoint_with_bot_down(tmp_path: Path) -> None:
     store = MockMessengerStore(
         db_path=str(tmp_path / "diagnostics.db"),
@@ -3,6 +3,7 @@ from __future__ import annotations
 from telegram_bot_new.mock_messenger.bot_catalog import (
     classify_last_error_tag,
     compact_threads,
+    infer_run_state_from_messages,
     infer_session_view_from_messages,
 )
 
@@ -83,6 +84,20 @@ def test_classify_last_error_tag_ignores_stale_timeout_path_strings() -> None:
     assert classify_last_error_tag(messages) == "unknown"
 
 
+def test_infer_run_state_from_messages_combines_status_and_error_tag() -> None:
+    messages = [
+        {"message_id": 1, "direction": "bot", "text": "[1][12:00:00][error] provider=gemini executable not found"},
+        {"message_id": 2, "direction": "bot", "text": "[2][12:00:01][reasoning] thinking"},
+    ]
+    assert infer_run_state_from_messages(messages) == ("running", "binary_missing")
+
+    buried = [
+        {"message_id": 1, "direction": "bot", "text": "[1][12:00:00][error] request timed out"},
+        {"message_id": 2, "direction": "bot", "text": "\n".join(f"log line {i}" for i in range(600))},
+    ]
+    assert infer_run_state_from_messages(buried) == ("idle", "unknown")
+
+
 def test_compact_threads_puts_selected_chat_first() -> None:
     rows = [
         {"chat_id": 3003, "message_count": 1, "webhook_enabled": False, "last_updated_at": 10},
@@ -1,7 +1,11 @@
 from __future__ import annotations
 
+import asyncio
+import json
+import time
 from pathlib import Path
 
+import httpx
 import pytest
 from fastapi.testclient import TestClient
 
@@ -13,8 +17,8 @@ from telegram_bot_new.mock_messenger.store import MockMessengerStore
 def test_webhook_delivery_includes_secret_and_marks_delivered(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
     calls: list[dict] = []
 
-    async def fake_post_webhook_update(*, url: str, secret_token: str | None, payload: dict):
-        calls.append({"url": url, "secret_token": secret_token, "payload": payload})
+    async def fake_post_webhook_update(*, client: httpx.AsyncClient, url: str, secret_token: str | None, body: bytes):
+        calls.append({"client": client, "url": url, "secret_token": secret_token, "payload": json.loads(body)})
         return True, None
 
     monkeypatch.setattr(mock_api, "_post_webhook_update", fake_post_webhook_update)
@@ -43,6 +47,7 @@ def test_webhook_delivery_includes_secret_and_marks_delivered(tmp_path: Path, mo
         assert result["delivered_via_webhook"] is True
 
         assert len(calls) == 1
+        assert calls[0]["client"] is app.state.webhook_client
         assert calls[0]["url"] == "http://127.0.0.1:9999/hook"
         assert calls[0]["secret_token"] == "hook-secret"
         assert calls[0]["payload"]["message"]["text"] == "webhook ping"
@@ -56,7 +61,7 @@ def test_webhook_delivery_includes_secret_and_marks_delivered(tmp_path: Path, mo
 
 
 def test_webhook_failure_can_be_observed_with_debug_flag(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
-    async def fake_post_webhook_update(*, url: str, secret_token: str | None, payload: dict):
+    async def fake_post_webhook_update(*, client: httpx.AsyncClient, url: str, secret_token: str | None, body: bytes):
         return False, "forced webhook failure"
 
     monkeypatch.setattr(mock_api, "_post_webhook_update", fake_post_webhook_update)
@@ -87,3 +92,87 @@ def test_webhook_failure_can_be_observed_with_debug_flag(tmp_path: Path, monkeyp
         assert result[0]["message"]["text"] == "debug path"
 
     store.close()
+
+
+def test_webhook_delivery_runs_in_background_workers(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    calls: list[dict] = []
+
+    async def fake_post_webhook_update(*, client: httpx.AsyncClient, url: str, secret_token: str | None, body: bytes):
+        payload = json.loads(body)
+        # Later updates finish first unless delivery is serialised per token.
+        await asyncio.sleep(0.05 if payload["message"]["text"] == "background 0" else 0)
+        calls.append({"url": url, "payload": payload})
+        return True, None
+
+    monkeypatch.setattr(mock_api, "_post_webhook_update", fake_post_webhook_update)
+
+    store = MockMessengerStore(
+        db_path=str(tmp_path / "webhook-bg.db"),
+        data_dir=str(tmp_path / "webhook-bg-data"),
+    )
+    app = create_app(store=store, allow_get_updates_with_webhook=False, webhook_delivery_workers=2)
+
+    with TestClient(app) as client:
+        token = "token-bg"
+        client.post(
+            f"/bot{token}/setWebhook",
+            json={"url": "http://127.0.0.1:9999/hook", "secret_token": "bg-secret"},
+        )
+        for index in range(3):
+            send = client.post(
+                "/_mock/send",
+                json={"token": token, "chat_id": 1004, "user_id": 9005, "text": f"background {index}"},
+            )
+            assert send.status_code == 200
+            result = send.json()["result"]
+            assert result["delivery_mode"] == "webhook"
+            assert result["delivered_via_webhook"] is None
+
+        deadline = time.monotonic() + 2.0
+        delivered = False
+        while time.monotonic() < deadline and not delivered:
+            updates = client.get(f"/_mock/messages?token={token}&chat_id=1004").json()["result"]["updates"]
+            delivered = len(updates) == 3 and all(update["delivered"] is True for update in updates)
+            if not delivered:
+                time.sleep(0.02)
+        assert delivered is True
+        assert [call["payload"]["message"]["text"] for call in calls] == [
+            "background 0",
+            "background 1",
+            "background 2",
+        ]
+
+    store.close()
+
+
+def test_background_webhook_failure_is_recorded(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    async def fake_post_webhook_update(*, client: httpx.AsyncClient, url: str, secret_token: str | None, body: bytes):
+        return False, "HTTP 502: bad gateway"
+
+    monkeypatch.setattr(mock_api, "_post_webhook_update", fake_post_webhook_update)
+
+    store = MockMessengerStore(
+        db_path=str(tmp_path / "webhook-bg-fail.db"),
+        data_dir=str(tmp_path / "webhook-bg-fail-data"),
+    )
+    app = create_app(store=store, allow_get_updates_with_webhook=False, webhook_delivery_workers=1)
+
+    with TestClient(app) as client:
+        token = "token-bg-fail"
+        client.post(f"/bot{token}/setWebhook", json={"url": "http://127.0.0.1:9999/hook"})
+        send = client.post(
+            "/_mock/send",
+            json={"token": token, "chat_id": 1005, "user_id": 9006, "text": "will fail"},
+        )
+        update_id = send.json()["result"]["update_id"]
+
+        deadline = time.monotonic() + 2.0
+        errors: dict = {}
+        while time.monotonic() < deadline and not errors:
+            errors = client.get(f"/_mock/state?token={token}").json()["result"]["webhook_delivery_errors"]
+            if not errors:
+                time.sleep(0.02)
+        assert errors[token]["update_id"] == update_id
+        assert errors[token]["webhook_error"] == "HTTP 502: bad gateway"
+
+    store.close()
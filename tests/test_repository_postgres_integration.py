@@ -178,7 +178,7 @@ async def test_postgres_deferred_action_promotion_and_cli_events() -> None:
             bot_id=bot_id,
             seq=1,
             event_type="assistant_message",
-            payload_json='{"text":"ok"}',
+            payload={"text": "ok"},
             now=now + 10,
         )
         await repo.complete_run_job_and_turn(
@@ -5,6 +5,7 @@ from pathlib import Path
 import pytest
 
 from telegram_bot_new.db.repository import create_repository
+from telegram_bot_new.services.run_service import RunService
 
 
 @pytest.mark.asyncio
@@ -145,7 +146,7 @@ async def test_sqlite_append_cli_event_assigns_id_when_schema_lacks_autoincremen
             bot_id="bot-sqlite",
             seq=1,
             event_type="assistant_message",
-            payload_json='{"text":"ok"}',
+            payload={"text": "ok"},
             now=now + 3,
         )
     finally:
@@ -243,3 +244,273 @@ async def test_set_session_adapter_can_promote_reset_session_without_unique_conf
         assert demoted.status == "reset"
     finally:
         await repo.dispose()
+
+
+@pytest.mark.asyncio
+async def test_is_turn_cancelled_cache_is_invalidated_by_cancel(tmp_path: Path) -> None:
+    db_path = tmp_path / "sqlite-cancel-cache.db"
+    repo = create_repository(f"sqlite+aiosqlite:///{db_path}")
+    now = 1_700_000_050_000
+
+    try:
+        await repo.create_schema()
+        session = await repo.get_or_create_active_session(
+            bot_id="bot-sqlite",
+            chat_id="1001",
+            adapter_name="gemini",
+            adapter_model="gemini-2.5-pro",
+            now=now,
+        )
+        turn_id = await repo.create_turn_and_job(
+            session_id=session.session_id,
+            bot_id="bot-sqlite",
+            chat_id="1001",
+            user_text="hello",
+            available_at=now + 1,
+        )
+
+        assert await repo.is_turn_cancelled(turn_id=turn_id) is False
+        assert turn_id in repo._cancel_cache
+
+        cancelled_turn_id = await repo.cancel_active_turn(bot_id="bot-sqlite", chat_id="1001", now=now + 2)
+        assert cancelled_turn_id == turn_id
+        assert await repo.is_turn_cancelled(turn_id=turn_id) is True
+    finally:
+        await repo.dispose()
+
+
+@pytest.mark.asyncio
+async def test_consume_action_token_is_single_use(tmp_path: Path) -> None:
+    db_path = tmp_path / "sqlite-action-token.db"
+    repo = create_repository(f"sqlite+aiosqlite:///{db_path}")
+    now = 1_700_000_060_000
+
+    try:
+        await repo.create_schema()
+        await repo.create_action_token(
+            token="tok-1",
+            bot_id="bot-sqlite",
+            chat_id="1001",
+            action="retry",
+            payload_json='{"action_type":"retry"}',
+            expires_at=now + 60_000,
+            now=now,
+        )
+
+        consumed = await repo.consume_action_token(token="tok-1", bot_id="bot-sqlite", chat_id="1001", now=now + 1)
+        assert consumed is not None
+        assert consumed.action == "retry"
+        assert consumed.payload_json == '{"action_type":"retry"}'
+        assert consumed.consumed_at == now + 1
+
+        again = await repo.consume_action_token(token="tok-1", bot_id="bot-sqlite", chat_id="1001", now=now + 2)
+        assert again is None
+    finally:
+        await repo.dispose()
+
+
+@pytest.mark.asyncio
+async def test_insert_telegram_update_ignores_duplicates(tmp_path: Path) -> None:
+    db_path = tmp_path / "sqlite-duplicate-update.db"
+    repo = create_repository(f"sqlite+aiosqlite:///{db_path}")
+    now = 1_700_000_070_000
+
+    try:
+        await repo.create_schema()
+        first = await repo.insert_telegram_update(
+            bot_id="bot-sqlite",
+            update_id=200,
+            chat_id="1001",
+            payload_json="{}",
+            received_at=now,
+        )
+        duplicate = await repo.insert_telegram_update(
+            bot_id="bot-sqlite",
+            update_id=200,
+            chat_id="1001",
+            payload_json="{}",
+            received_at=now + 1,
+        )
+        assert first is True
+        assert duplicate is False
+
+        await repo.enqueue_telegram_update_job(bot_id="bot-sqlite", update_id=200, available_at=now)
+        await repo.enqueue_telegram_update_job(bot_id="bot-sqlite", update_id=200, available_at=now + 1)
+        metrics = await repo.get_metrics(bot_id="bot-sqlite")
+        assert metrics["telegram_update_jobs"] == 1
+    finally:
+        await repo.dispose()
+
+
+@pytest.mark.asyncio
+async def test_get_metrics_cache_serves_until_runtime_metric_write(tmp_path: Path) -> None:
+    db_path = tmp_path / "sqlite-metrics-cache.db"
+    repo = create_repository(f"sqlite+aiosqlite:///{db_path}", metrics_cache_ttl_ms=60_000)
+    now = 1_700_000_080_000
+
+    try:
+        await repo.create_schema()
+        first = await repo.get_metrics(bot_id="bot-sqlite")
+        await repo.enqueue_telegram_update_job(bot_id="bot-sqlite", update_id=300, available_at=now)
+        cached = await repo.get_metrics(bot_id="bot-sqlite")
+        assert cached is first
+        assert cached["telegram_update_jobs"] == 0
+
+        await repo.increment_runtime_metric(bot_id="bot-sqlite", metric_key="demo_total", now=now)
+        refreshed = await repo.get_metrics(bot_id="bot-sqlite")
+        assert refreshed["telegram_update_jobs"] == 1
+        assert refreshed["runtime_counters"] == {"demo_total": 1}
+    finally:
+        await repo.dispose()
+
+
+@pytest.mark.asyncio
+async def test_runtime_metric_increments_are_coalesced_and_flushed(tmp_path: Path) -> None:
+    db_path = tmp_path / "sqlite-metrics-buffer.db"
+    repo = create_repository(f"sqlite+aiosqlite:///{db_path}", metrics_flush_interval_ms=60_000)
+    now = 1_700_000_090_000
+
+    try:
+        await repo.create_schema()
+        await repo.increment_runtime_metric(bot_id="bot-sqlite", metric_key="demo_total", now=now)
+        await repo.increment_runtime_metric(bot_id="bot-sqlite", metric_key="demo_total", now=now + 1, delta=2)
+        assert repo._pending_counters == {("bot-sqlite", "demo_total"): (3, now + 1)}
+
+        metrics = await repo.get_metrics(bot_id="bot-sqlite")
+        assert metrics["runtime_counters"] == {"demo_total": 3}
+        assert repo._pending_counters == {("bot-sqlite", "demo_total"): (3, now + 1)}
+
+        await repo.flush_runtime_metrics()
+        assert repo._pending_counters == {}
+        metrics = await repo.get_metrics(bot_id="bot-sqlite")
+        assert metrics["runtime_counters"] == {"demo_total": 3}
+
+        await repo.increment_runtime_metric(bot_id="bot-sqlite", metric_key="demo_total", now=now + 2)
+    finally:
+        await repo.dispose()
+
+    reopened = create_repository(f"sqlite+aiosqlite:///{db_path}")
+    try:
+        metrics = await reopened.get_metrics(bot_id="bot-sqlite")
+        assert metrics["runtime_counters"] == {"demo_total": 4}
+    finally:
+        await reopened.dispose()
+
+
+@pytest.mark.asyncio
+async def test_get_metrics_reads_from_read_database_url(tmp_path: Path) -> None:
+    primary_url = f"sqlite+aiosqlite:///{tmp_path / 'sqlite-primary.db'}"
+    replica_url = f"sqlite+aiosqlite:///{tmp_path / 'sqlite-replica.db'}"
+    replica = create_repository(replica_url)
+    repo = create_repository(primary_url, read_database_url=replica_url)
+    now = 1_700_000_100_000
+
+    try:
+        await replica.create_schema()
+        await repo.create_schema()
+        await repo.enqueue_telegram_update_job(bot_id="bot-sqlite", update_id=400, available_at=now)
+
+        metrics = await repo.get_metrics(bot_id="bot-sqlite")
+        assert metrics["telegram_update_jobs"] == 0
+        assert (await replica.get_metrics(bot_id="bot-sqlite"))["telegram_update_jobs"] == 0
+    finally:
+        await repo.dispose()
+        await replica.dispose()
+
+
+@pytest.mark.asyncio
+async def test_enqueue_deferred_button_action_cancels_overflow_in_one_batch(tmp_path: Path) -> None:
+    db_path = tmp_path / "sqlite-deferred-overflow.db"
+    repo = create_repository(f"sqlite+aiosqlite:///{db_path}")
+    now = 1_700_000_110_000
+
+    try:
+        await repo.create_schema()
+        session = await repo.get_or_create_active_session(
+            bot_id="bot-sqlite",
+            chat_id="1001",
+            adapter_name="codex",
+            adapter_model="gpt-5",
+            now=now,
+        )
+        for index in range(4):
+            await repo.enqueue_deferred_button_action(
+                bot_id="bot-sqlite",
+                chat_id="1001",
+                session_id=session.session_id,
+                action_type=f"action-{index}",
+                prompt_text="prompt",
+                origin_turn_id="turn-origin",
+                max_queue=4,
+                now=now + 1 + index,
+            )
+        await repo.enqueue_deferred_button_action(
+            bot_id="bot-sqlite",
+            chat_id="1001",
+            session_id=session.session_id,
+            action_type="action-4",
+            prompt_text="prompt",
+            origin_turn_id="turn-origin",
+            max_queue=2,
+            now=now + 10,
+        )
+
+        promoted = await repo.promote_next_deferred_action(bot_id="bot-sqlite", chat_id="1001", now=now + 11)
+        assert promoted is not None
+        assert promoted.action_type == "action-3"
+    finally:
+        await repo.dispose()
+
+
+@pytest.mark.asyncio
+async def test_run_service_promotes_deferred_action_when_run_already_finished(tmp_path: Path) -> None:
+    db_path = tmp_path / "sqlite-deferred-wakeup.db"
+    repo = create_repository(f"sqlite+aiosqlite:///{db_path}")
+    now = 1_700_000_120_000
+
+    try:
+        await repo.create_schema()
+        session = await repo.get_or_create_active_session(
+            bot_id="bot-sqlite",
+            chat_id="1001",
+            adapter_name="codex",
+            adapter_model="gpt-5",
+            now=now,
+        )
+
+        await RunService(repo).enqueue_deferred_button_action(
+            bot_id="bot-sqlite",
+            chat_id="1001",
+            session_id=session.session_id,
+            action_type="next",
+            prompt_text="continue",
+            origin_turn_id="turn-origin",
+            now=now + 1,
+        )
+
+        assert await repo.has_active_run(bot_id="bot-sqlite", chat_id="1001") is True
+        assert await repo.promote_next_deferred_action(bot_id="bot-sqlite", chat_id="1001", now=now + 2) is None
+    finally:
+        await repo.dispose()
+
+
+@pytest.mark.asyncio
+async def test_run_service_enqueue_survives_failed_promotion_recheck() -> None:
+    class _RacingRepository:
+        async def enqueue_deferred_button_action(self, **kwargs: object) -> str:
+            return "action-queued"
+
+        async def promote_next_deferred_action(self, **kwargs: object) -> None:
+            raise RuntimeError("uq_cli_run_jobs_bot_chat_active")
+
+    action_id = await RunService(_RacingRepository()).enqueue_deferred_button_action(  # type: ignore[arg-type]
+        bot_id="bot-sqlite",
+        chat_id="1001",
+        session_id="session-1",
+        action_type="next",
+        prompt_text="continue",
+        origin_turn_id="turn-origin",
+        now=1_700_000_130_000,
+    )
+
+    assert action_id == "action-queued"
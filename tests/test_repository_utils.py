@@ -4,7 +4,9 @@ from telegram_bot_new.db.repository import (
     _is_active_run_unique_conflict,
     _is_active_session_unique_conflict,
     _parse_sqlite_add_column_if_not_exists,
+    _batch_migration_statements,
     _split_sql_statements,
+    _strip_postgres_index_options,
 )
 
 
@@ -24,6 +26,52 @@ def test_split_sql_statements_handles_comments_and_blanks() -> None:
     assert "CREATE INDEX idx_a_id" in statements[1]
 
 
+def test_split_sql_statements_keeps_semicolons_inside_quotes_and_dollar_bodies() -> None:
+    sql = """
+    CREATE FUNCTION f() RETURNS int AS $body$ SELECT 1; $body$ LANGUAGE sql;
+    INSERT INTO t VALUES ('a;b'); /* skip; me */
+    SELECT $$;$$ -- trailing; comment
+    """
+
+    statements = _split_sql_statements(sql)
+
+    assert statements == [
+        "CREATE FUNCTION f() RETURNS int AS $body$ SELECT 1; $body$ LANGUAGE sql",
+        "INSERT INTO t VALUES ('a;b')",
+        "SELECT $$;$$",
+    ]
+
+
+def test_batch_migration_statements_groups_indexes_by_table_in_order() -> None:
+    statements = (
+        "CREATE TABLE a (id INT)",
+        "CREATE INDEX IF NOT EXISTS ix_a_id ON a (id)",
+        "CREATE TABLE b (id INT)",
+        "CREATE UNIQUE INDEX ix_b_id ON b (id)",
+        "CREATE INDEX CONCURRENTLY ix_a_v ON a (v)",
+        "DROP INDEX IF EXISTS ix_b_id",
+        "DROP INDEX CONCURRENTLY IF EXISTS ix_unknown",
+        "ANALYZE b",
+    )
+
+    batches = _batch_migration_statements(statements)
+
+    assert [(batch.parallel, batch.groups) for batch in batches] == [
+        (False, (("CREATE TABLE a (id INT)",),)),
+        (True, (("CREATE INDEX IF NOT EXISTS ix_a_id ON a (id)",),)),
+        (False, (("CREATE TABLE b (id INT)",),)),
+        (
+            True,
+            (
+                ("CREATE UNIQUE INDEX ix_b_id ON b (id)", "DROP INDEX IF EXISTS ix_b_id"),
+                ("CREATE INDEX CONCURRENTLY ix_a_v ON a (v)",),
+                ("DROP INDEX CONCURRENTLY IF EXISTS ix_unknown",),
+            ),
+        ),
+        (False, (("ANALYZE b",),)),
+    ]
+
+
 def _mk_integrity_error(message: str) -> IntegrityError:
     return IntegrityError("INSERT ...", {}, Exception(message))
 
@@ -63,3 +111,12 @@ def test_parse_sqlite_add_column_if_not_exists_matches_expected_shape() -> None:
 def test_parse_sqlite_add_column_if_not_exists_ignores_other_statements() -> None:
     parsed = _parse_sqlite_add_column_if_not_exists("CREATE INDEX idx ON sessions (chat_id)")
     assert parsed is None
+
+
+def test_strip_postgres_index_options_for_sqlite() -> None:
+    stripped = _strip_postgres_index_options(
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_jobs ON jobs (bot_id) INCLUDE (id, status) WHERE status = 'queued'"
+    )
+    assert stripped == "CREATE INDEX IF NOT EXISTS ix_jobs ON jobs (bot_id) WHERE status = 'queued'"
+    assert _strip_postgres_index_options("DROP INDEX CONCURRENTLY IF EXISTS ix_jobs") == "DROP INDEX IF EXISTS ix_jobs"
+    assert _strip_postgres_index_options("CREATE TABLE t (id INT)") == "CREATE TABLE t (id INT)"
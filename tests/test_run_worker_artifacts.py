@@ -3,6 +3,7 @@ from __future__ import annotations
 import time
 from pathlib import Path
 from types import SimpleNamespace
+from typing import Any
 
 import pytest
 
@@ -314,7 +315,7 @@ class _RepositoryForWorkerTest:
         bot_id: str,
         seq: int,
         event_type: str,
-        payload_json: str,
+        payload: dict[str, Any],
         now: int,
     ) -> None:
         if self._fail_append:
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
-import json
 from types import SimpleNamespace
+from typing import Any
 
 import pytest
 
@@ -251,10 +251,10 @@ class _Repository:
         bot_id: str,
         seq: int,
         event_type: str,
-        payload_json: str,
+        payload: dict[str, Any],
         now: int,
     ) -> None:
-        self.appended_events.append((event_type, payload_json))
+        self.appended_events.append((event_type, payload))
 
     async def is_turn_cancelled(self, *, turn_id: str) -> bool:
         return self.turn_cancelled
@@ -366,7 +366,7 @@ async def test_process_run_job_reports_missing_provider_binary_with_standard_mes
     event_types = [event_type for event_type, _ in repo.appended_events]
     assert "error" in event_types
     assert "turn_completed" in event_types
-    payloads = [json.loads(payload_json) for _, payload_json in repo.appended_events]
+    payloads = [payload for _, payload in repo.appended_events]
     assert any("provider=gemini executable not found" in (payload.get("payload", {}).get("message", "")) for payload in payloads)
 
 